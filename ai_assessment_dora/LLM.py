@@ -1,25 +1,33 @@
-import pandas as pd
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import AgglomerativeClustering
-import numpy as np
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import re
 import json
 
+import pipeline_stages
+from chunking import make_chunker, map_reduce_claims
+from extraction_cache import DEFAULT_CACHE_PATH, cached_extract_many
+from checkpoints import DEFAULT_CHECKPOINT_DIR, StageCheckpointer
+from data_loading import DEFAULT_BATCH_SIZE, id_column_for, load_metrics, load_projected
+from instrumentation import get_instrumentation
+# Stages shared with vllm/LLM_vllm.py; only extraction is engine-specific
+from pipeline_stages import (calculate_performance_scores, cluster_claims, cluster_stage, collapse_stage,
+                             embed_claims, embed_stage, generate_wordcloud, group_claims_by_label,
+                             map_scores_to_clusters, score_stage)
+# The model registry (torch, transformers), embedding, clustering and word
+# cloud modules are imported by the stages that use them
+
+
+MODEL_NAME = "MasterControlAIML/DeepSeek-R1-Qwen2.5-1.5b-SFT-R1-JSON-Unstructured-To-Structured"
+# Context length the extraction model is served with (see vllm/start_vllm_server.sh)
+MAX_MODEL_LEN = 32768
+
 
 def load_data(csv_path, transcript_column="transcript_text"):
-    df = pd.read_csv(csv_path)
+    # Only the id, transcript and engagement columns are parsed
+    df = load_projected(csv_path, transcript_column)
     return df
 
 
-def extract_claims(text):
-    model_name = "MasterControlAIML/DeepSeek-R1-Qwen2.5-1.5b-SFT-R1-JSON-Unstructured-To-Structured"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype="auto")
-    nlp_pipeline = pipeline("text-generation", model=model, tokenizer=tokenizer)
-    prompt = f"""
+def build_extraction_prompt(text):
+    return f"""
 You are a fact extraction assistant. 
 From the following YouTube transcript, extract all **factual claims** in **JSON array format**.
 Each claim should be concise, self-contained, and written in natural language. 
@@ -31,82 +39,167 @@ Transcript:
 Output JSON array of claims:
 ["""
 
-    result = nlp_pipeline(prompt, max_new_tokens=1024, do_sample=False)[0]['generated_text']
 
+def parse_claims(result):
+    # result is the completion only; the prompt already opened the array
     try:
-        claims = json.loads(result[result.find("["):result.rfind("]")+1])
+        claims = json.loads("[" + result[:result.rfind("]")+1])
     except:
         claims = re.findall(r'"(.*?)"', result)
     return claims
 
 
-def embed_claims(claims):
-    embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = embed_model.encode(claims)
-    return embeddings
-
-
-def cluster_claims(embeddings, claims, n_clusters=None):
-    clustering = AgglomerativeClustering(
-        n_clusters=n_clusters,
-        metric='cosine',
-        linkage='average'
+def extract_claims(text, model_name=MODEL_NAME, torch_dtype="auto", device=None,
+                   max_chunk_tokens=None, cache=None, backend="torch", num_threads=None):
+    # Long transcripts are split into overlapping chunks and merged.
+    # backend="int8" or "onnx" runs a CPU-optimized model (see cpu_backends.py)
+    return extract_claims_batch([text], batch_size=1, model_name=model_name, torch_dtype=torch_dtype,
+                                device=device, max_chunk_tokens=max_chunk_tokens, cache=cache,
+                                backend=backend, num_threads=num_threads)[0]
+
+
+def extract_claims_batch(texts, batch_size=8, max_new_tokens=1024, model_name=MODEL_NAME,
+                         torch_dtype="auto", device=None, max_chunk_tokens=None, overlap_tokens=256,
+                         cache=None, with_offsets=False, backend="torch", num_threads=None, on_failure=None,
+                         max_new_tokens_cap=1024):
+    """
+    Extract claims from many transcripts using length-bucketed batches.
+
+    Transcripts longer than the model context (or max_chunk_tokens) are split
+    into overlapping chunks; claims from all chunks are generated together and
+    merged per transcript. max_new_tokens may be an int or a function of the
+    longest prompt length in a bucket; a function's budgets are clamped to
+    max_new_tokens_cap, which is what the chunker reserves for the completion
+    (so prompt plus completion always fits). Chunks found in the optional
+    ExtractionCache are not regenerated; the cache is skipped when
+    max_new_tokens is a function, since a function can't be keyed by
+    the budgets it returns (completions cut at an old budget would be
+    reused). Returns one list of claims per
+    transcript, in input order; with_offsets=True yields (claim, chunk start
+    character) pairs instead. backend selects a CPU-optimized model ("int8"
+    dynamic quantization or "onnx"); num_threads caps CPU threads.
+    on_failure is called with the number of chunks that produced no output.
+    """
+    from model_registry import get_pipeline
+    from batched_generation import generate_bucketed
+
+    # Loaded once per process and reused for every transcript
+    nlp_pipeline = get_pipeline(model_name, torch_dtype=torch_dtype, device=device, backend=backend,
+                                num_threads=num_threads)
+    if not isinstance(max_new_tokens, int):
+        budget = max_new_tokens
+
+        def capped(longest):
+            return min(budget(longest), max_new_tokens_cap)
+        max_new_tokens = capped
+
+    chunker = make_chunker(
+        MAX_MODEL_LEN,
+        max_new_tokens if isinstance(max_new_tokens, int) else max_new_tokens_cap,
+        build_extraction_prompt,
+        overlap_tokens=overlap_tokens,
+        tokenizer=nlp_pipeline.tokenizer,
+        max_chunk_tokens=max_chunk_tokens
     )
-    labels = clustering.fit_predict(embeddings)
-    
-    clustered_claims = {}
-    for label, claim in zip(labels, claims):
-        clustered_claims.setdefault(label, []).append(claim)
-    return clustered_claims
-
-
-def calculate_performance_scores(df):
-    # Weighted performance score
-    df['performance_score'] = df['view_count'] * 0.6 + df['like_count'] * 0.3 + df['comment_count'] * 0.1
-    return df['performance_score'].tolist()
-
 
-def map_scores_to_clusters(clustered_claims, scores, transcripts):
-    cluster_scores = {}
-    score_idx = 0
-    for label, claims in clustered_claims.items():
-        cluster_scores[label] = scores[score_idx]
-        score_idx += 1
-    return cluster_scores
-
-
-def generate_wordcloud(clustered_claims, performance_scores):
-    weighted_claims = []
-    for label, claims in clustered_claims.items():
-        weight = int(performance_scores.get(label, 1))
-        weighted_claims.extend(claims * weight)
-    
-    text_for_wc = " ".join(weighted_claims)
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text_for_wc)
-    
-    plt.figure(figsize=(15, 7))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    plt.show()
-
-
-def main(csv_path, transcript_column="transcript_text"):
-    df = load_data(csv_path, transcript_column)
-    transcripts = df[transcript_column].dropna().tolist()
-    performance_scores = calculate_performance_scores(df)
+    def complete_many(chunk_texts):
+        prompts = [build_extraction_prompt(text) for text in chunk_texts]
+        get_instrumentation().record(requests=len(prompts))
+        return generate_bucketed(
+            nlp_pipeline,
+            prompts,
+            batch_size=batch_size,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            return_full_text=False
+        )
+
+    if not isinstance(max_new_tokens, int):
+        cache = None
+    sampling_params = {
+        "max_new_tokens": max_new_tokens,
+        "do_sample": False,
+        "torch_dtype": str(torch_dtype)
+    }
+    if backend != "torch":
+        # Quantized models can word claims differently; keep their cache entries apart
+        sampling_params["backend"] = backend
+
+    def extract_many(chunk_texts):
+        return cached_extract_many(cache, chunk_texts, build_extraction_prompt(""), model_name,
+                                   sampling_params, complete_many, parse_claims, on_failure)
+
+    return map_reduce_claims(texts, chunker, extract_many, with_offsets=with_offsets)
+
+
+def extract_stage(ckpt, csv_path, transcript_column="transcript_text", batch_size=8,
+                  cache_path=DEFAULT_CACHE_PATH, batch_rows=DEFAULT_BATCH_SIZE, stream_embeddings=False,
+                  backend="torch", num_threads=None, normalize=True):
+    """Claims stage (see pipeline_stages.extract_stage) with the in-process model"""
+    def extract_batch(transcripts, cache, on_failure):
+        return extract_claims_batch(transcripts, batch_size=batch_size, cache=cache, with_offsets=True,
+                                    backend=backend, num_threads=num_threads, on_failure=on_failure)
+
+    records = pipeline_stages.extract_stage(
+        ckpt, csv_path, transcript_column, extract_batch,
+        [MODEL_NAME, build_extraction_prompt("")] + ([backend] if backend != "torch" else []),
+        cache_path, batch_rows, stream_embeddings, normalize
+    )
+    # Free the LLM weights before the embedding model is loaded
+    from model_registry import release_models
+    release_models()
+    return records
+
+
+def main(csv_path, transcript_column="transcript_text", batch_size=8, cache_path=DEFAULT_CACHE_PATH,
+         checkpoint_dir=DEFAULT_CHECKPOINT_DIR, n_clusters=None, batch_rows=DEFAULT_BATCH_SIZE,
+         cluster_method="auto", wordcloud_path=None, stream_embeddings=False, backend="torch",
+         num_threads=None, normalize=True, check_sample=0):
+    # Each stage is persisted under checkpoint_dir; a rerun resumes from the
+    # last stage whose inputs are unchanged. backend/num_threads: CPU
+    # extraction options (see extract_claims_batch). normalize: strip caption
+    # artifacts before extraction (see transcript_normalization.py). With
+    # PIPELINE_PROFILE set each stage is timed (see instrumentation.py).
+    # check_sample: compare approximate clustering with exact clustering on
+    # this many claims (written to clustering_quality.json)
+    ckpt = StageCheckpointer(checkpoint_dir)
+    instr = get_instrumentation(reset=True)
+    try:
+        # Small columns only; transcripts are streamed in batches during extraction
+        with instr.stage("load_metrics") as stage:
+            df = load_metrics(csv_path, transcript_column)
+            video_ids = df[id_column_for(df)].tolist()
+            performance_scores = calculate_performance_scores(df)
+            stage.count(items=len(df))
     
-    all_claims = []
-    for transcript in transcripts:
-        claims = extract_claims(transcript)
-        all_claims.extend(claims)
+        with instr.stage("extraction") as stage:
+            records = extract_stage(ckpt, csv_path, transcript_column, batch_size, cache_path, batch_rows,
+                                    stream_embeddings, backend, num_threads, normalize)
+            stage.count(items=len(df))
+        with instr.stage("near_duplicates") as stage:
+            claim_table, collapsed = collapse_stage(ckpt, records)
+            stage.count(items=len(claim_table))
+        collapsed.report()
     
-    embeddings = embed_claims(all_claims)
-    clustered_claims = cluster_claims(embeddings, all_claims)
+        with instr.stage("embedding") as stage:
+            embeddings = embed_stage(ckpt, claim_table, collapsed)
+            stage.count(items=len(collapsed))
+        with instr.stage("clustering") as stage:
+            labels = cluster_stage(ckpt, embeddings, n_clusters, cluster_method, check_sample)
+            stage.count(items=len(collapsed))
+        with instr.stage("scoring") as stage:
+            clustered_claims, claim_counts, cluster_scores = score_stage(claim_table, collapsed, labels,
+                                                                         performance_scores, video_ids)
+            stage.count(items=len(claim_table))
     
-    cluster_scores = map_scores_to_clusters(clustered_claims, performance_scores, transcripts)
+        with instr.stage("wordcloud") as stage:
+            generate_wordcloud(clustered_claims, performance_scores=cluster_scores, claim_counts=claim_counts,
+                               output_path=wordcloud_path)
+            stage.count(items=len(collapsed))
     
-    generate_wordcloud(clustered_claims, performance_scores=cluster_scores)
-    return clustered_claims, cluster_scores
+        return clustered_claims, cluster_scores
+    finally:
+        instr.finish()
 
 
 if __name__ == "__main__":
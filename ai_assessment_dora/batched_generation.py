@@ -0,0 +1,125 @@
+"""
+Length-Bucketed Batched Generation
+==================================
+
+Runs a transformers text-generation pipeline over many prompts at once.
+
+Prompts are sorted by token length and grouped into buckets whose longest
+and shortest prompts are close in length, so batches carry little padding.
+Each bucket is fed through the pipeline with its own ``max_new_tokens`` and
+results are returned in the original prompt order.
+
+Usage:
+    from batched_generation import generate_bucketed
+
+    outputs = generate_bucketed(nlp_pipeline, prompts, batch_size=8)
+"""
+
+from typing import Callable, List, Sequence, Union
+
+
+MaxNewTokens = Union[int, Callable[[int], int]]
+
+
+def count_prompt_tokens(tokenizer, prompts: Sequence[str]) -> List[int]:
+    """Token length of each prompt, tokenized in one call"""
+    encoded = tokenizer(list(prompts), add_special_tokens=False)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def make_length_buckets(
+    lengths: Sequence[int],
+    max_bucket_size: int = 64,
+    max_padding_ratio: float = 1.25
+) -> List[List[int]]:
+    """
+    Group item indices into buckets of similar length
+
+    Args:
+        lengths: Token length of each item
+        max_bucket_size: Maximum number of items per bucket
+        max_padding_ratio: Start a new bucket once the longest item would
+            exceed the shortest by more than this factor
+
+    Returns:
+        List of buckets, each a list of indices into ``lengths``, shortest first
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for idx in order:
+        if current:
+            shortest = max(lengths[current[0]], 1)
+            too_long = lengths[idx] > shortest * max_padding_ratio
+            if too_long or len(current) >= max_bucket_size:
+                buckets.append(current)
+                current = []
+        current.append(idx)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def _prepare_tokenizer_for_batching(tokenizer):
+    """Decoder-only models need a pad token and left padding to batch"""
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+
+
+def generate_bucketed(
+    nlp_pipeline,
+    prompts: Sequence[str],
+    batch_size: int = 8,
+    max_new_tokens: MaxNewTokens = 1024,
+    max_bucket_size: int = 64,
+    max_padding_ratio: float = 1.25,
+    **generate_kwargs
+) -> List[str]:
+    """
+    Generate completions for many prompts using length buckets
+
+    Args:
+        nlp_pipeline: transformers text-generation pipeline
+        prompts: Prompts to complete
+        batch_size: Number of prompts per forward pass
+        max_new_tokens: Tokens to generate, either fixed or a function of the
+            longest prompt length (in tokens) in the bucket
+        max_bucket_size: Maximum number of prompts per bucket
+        max_padding_ratio: Maximum longest/shortest length ratio in a bucket
+        **generate_kwargs: Extra arguments passed to the pipeline call
+
+    Returns:
+        Generated text for each prompt, in the original order
+    """
+    if not prompts:
+        return []
+
+    tokenizer = nlp_pipeline.tokenizer
+    _prepare_tokenizer_for_batching(tokenizer)
+
+    lengths = count_prompt_tokens(tokenizer, prompts)
+    buckets = make_length_buckets(lengths, max_bucket_size, max_padding_ratio)
+
+    results: List[str] = [""] * len(prompts)
+    for bucket_num, bucket in enumerate(buckets, 1):
+        longest = lengths[bucket[-1]]
+        if callable(max_new_tokens):
+            bucket_max_new_tokens = max_new_tokens(longest)
+        else:
+            bucket_max_new_tokens = max_new_tokens
+
+        print(f"Generating bucket {bucket_num}/{len(buckets)} "
+              f"({len(bucket)} prompts, {lengths[bucket[0]]}-{longest} tokens)")
+
+        outputs = nlp_pipeline(
+            [prompts[i] for i in bucket],
+            batch_size=batch_size,
+            max_new_tokens=bucket_max_new_tokens,
+            **generate_kwargs
+        )
+        for idx, output in zip(bucket, outputs):
+            results[idx] = output[0]["generated_text"]
+
+    return results
@@ -0,0 +1,230 @@
+"""
+Stage Checkpoints
+=================
+
+On-disk checkpoints for the claim pipeline so a crash in a late stage
+(e.g. clustering) doesn't throw away hours of LLM extraction.
+
+Each stage's output is written in a compact format (claims as JSONL,
+embeddings and labels as ``.npy``, small results as JSON) together with a
+fingerprint of its inputs. On the next run a stage whose fingerprint is
+unchanged is loaded from disk instead of recomputed. Fingerprints chain:
+a stage's inputs include the fingerprint of the stage it consumes, so a
+change upstream invalidates everything downstream of it.
+
+A stage whose compute returns ``Incomplete`` (e.g. extraction with failed
+requests) is saved but marked incomplete: the next run computes it again
+instead of resuming (the extraction cache makes that cheap for the parts
+that succeeded), and its downstream stages are fingerprinted apart from
+those of a complete run.
+
+Usage:
+    from checkpoints import StageCheckpointer
+
+    ckpt = StageCheckpointer("checkpoints/run1")
+    claims = ckpt.stage("claims", [ckpt.file_fingerprint(csv_path), MODEL_NAME],
+                        lambda: extract_all(...), fmt="jsonl")
+    embeddings = ckpt.stage("embeddings", [ckpt.fingerprint("claims")],
+                            lambda: embed_claims(claims), fmt="npy")
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+MANIFEST_NAME = "manifest.json"
+
+_EXTENSIONS = {"jsonl": ".jsonl", "npy": ".npy", "json": ".json"}
+
+
+def _save(path: str, value: Any, fmt: str):
+    if fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for item in value:
+                f.write(json.dumps(item, ensure_ascii=False, default=_json_default))
+                f.write("\n")
+    elif fmt == "npy":
+        with open(path, "wb") as f:
+            np.save(f, np.asarray(value))
+    elif fmt == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, default=_json_default)
+    else:
+        raise ValueError(f"Unknown checkpoint format: {fmt}")
+
+
+def _load(path: str, fmt: str) -> Any:
+    if fmt == "jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if fmt == "npy":
+        return np.load(path, mmap_mode="r")
+    if fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    raise ValueError(f"Unknown checkpoint format: {fmt}")
+
+
+def _json_default(value):
+    """Serialize numpy scalars (e.g. cluster labels, scores)"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class Incomplete(NamedTuple):
+    """Stage output that is usable but must be recomputed on the next run"""
+    value: Any
+    reason: str
+
+
+def hash_parts(parts: Sequence[Any]) -> str:
+    """Stable hash of a list of JSON-serializable parts"""
+    payload = json.dumps(list(parts), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCheckpointer:
+    """Persists stage outputs and skips stages whose inputs are unchanged"""
+
+    def __init__(self, run_dir: Optional[str] = None):
+        """
+        Initialize checkpointer
+
+        Args:
+            run_dir: Directory for checkpoint files; None disables
+                checkpointing (every stage is computed)
+        """
+        self.run_dir = run_dir
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, str] = {}
+
+        if run_dir is not None:
+            os.makedirs(run_dir, exist_ok=True)
+            manifest_path = os.path.join(run_dir, MANIFEST_NAME)
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+
+    def file_fingerprint(self, path: str, block_size: int = 1 << 20) -> str:
+        """Content hash of an input file (just the path when disabled)"""
+        if self.run_dir is None:
+            return path
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _output_fingerprint(entry: Dict[str, Any]) -> str:
+        """Fingerprint downstream stages chain on (distinct for incomplete outputs)"""
+        if entry.get("incomplete"):
+            return hash_parts([entry["fingerprint"], "incomplete", entry["completed_at"]])
+        return entry["fingerprint"]
+
+    def fingerprint(self, name: str) -> str:
+        """Fingerprint of a stage that already ran (or was loaded) in this process"""
+        return self._fingerprints[name]
+
+    def load(self, name: str) -> Any:
+        """
+        Load a stage completed by an earlier run, without knowing its inputs
+
+        Lets a later stage run in a separate process (e.g. one CLI
+        subcommand per stage): the loaded stage's fingerprint is taken from
+        the manifest, so downstream fingerprints chain as usual.
+
+        Args:
+            name: Stage name
+
+        Returns:
+            Stage output
+
+        Raises:
+            FileNotFoundError: The stage has no checkpoint in run_dir
+        """
+        entry = self.manifest.get(name) if self.run_dir is not None else None
+        path = os.path.join(self.run_dir, entry["file"]) if entry is not None else None
+        if path is None or not os.path.exists(path):
+            raise FileNotFoundError(f"No '{name}' checkpoint in {self.run_dir}")
+        self._fingerprints[name] = self._output_fingerprint(entry)
+        print(f"Loaded '{name}' from {path}")
+        if entry.get("incomplete"):
+            print(f"Warning: '{name}' is incomplete ({entry['incomplete']}); rerun its stage to retry")
+        return _load(path, entry["format"])
+
+    def _write_manifest(self):
+        path = os.path.join(self.run_dir, MANIFEST_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def stage(
+        self,
+        name: str,
+        inputs: Sequence[Any],
+        compute: Callable[[], Any],
+        fmt: str = "json"
+    ) -> Any:
+        """
+        Run a stage or load its checkpoint
+
+        Args:
+            name: Stage name (also the checkpoint file name)
+            inputs: Everything the stage output depends on: parameters and
+                the fingerprints of upstream stages
+            compute: Function producing the stage output, or Incomplete
+                wrapping it when part of it failed
+            fmt: "jsonl" (list of records), "npy" (array) or "json"
+
+        Returns:
+            Stage output, loaded from disk if the inputs are unchanged
+        """
+        fp = hash_parts([name] + list(inputs))
+        self._fingerprints[name] = fp
+
+        if self.run_dir is None:
+            value = compute()
+            return value.value if isinstance(value, Incomplete) else value
+
+        path = os.path.join(self.run_dir, name + _EXTENSIONS[fmt])
+        entry = self.manifest.get(name)
+        if entry is not None and entry["fingerprint"] == fp and os.path.exists(path):
+            if not entry.get("incomplete"):
+                print(f"Resuming: loaded '{name}' from {path}")
+                return _load(path, fmt)
+            print(f"Recomputing '{name}': the last run was incomplete ({entry['incomplete']})")
+
+        start = time.time()
+        value = compute()
+        incomplete = None
+        if isinstance(value, Incomplete):
+            value, incomplete = value.value, value.reason
+            print(f"Warning: '{name}' is incomplete ({incomplete}); it will be recomputed on the next run")
+
+        # Write to a temporary file first so a crash never leaves a
+        # half-written checkpoint that looks complete
+        tmp_path = path + ".tmp"
+        _save(tmp_path, value, fmt)
+        os.replace(tmp_path, path)
+
+        self.manifest[name] = {
+            "fingerprint": fp,
+            "file": os.path.basename(path),
+            "format": fmt,
+            "seconds": round(time.time() - start, 3),
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        if incomplete:
+            self.manifest[name]["incomplete"] = incomplete
+        self._fingerprints[name] = self._output_fingerprint(self.manifest[name])
+        self._write_manifest()
+        return value
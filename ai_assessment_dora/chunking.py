@@ -0,0 +1,331 @@
+"""
+Transcript Chunking
+===================
+
+Token-aware map-reduce over transcripts that are too long for one prompt.
+
+Each transcript is split into overlapping windows that fit the target
+model's context (``max_model_len`` minus the prompt template and the
+generation budget). Claims are extracted from all chunks at once by a
+caller-supplied function, then merged per transcript with duplicates from
+the overlapping regions removed.
+
+Without a local tokenizer, chunks are cut on a characters-per-token
+estimate, which falls short on digits and non-English text. A
+``token_counter`` (e.g. the vLLM server's /tokenize) then checks every chunk
+the estimate could have under-counted and re-splits those over budget;
+without one, the budget keeps ESTIMATE_HEADROOM in reserve instead.
+
+Usage:
+    from chunking import TranscriptChunker, chunk_token_budget, map_reduce_claims
+
+    budget = chunk_token_budget(max_model_len=32768, max_new_tokens=1024,
+                                prompt_overhead_tokens=120)
+    chunker = TranscriptChunker(budget, overlap_tokens=256, tokenizer=tokenizer)
+    claims_per_transcript = map_reduce_claims(transcripts, chunker, extract_many)
+"""
+
+import math
+import re
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+# Share of an estimated budget kept free when chunks can't be counted exactly
+ESTIMATE_HEADROOM = 0.25
+
+_WORD_RE = re.compile(r"\S+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+class Chunk(NamedTuple):
+    """One window of a transcript"""
+    text: str
+    index: int
+    start_char: int
+    end_char: int
+
+
+def chunk_token_budget(
+    max_model_len: int,
+    max_new_tokens: int,
+    prompt_overhead_tokens: int,
+    safety_margin: int = 256
+) -> int:
+    """
+    Largest transcript chunk (in tokens) that fits in one request
+
+    Args:
+        max_model_len: Context length of the target model
+        max_new_tokens: Tokens reserved for the completion
+        prompt_overhead_tokens: Tokens used by the prompt template itself
+        safety_margin: Extra headroom for tokenizer differences
+
+    Returns:
+        Token budget for the transcript part of the prompt
+    """
+    budget = max_model_len - max_new_tokens - prompt_overhead_tokens - safety_margin
+    if budget <= 0:
+        raise ValueError(
+            f"max_model_len={max_model_len} leaves no room for a transcript "
+            f"(max_new_tokens={max_new_tokens}, overhead={prompt_overhead_tokens})"
+        )
+    return budget
+
+
+class TranscriptChunker:
+    """Split text into overlapping windows of at most ``max_chunk_tokens``"""
+
+    def __init__(self, max_chunk_tokens: int, overlap_tokens: int = 256, tokenizer=None,
+                 token_counter: Optional[Callable[[str], Optional[int]]] = None):
+        """
+        Initialize chunker
+
+        Args:
+            max_chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens shared between consecutive chunks so claims
+                spanning a boundary appear whole in at least one chunk
+            tokenizer: Hugging Face fast tokenizer for exact counts; without
+                one, token counts are estimated from word lengths
+            token_counter: Exact token count of a text (None when it can't
+                tell); used to check estimated chunks when there is no tokenizer
+        """
+        if overlap_tokens >= max_chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_chunk_tokens")
+        self.max_chunk_tokens = max_chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer
+        self.token_counter = token_counter if tokenizer is None else None
+
+    def _units(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start_char, end_char, n_tokens) for each token or word in text"""
+        if self.tokenizer is not None:
+            encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+            return [(start, end, 1) for start, end in encoded["offset_mapping"]]
+        return [
+            (m.start(), m.end(), max(1, math.ceil(len(m.group()) / CHARS_PER_TOKEN)))
+            for m in _WORD_RE.finditer(text)
+        ]
+
+    def count_tokens(self, text: str) -> int:
+        return sum(n for _, _, n in self._units(text))
+
+    def split(self, text: str) -> List[Chunk]:
+        """
+        Split text into overlapping chunks
+
+        Args:
+            text: Transcript text
+
+        Returns:
+            Chunks in document order (a single chunk if the text already fits)
+        """
+        chunks = self._split_estimated(text)
+        if self.token_counter is None:
+            return chunks
+        pieces = [piece for chunk in chunks for piece in self._fit(chunk)]
+        return [piece._replace(index=i) for i, piece in enumerate(pieces)]
+
+    def _fit(self, chunk: Chunk) -> List[Chunk]:
+        """Re-split a chunk whose exact token count exceeds the budget"""
+        estimate = self.count_tokens(chunk.text)
+        # An estimated token covers at most CHARS_PER_TOKEN real ones
+        if estimate * CHARS_PER_TOKEN <= self.max_chunk_tokens:
+            return [chunk]
+        exact = self.token_counter(chunk.text)
+        if exact is None or exact <= self.max_chunk_tokens:
+            return [chunk]
+        # Shrink the estimated budget by how far the estimate fell short
+        budget = max(2, int(self.max_chunk_tokens * estimate / exact * 0.9))
+        pieces = TranscriptChunker(budget, min(self.overlap_tokens, budget // 4)).split(chunk.text)
+        if len(pieces) == 1:
+            # A single word over budget; nothing left to split
+            return [chunk]
+        # Each piece is checked against this chunker's budget again
+        return [fitted for p in pieces for fitted in self._fit(
+            Chunk(p.text, 0, chunk.start_char + p.start_char, chunk.start_char + p.end_char)
+        )]
+
+    def _split_estimated(self, text: str) -> List[Chunk]:
+        units = self._units(text)
+        if not units or sum(n for _, _, n in units) <= self.max_chunk_tokens:
+            return [Chunk(text, 0, 0, len(text))]
+
+        chunks: List[Chunk] = []
+        i = 0
+        while i < len(units):
+            j = i
+            total = 0
+            while j < len(units) and (j == i or total + units[j][2] <= self.max_chunk_tokens):
+                total += units[j][2]
+                j += 1
+
+            start_char, end_char = units[i][0], units[j - 1][1]
+            chunks.append(Chunk(text[start_char:end_char], len(chunks), start_char, end_char))
+            if j >= len(units):
+                break
+
+            # Step back so the next chunk repeats the last overlap_tokens
+            k = j
+            overlap = 0
+            while k - 1 > i and overlap + units[k - 1][2] <= self.overlap_tokens:
+                overlap += units[k - 1][2]
+                k -= 1
+            i = k
+
+        return chunks
+
+
+def claim_text(claim: Any) -> str:
+    """Text of a claim, whether a plain string or a {"claim": ...} object"""
+    if isinstance(claim, dict):
+        return str(claim.get("claim", ""))
+    return str(claim)
+
+
+def normalize_claim(text: str) -> str:
+    """Lowercase and strip punctuation so trivially different copies compare equal"""
+    return _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def merge_chunk_claims(
+    chunk_claims: Sequence[Sequence[Any]],
+    similarity_threshold: float = 0.8,
+    chunk_offsets: Optional[Sequence[int]] = None
+) -> List[Any]:
+    """
+    Reduce step: merge claims from consecutive chunks of one transcript
+
+    Exact duplicates (after normalization) are dropped anywhere; near
+    duplicates are dropped when they match a claim from the previous chunk,
+    which is where the overlapping window repeats text.
+
+    Args:
+        chunk_claims: Claims extracted from each chunk, in chunk order
+        similarity_threshold: Word-set Jaccard similarity treated as duplicate
+        chunk_offsets: Optional start character of each chunk; when given,
+            (claim, offset) pairs are returned
+
+    Returns:
+        Deduplicated claims in first-seen order
+    """
+    merged: List[Any] = []
+    seen: Set[str] = set()
+    previous: List[Set[str]] = []
+
+    for chunk_idx, claims in enumerate(chunk_claims):
+        current: List[Set[str]] = []
+        for claim in claims:
+            norm = normalize_claim(claim_text(claim))
+            if not norm:
+                continue
+            words = set(norm.split())
+            current.append(words)
+            if norm in seen:
+                continue
+            if any(_jaccard(words, prev) >= similarity_threshold for prev in previous):
+                continue
+            seen.add(norm)
+            merged.append(claim if chunk_offsets is None else (claim, chunk_offsets[chunk_idx]))
+        previous = current
+
+    return merged
+
+
+def map_reduce_claims(
+    texts: Sequence[str],
+    chunker: TranscriptChunker,
+    extract_many: Callable[[List[str]], List[List[Any]]],
+    similarity_threshold: float = 0.8,
+    with_offsets: bool = False
+) -> List[List[Any]]:
+    """
+    Extract claims from many transcripts via overlapping chunks
+
+    Args:
+        texts: Transcripts
+        chunker: Chunker sized for the target model
+        extract_many: Function extracting claims from a list of chunk texts
+            (expected to run them concurrently / batched), one list per chunk
+        similarity_threshold: Passed to merge_chunk_claims
+        with_offsets: Return (claim, chunk start character) pairs
+
+    Returns:
+        Merged claims for each transcript, in input order
+    """
+    chunk_texts: List[str] = []
+    owners: List[int] = []
+    offsets: List[int] = []
+    for text_idx, text in enumerate(texts):
+        for chunk in chunker.split(text):
+            chunk_texts.append(chunk.text)
+            owners.append(text_idx)
+            offsets.append(chunk.start_char)
+
+    if len(chunk_texts) > len(texts):
+        print(f"Split {len(texts)} transcripts into {len(chunk_texts)} chunks")
+
+    chunk_results = extract_many(chunk_texts) if chunk_texts else []
+
+    per_text: List[List[List[Any]]] = [[] for _ in texts]
+    per_text_offsets: List[List[int]] = [[] for _ in texts]
+    for owner, offset, claims in zip(owners, offsets, chunk_results):
+        per_text[owner].append(claims)
+        per_text_offsets[owner].append(offset)
+
+    return [
+        merge_chunk_claims(claims, similarity_threshold, chunk_offsets if with_offsets else None)
+        for claims, chunk_offsets in zip(per_text, per_text_offsets)
+    ]
+
+
+def make_chunker(
+    max_model_len: int,
+    max_new_tokens: int,
+    prompt_template: Callable[[str], str],
+    overlap_tokens: int = 256,
+    tokenizer=None,
+    max_chunk_tokens: Optional[int] = None,
+    token_counter: Optional[Callable[[str], Optional[int]]] = None
+) -> TranscriptChunker:
+    """
+    Build a chunker sized for a model and prompt template
+
+    Args:
+        max_model_len: Context length of the target model
+        max_new_tokens: Tokens reserved for the completion
+        prompt_template: Function building the prompt around a transcript
+        overlap_tokens: Tokens shared between consecutive chunks
+        tokenizer: Optional Hugging Face tokenizer for exact counts
+        max_chunk_tokens: Optional lower cap (e.g. to bound prefill time)
+        token_counter: Exact token count of a text (e.g. a server's
+            /tokenize), used when there is no tokenizer; when it returns
+            None the chunker falls back to estimates with ESTIMATE_HEADROOM
+
+    Returns:
+        Configured TranscriptChunker
+    """
+    probe = TranscriptChunker(max_chunk_tokens=2, overlap_tokens=1, tokenizer=tokenizer)
+    overhead = probe.count_tokens(prompt_template(""))
+    exact = tokenizer is not None
+    if not exact and token_counter is not None:
+        counted = token_counter(prompt_template(""))
+        if counted is not None:
+            overhead, exact = counted, True
+        else:
+            token_counter = None
+    budget = chunk_token_budget(max_model_len, max_new_tokens, overhead)
+    if not exact:
+        # Estimates can fall short of the real count by roughly this share
+        budget = int(budget / (1 + ESTIMATE_HEADROOM))
+    if max_chunk_tokens is not None:
+        budget = min(budget, max_chunk_tokens)
+    return TranscriptChunker(budget, overlap_tokens=min(overlap_tokens, budget // 4), tokenizer=tokenizer,
+                             token_counter=token_counter)
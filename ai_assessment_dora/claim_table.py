@@ -0,0 +1,132 @@
+"""
+Claim Table
+===========
+
+Columnar table of extracted claims with their provenance, and vectorized
+per-cluster performance scoring.
+
+Each row is one extracted claim. Columns are filled in as the pipeline
+stages complete:
+
+    claim_id              - position of the claim in extraction order
+    video_id              - video the claim came from
+    chunk_offset          - start character of the transcript chunk it was
+                            extracted from
+    claim                 - the claim (string or {"claim": ...} object)
+    near_duplicate_group  - group from near_duplicates.near_duplicate_groups
+    embedding_row         - row in the embedding store
+    cluster_label         - cluster of the claim
+
+Cluster scores join each claim to its video's performance score through
+integer codes and aggregate with bincount, so there is no per-claim
+Python loop.
+
+Usage:
+    from claim_table import build_claim_table, cluster_performance
+
+    table = build_claim_table(records)
+    table["cluster_label"] = labels
+    scores = cluster_performance(table, video_ids, performance_scores)
+"""
+
+from typing import Any, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# How the per-cluster score is aggregated:
+#   sum      - sum of the video score over every claim in the cluster
+#   mean     - mean score of the distinct videos in the cluster
+#   weighted - mean over claims, i.e. videos weighted by how many of the
+#              cluster's claims they contributed
+AGGREGATIONS = ("sum", "mean", "weighted")
+
+
+def build_claim_table(records: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Claim table from extraction records
+
+    Args:
+        records: {"video_id", "claim", optional "chunk_offset"} per claim
+
+    Returns:
+        DataFrame with claim_id, video_id, chunk_offset and claim columns
+    """
+    table = pd.DataFrame.from_records(
+        records, columns=["video_id", "chunk_offset", "claim"]
+    )
+    table.insert(0, "claim_id", np.arange(len(table), dtype=np.int64))
+    table["chunk_offset"] = table["chunk_offset"].fillna(0).astype(np.int64)
+    return table
+
+
+def cluster_performance(
+    table: pd.DataFrame,
+    video_ids: Sequence[Any],
+    scores: Sequence[float]
+) -> pd.DataFrame:
+    """
+    Per-cluster claim counts and aggregated video performance
+
+    Args:
+        table: Claim table with video_id and cluster_label columns
+        video_ids: Id of each scored video
+        scores: Performance score of each video (calculate_performance_scores)
+
+    Returns:
+        DataFrame indexed by cluster_label with claims, videos and one
+        column per aggregation in AGGREGATIONS
+    """
+    # First score wins if an id appears twice in the CSV
+    videos = pd.Index(video_ids)
+    first = ~videos.duplicated()
+    videos = videos[first]
+    video_scores = np.append(np.asarray(scores, dtype=np.float64)[first], 0.0)
+
+    # Integer codes for the join and the groupby; unknown ids score 0
+    video_codes = videos.get_indexer(table["video_id"])
+    video_codes[video_codes < 0] = len(videos)
+    claim_scores = video_scores[video_codes]
+    label_codes, labels = pd.factorize(table["cluster_label"], sort=True)
+
+    k = len(labels)
+    claims = np.bincount(label_codes, minlength=k)
+    total = np.bincount(label_codes, weights=claim_scores, minlength=k)
+
+    # Distinct (cluster, video) pairs for per-video aggregates
+    pairs = np.sort(label_codes.astype(np.int64) * (len(videos) + 1) + video_codes)
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+    pair_labels = pairs // (len(videos) + 1)
+    pair_videos = pairs % (len(videos) + 1)
+    distinct = np.bincount(pair_labels, minlength=k)
+    distinct_total = np.bincount(pair_labels, weights=video_scores[pair_videos], minlength=k)
+
+    return pd.DataFrame({
+        "claims": claims,
+        "videos": distinct,
+        "sum": total,
+        "mean": distinct_total / np.maximum(distinct, 1),
+        "weighted": total / np.maximum(claims, 1)
+    }, index=pd.Index(labels, name="cluster_label"))
+
+
+def cluster_scores(
+    table: pd.DataFrame,
+    video_ids: Sequence[Any],
+    scores: Sequence[float],
+    how: str = "weighted"
+) -> Dict[Any, float]:
+    """
+    One performance score per cluster label
+
+    Args:
+        table, video_ids, scores: As for cluster_performance
+        how: One of AGGREGATIONS
+
+    Returns:
+        {cluster_label: score}
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{how}'. Choose from {AGGREGATIONS}")
+    return cluster_performance(table, video_ids, scores)[how].to_dict()
@@ -0,0 +1,224 @@
+"""
+Claim Clustering
+================
+
+Clustering backends for claim embeddings.
+
+``exact`` is the original average-linkage AgglomerativeClustering on cosine
+distance. It needs the full pairwise distance matrix and stops fitting in
+RAM at around 50k claims. The graph backends first build a sparse
+k-nearest-neighbour graph (faiss HNSW when installed, otherwise batched
+scikit-learn neighbour search) and cluster on that:
+
+    knn_agglomerative - average linkage constrained to kNN edges
+    knn_graph         - connected components of the mutual-kNN graph
+                        thresholded at the cosine distance cut-off;
+                        linear in the number of edges, scales to millions
+
+Without faiss the neighbour search is brute force, O(n^2) like ``exact``
+(though in bounded memory); a warning is printed above EXACT_MAX_CLAIMS.
+compare_with_exact scores a graph backend against ``exact`` on a sample,
+e.g. after each clustering run (cluster_stage's check_sample).
+
+Usage:
+    from clustering import cluster_labels, compare_with_exact
+
+    labels = cluster_labels(embeddings, method="knn_graph")
+    report = compare_with_exact(embeddings, method="knn_graph", sample_size=2000)
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import AgglomerativeClustering
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+from sklearn.neighbors import NearestNeighbors
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+# Cosine distance below which two claims are treated as the same topic
+# when no n_clusters is given
+DEFAULT_DISTANCE_THRESHOLD = 0.35
+DEFAULT_NEIGHBORS = 15
+
+# "auto" uses the exact method up to this many claims
+EXACT_MAX_CLAIMS = 20000
+
+METHODS = ("auto", "exact", "knn_agglomerative", "knn_graph")
+
+
+def resolve_method(method: str, n: int) -> str:
+    """Backend "auto" picks for n claims; other methods are returned as-is"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown clustering method '{method}'. Choose from {METHODS}")
+    if method == "auto":
+        return "exact" if n <= EXACT_MAX_CLAIMS else "knn_graph"
+    return method
+
+
+def _normalize(embeddings) -> np.ndarray:
+    """Dense float32 rows scaled to unit length, so inner product = cosine"""
+    X = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def knn_graph(embeddings, n_neighbors: int = DEFAULT_NEIGHBORS, batch_size: int = 4096):
+    """
+    Sparse k-nearest-neighbour graph under cosine distance
+
+    Args:
+        embeddings: (n, d) array-like
+        n_neighbors: Neighbours per point (excluding itself)
+        batch_size: Query rows per batch for the scikit-learn fallback
+
+    Returns:
+        (n, n) scipy CSR matrix with cosine distances on the edges
+    """
+    X = _normalize(embeddings)
+    n = X.shape[0]
+    k = min(n_neighbors + 1, n)
+
+    if faiss is not None:
+        index = faiss.IndexHNSWFlat(X.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        index.add(X)
+        similarities, indices = index.search(X, k)
+        distances = 1.0 - similarities
+    else:
+        if n > EXACT_MAX_CLAIMS:
+            print(f"Warning: faiss is not installed; the kNN graph over {n} claims uses brute-force "
+                  f"search (O(n^2)). Install faiss-cpu for approximate search")
+        nn = NearestNeighbors(n_neighbors=k, metric="cosine").fit(X)
+        distances = np.empty((n, k), dtype=np.float32)
+        indices = np.empty((n, k), dtype=np.int64)
+        for start in range(0, n, batch_size):
+            d, i = nn.kneighbors(X[start:start + batch_size])
+            distances[start:start + batch_size] = d
+            indices[start:start + batch_size] = i
+
+    rows = np.repeat(np.arange(n), k)
+    cols = indices.ravel()
+    dists = np.clip(distances.ravel(), 0.0, 2.0)
+
+    # Drop self-loops and faiss padding (-1 when fewer than k neighbours)
+    keep = (cols >= 0) & (cols != rows)
+    return csr_matrix((dists[keep], (rows[keep], cols[keep])), shape=(n, n))
+
+
+def _exact_labels(embeddings, n_clusters, distance_threshold, connectivity=None) -> np.ndarray:
+    clustering = AgglomerativeClustering(
+        n_clusters=n_clusters,
+        distance_threshold=None if n_clusters is not None else distance_threshold,
+        metric='cosine',
+        linkage='average',
+        connectivity=connectivity
+    )
+    return clustering.fit_predict(np.asarray(embeddings, dtype=np.float32))
+
+
+def _graph_component_labels(graph, distance_threshold: float) -> np.ndarray:
+    """Connected components of mutual-kNN edges under the threshold"""
+    close = graph.copy()
+    close.data = (close.data <= distance_threshold).astype(np.int8)
+    close.eliminate_zeros()
+    mutual = close.minimum(close.T)
+    _, labels = connected_components(mutual, directed=False)
+    return labels
+
+
+def cluster_labels(
+    embeddings,
+    n_clusters: Optional[int] = None,
+    method: str = "auto",
+    distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
+    n_neighbors: int = DEFAULT_NEIGHBORS
+) -> np.ndarray:
+    """
+    Cluster embeddings with the selected backend
+
+    Args:
+        embeddings: (n, d) array-like (e.g. an EmbeddingView)
+        n_clusters: Number of clusters; None cuts at distance_threshold
+            (knn_graph always uses the threshold)
+        method: "auto", "exact", "knn_agglomerative" or "knn_graph"
+        distance_threshold: Cosine distance cut-off
+        n_neighbors: Neighbours per claim for the graph backends
+
+    Returns:
+        Cluster label per row
+    """
+    n = len(embeddings)
+    method = resolve_method(method, n)
+    if n < 2:
+        return np.zeros(n, dtype=np.int64)
+
+    if method == "exact":
+        return _exact_labels(embeddings, n_clusters, distance_threshold)
+
+    graph = knn_graph(embeddings, n_neighbors=n_neighbors)
+    if method == "knn_agglomerative":
+        connectivity = graph.copy()
+        connectivity.data[:] = 1
+        return _exact_labels(embeddings, n_clusters, distance_threshold, connectivity=connectivity)
+    return _graph_component_labels(graph, distance_threshold)
+
+
+def compare_with_exact(
+    embeddings,
+    method: str = "knn_graph",
+    sample_size: int = 2000,
+    n_clusters: Optional[int] = None,
+    distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
+    n_neighbors: int = DEFAULT_NEIGHBORS,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Quality report: an approximate backend against the exact method on a sample
+
+    Args:
+        embeddings: (n, d) array-like
+        method: Backend to evaluate
+        sample_size: Rows sampled (the exact method is O(sample_size^2))
+        n_clusters, distance_threshold, n_neighbors: As for cluster_labels
+        seed: Random seed for the sample
+
+    Returns:
+        Dictionary with agreement scores (ARI, NMI), cluster counts and timings
+    """
+    n = len(embeddings)
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(n, size=min(sample_size, n), replace=False))
+    # Only the sampled rows are gathered (embeddings may be a store view)
+    X = np.asarray(embeddings[sample], dtype=np.float32)
+
+    start = time.time()
+    exact = cluster_labels(X, n_clusters, "exact", distance_threshold)
+    exact_seconds = time.time() - start
+
+    start = time.time()
+    approx = cluster_labels(X, n_clusters, method, distance_threshold, n_neighbors)
+    approx_seconds = time.time() - start
+
+    report = {
+        "method": method,
+        "sample_size": len(sample),
+        "adjusted_rand_index": float(adjusted_rand_score(exact, approx)),
+        "normalized_mutual_info": float(normalized_mutual_info_score(exact, approx)),
+        "exact_clusters": int(len(np.unique(exact))),
+        "approx_clusters": int(len(np.unique(approx))),
+        "exact_seconds": round(exact_seconds, 3),
+        "approx_seconds": round(approx_seconds, 3)
+    }
+    print(f"Clustering quality ({method} vs exact, n={report['sample_size']}): "
+          f"ARI={report['adjusted_rand_index']:.3f}, NMI={report['normalized_mutual_info']:.3f}, "
+          f"clusters {report['approx_clusters']} vs {report['exact_clusters']}, "
+          f"{report['approx_seconds']}s vs {report['exact_seconds']}s")
+    return report
@@ -0,0 +1,140 @@
+"""
+Data Loading
+============
+
+Streaming, column-projected reader for the merged YouTube CSV.
+
+Only the columns the pipeline uses (id, transcript text and the engagement
+counts) are parsed, with explicit dtypes, and rows are yielded in batches,
+so memory stays flat regardless of CSV size and long description columns
+are never materialized.
+
+Usage:
+    from data_loading import iter_batches, load_metrics
+
+    for batch in iter_batches(csv_path, "transcript_text", batch_size=500):
+        transcripts = batch["transcript_text"].tolist()
+        ...
+    metrics = load_metrics(csv_path, "transcript_text")
+
+pandas is imported on first use, so importing the module (e.g. for its
+defaults) doesn't cost pandas' import time.
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+DEFAULT_ID_COLUMN = "video_id"
+DEFAULT_BATCH_SIZE = 500
+METRIC_COLUMNS = ["view_count", "like_count", "comment_count"]
+
+# Name of the id column in yielded batches when the CSV has none
+ROW_ID_COLUMN = "row_id"
+
+
+def read_header(csv_path: str) -> List[str]:
+    """Column names of a CSV without reading any rows"""
+    import pandas as pd
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def _projection(csv_path: str, transcript_column: str, id_column: str,
+                include_text: bool) -> Dict[str, str]:
+    """Columns to read and their dtypes"""
+    header = read_header(csv_path)
+    if transcript_column not in header:
+        raise ValueError(f"Column '{transcript_column}' not found in {csv_path}")
+
+    dtypes = {transcript_column: "string"} if include_text else {}
+    if id_column in header:
+        dtypes[id_column] = "string"
+    for column in METRIC_COLUMNS:
+        if column in header:
+            dtypes[column] = "float64"
+    return dtypes
+
+
+def iter_batches(
+    csv_path: str,
+    transcript_column: str = "transcript_text",
+    id_column: str = DEFAULT_ID_COLUMN,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    include_text: bool = True
+) -> Iterator["pd.DataFrame"]:
+    """
+    Yield projected rows that have a transcript, in batches
+
+    Args:
+        csv_path: Path to the merged CSV
+        transcript_column: Column holding the transcript text
+        id_column: Column identifying the video; if the CSV has none, a
+            ``row_id`` column with the row's position in the file is added
+        batch_size: Rows read per batch
+        include_text: Keep the transcript column in the yielded batches
+            (False: only ids and metrics, for scoring)
+
+    Yields:
+        DataFrames with the id column, metric columns and (optionally) the
+        transcript column; rows with an empty transcript are dropped
+    """
+    import pandas as pd
+    dtypes = _projection(csv_path, transcript_column, id_column, include_text=True)
+    has_id = id_column in dtypes
+    out_id = id_column if has_id else ROW_ID_COLUMN
+
+    reader = pd.read_csv(
+        csv_path,
+        usecols=list(dtypes.keys()),
+        dtype=dtypes,
+        chunksize=batch_size
+    )
+    for batch in reader:
+        if not has_id:
+            batch[ROW_ID_COLUMN] = batch.index.astype("int64")
+
+        text = batch[transcript_column]
+        batch = batch[text.notna() & (text.str.strip() != "")]
+        if not include_text:
+            batch = batch.drop(columns=[transcript_column])
+        if len(batch):
+            yield batch.reset_index(drop=True)
+
+
+def load_projected(
+    csv_path: str,
+    transcript_column: str = "transcript_text",
+    id_column: str = DEFAULT_ID_COLUMN,
+    include_text: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> "pd.DataFrame":
+    """Concatenate all projected batches into one DataFrame"""
+    import pandas as pd
+    batches = list(iter_batches(csv_path, transcript_column, id_column, batch_size, include_text))
+    if not batches:
+        columns = list(_projection(csv_path, transcript_column, id_column, include_text).keys())
+        return pd.DataFrame(columns=columns)
+    return pd.concat(batches, ignore_index=True)
+
+
+def load_metrics(
+    csv_path: str,
+    transcript_column: str = "transcript_text",
+    id_column: str = DEFAULT_ID_COLUMN,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> "pd.DataFrame":
+    """
+    Ids and engagement counts of rows that have a transcript
+
+    Reads the transcript column batch by batch (to filter empty rows) but
+    keeps only the small columns, in the same row order as iter_batches.
+    """
+    return load_projected(csv_path, transcript_column, id_column,
+                          include_text=False, batch_size=batch_size)
+
+
+def id_column_for(batch: "pd.DataFrame", id_column: Optional[str] = DEFAULT_ID_COLUMN) -> str:
+    """Name of the id column present in a yielded batch"""
+    return id_column if id_column in batch.columns else ROW_ID_COLUMN
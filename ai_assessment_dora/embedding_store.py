@@ -0,0 +1,247 @@
+"""
+Embedding Store
+===============
+
+Deduplicating, memory-mapped store of claim embeddings.
+
+Claims are hashed by their normalized text, so a claim that appears in many
+videos (or in many runs) is encoded only once. Vectors live in an
+append-only binary matrix on disk (float16 by default) that is memory
+mapped, and ``embed()`` returns an index-backed view into it rather than a
+fresh copy. The sentence encoder is imported and loaded once per process,
+on the first claim that has to be encoded.
+
+Layout of a store directory:
+    meta.json    - model name, dimension, dtype
+    keys.txt     - one claim hash per row, in row order
+    vectors.bin  - row-major matrix of embeddings
+
+Usage:
+    from embedding_store import get_embedding_store
+
+    store = get_embedding_store()
+    view = store.embed(claims)       # EmbeddingView
+    matrix = np.asarray(view)        # dense copy, only when needed
+"""
+
+import hashlib
+import json
+import os
+import re
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from chunking import claim_text
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+DEFAULT_EMBED_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_STORE_DIR = "embedding_store"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Encoders loaded in this process, by model name
+_encoders: Dict[str, "SentenceTransformer"] = {}
+_encoders_lock = Lock()
+
+
+def get_encoder(model_name: str = DEFAULT_EMBED_MODEL) -> "SentenceTransformer":
+    """Load a sentence encoder once per process"""
+    with _encoders_lock:
+        if model_name not in _encoders:
+            # Imported on first use: opening a store or viewing stored rows
+            # doesn't need torch
+            from sentence_transformers import SentenceTransformer
+            print(f"Loading embedding model: {model_name}")
+            _encoders[model_name] = SentenceTransformer(model_name)
+        return _encoders[model_name]
+
+
+def claim_hash(claim: Any) -> str:
+    """Hash of a claim's case- and whitespace-normalized text"""
+    text = _WHITESPACE_RE.sub(" ", claim_text(claim).strip().lower())
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingView:
+    """Rows of an EmbeddingStore, one per input claim (duplicates share a row)"""
+
+    def __init__(self, matrix: np.ndarray, rows: np.ndarray):
+        self.matrix = matrix
+        self.rows = rows
+
+    @property
+    def shape(self):
+        dim = self.matrix.shape[1] if self.matrix is not None else 0
+        return (len(self.rows), dim)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        return self.matrix[self.rows[idx]]
+
+    def __array__(self, dtype=None, copy=None):
+        if self.matrix is None:
+            return np.empty(self.shape, dtype=dtype or np.float32)
+        dense = self.matrix[self.rows]
+        return dense.astype(dtype or np.float32, copy=False)
+
+    def unique_rows(self) -> np.ndarray:
+        """Distinct store rows referenced by this view"""
+        return np.unique(self.rows)
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped embedding matrix keyed by claim hash"""
+
+    def __init__(
+        self,
+        store_dir: str = DEFAULT_STORE_DIR,
+        model_name: str = DEFAULT_EMBED_MODEL,
+        dtype: str = "float16",
+        batch_size: int = 256
+    ):
+        """
+        Open (or create) an embedding store
+
+        Args:
+            store_dir: Root directory; each model gets its own subdirectory
+            model_name: SentenceTransformer model used for encoding
+            dtype: On-disk dtype of the vectors ("float16" or "float32")
+            batch_size: Claims per encoder batch
+        """
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self.path = os.path.join(store_dir, model_name.replace("/", "__"))
+        os.makedirs(self.path, exist_ok=True)
+
+        self._lock = Lock()
+        self._index: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self.dim: Optional[int] = None
+        self._load()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _keys_path(self) -> str:
+        return os.path.join(self.path, "keys.txt")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.bin")
+
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["dtype"] != self.dtype.name:
+            raise ValueError(
+                f"Store at {self.path} holds {meta['dtype']} vectors, not {self.dtype.name}"
+            )
+        self.dim = meta["dim"]
+
+        keys: List[str] = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r", encoding="utf-8") as f:
+                keys = [line.rstrip("\n") for line in f if line.strip()]
+
+        # Vectors are written before keys, so a crash can only leave extra
+        # vectors behind; ignore them
+        row_bytes = self.dim * self.dtype.itemsize
+        stored_rows = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        count = min(len(keys), stored_rows)
+        if stored_rows > count:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(count * row_bytes)
+
+        self._index = {key: row for row, key in enumerate(keys[:count])}
+        self._remap(count)
+
+    def _remap(self, count: int):
+        if count == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(count, self.dim))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        """Write new rows: vectors first, then keys, then metadata"""
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self._meta_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name}, f)
+
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+        with open(self._keys_path, "a", encoding="utf-8") as f:
+            f.write("".join(key + "\n" for key in keys))
+
+        start = len(self._index)
+        for offset, key in enumerate(keys):
+            self._index[key] = start + offset
+        self._remap(len(self._index))
+
+    def embed(self, claims: Sequence[Any], verbose: bool = True) -> EmbeddingView:
+        """
+        Embed claims, encoding only those not already in the store
+
+        Args:
+            claims: Claim strings or {"claim": ...} objects
+            verbose: Print how many claims had to be encoded
+
+        Returns:
+            EmbeddingView with one row per input claim
+        """
+        hashes = [claim_hash(claim) for claim in claims]
+
+        with self._lock:
+            new_keys: List[str] = []
+            new_texts: List[str] = []
+            pending = set()
+            for key, claim in zip(hashes, claims):
+                if key not in self._index and key not in pending:
+                    pending.add(key)
+                    new_keys.append(key)
+                    new_texts.append(claim_text(claim))
+
+            if verbose:
+                print(f"Embedding {len(new_texts)} new unique claims "
+                      f"({len(claims)} total, {len(set(hashes))} unique)")
+            if new_texts:
+                encoder = get_encoder(self.model_name)
+                vectors = encoder.encode(new_texts, batch_size=self.batch_size, convert_to_numpy=True)
+                self._append(new_keys, vectors)
+
+            rows = np.fromiter((self._index[key] for key in hashes), dtype=np.int64, count=len(hashes))
+            return EmbeddingView(self._matrix, rows)
+
+    def view(self, rows: Sequence[int]) -> EmbeddingView:
+        """View over existing rows (e.g. loaded from a checkpoint)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) and rows.max() >= len(self._index):
+            raise ValueError(f"Row {rows.max()} is not in the embedding store at {self.path}")
+        return EmbeddingView(self._matrix, rows)
+
+
+# Process-wide stores, by (store_dir, model_name)
+_stores: Dict[tuple, EmbeddingStore] = {}
+
+
+def get_embedding_store(store_dir: str = DEFAULT_STORE_DIR, model_name: str = DEFAULT_EMBED_MODEL) -> EmbeddingStore:
+    """Open a store once per process"""
+    key = (store_dir, model_name)
+    if key not in _stores:
+        _stores[key] = EmbeddingStore(store_dir, model_name)
+    return _stores[key]
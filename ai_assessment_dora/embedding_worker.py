@@ -0,0 +1,153 @@
+"""
+Embedding Worker
+================
+
+Overlap claim embedding with extraction.
+
+Extraction is bound by the GPU or the vLLM server, while embedding is a
+separate model that would otherwise wait until every transcript is done.
+An EmbeddingWorker runs in a background thread and encodes claims into the
+EmbeddingStore in micro-batches as extraction produces them. The queue
+between the two is bounded: when the encoder falls behind, ``submit()``
+blocks the extractor until there is room, and when extraction is slower
+the worker simply waits. Callers should submit only claims that will be
+embedded (e.g. through near_duplicates.NearDuplicateFilter).
+
+If extraction fails, ``abort()`` stops the worker without flushing and
+logs its own error instead of raising it, so the extraction error is the
+one that propagates. Because the store deduplicates by claim hash,
+the regular embedding stage afterwards finds every claim already encoded.
+
+Usage:
+    from embedding_worker import EmbeddingWorker
+
+    with EmbeddingWorker(get_embedding_store()) as worker:
+        for claims in extracted_batches:
+            worker.submit(claims)
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from embedding_store import EmbeddingStore
+
+
+DEFAULT_MICRO_BATCH = 256
+DEFAULT_MAX_PENDING = 8
+
+_STOP = object()
+
+
+class EmbeddingWorker:
+    """Background thread encoding submitted claims into an EmbeddingStore"""
+
+    def __init__(
+        self,
+        store: EmbeddingStore,
+        micro_batch: int = DEFAULT_MICRO_BATCH,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        """
+        Args:
+            store: Store the claims are encoded into
+            micro_batch: Claims per encoder call
+            max_pending: Micro-batches queued before submit() blocks
+        """
+        self.store = store
+        self.micro_batch = micro_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._buffer: List[Any] = []
+        self._error: Optional[BaseException] = None
+
+        self.claims_embedded = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def start(self) -> "EmbeddingWorker":
+        self._thread = threading.Thread(target=self._run, name="embedding-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            claims = self._queue.get()
+            if claims is _STOP:
+                return
+            if self._error is not None:
+                # Keep draining so the producer never blocks on a dead worker
+                continue
+            start = time.time()
+            try:
+                self.store.embed(claims, verbose=False)
+                self.claims_embedded += len(claims)
+            except BaseException as e:
+                self._error = e
+            self.busy_seconds += time.time() - start
+
+    def _put(self, item):
+        start = time.time()
+        self._queue.put(item)
+        self.blocked_seconds += time.time() - start
+
+    def submit(self, claims: Sequence[Any]):
+        """Queue claims for encoding; blocks while the queue is full"""
+        if self._error is not None:
+            raise RuntimeError("Embedding worker failed") from self._error
+        self._buffer.extend(claims)
+        while len(self._buffer) >= self.micro_batch:
+            self._put(self._buffer[:self.micro_batch])
+            self._buffer = self._buffer[self.micro_batch:]
+
+    def close(self):
+        """Flush remaining claims and wait for the worker to finish"""
+        if self._thread is None:
+            return
+        if self._buffer:
+            self._put(self._buffer)
+            self._buffer = []
+        self._put(_STOP)
+        self._thread.join()
+        self._thread = None
+        if self._error is not None:
+            raise RuntimeError("Embedding worker failed") from self._error
+
+    def abort(self):
+        """Stop without encoding pending claims; a worker error is logged, not raised"""
+        if self._thread is None:
+            return
+        self._buffer = []
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._put(_STOP)
+        self._thread.join()
+        self._thread = None
+        if self._error is not None:
+            print(f"Embedding worker failed: {self._error!r}")
+
+    def __enter__(self) -> "EmbeddingWorker":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "claims_embedded": self.claims_embedded,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "producer_blocked_seconds": round(self.blocked_seconds, 2)
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Embedded {stats['claims_embedded']} claims alongside extraction "
+              f"(worker busy {stats['busy_seconds']}s, extraction blocked "
+              f"{stats['producer_blocked_seconds']}s)")
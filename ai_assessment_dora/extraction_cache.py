@@ -0,0 +1,251 @@
+"""
+Extraction Cache
+================
+
+Persistent, content-addressed cache of claim extraction results (SQLite).
+
+Entries are keyed by a hash of the transcript (or chunk) text, the prompt
+template, the model name and the sampling parameters, and store the raw
+completion plus the parsed claims. Reruns, parameter sweeps on later
+stages and restarts after a crash only pay for uncached rows.
+
+The cache is bounded by total stored bytes; least-recently-used entries are
+evicted first. Hit/miss counts are kept per process.
+
+Usage:
+    from extraction_cache import ExtractionCache, cached_extract_many
+
+    cache = ExtractionCache("extraction_cache.sqlite")
+    claims = cached_extract_many(cache, chunk_texts, template, MODEL_NAME,
+                                 {"max_tokens": 1024}, complete_many, parse_claims)
+    print(cache.stats())
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+DEFAULT_CACHE_PATH = "extraction_cache.sqlite"
+DEFAULT_MAX_BYTES = 1 << 30  # 1 GiB
+
+
+def make_cache_key(text: str, prompt_template: str, model: str, params: Dict[str, Any]) -> str:
+    """
+    Content hash identifying one extraction request
+
+    Args:
+        text: Transcript or chunk text
+        prompt_template: Prompt text with the transcript left out
+        model: Model name
+        params: Sampling parameters (max_tokens, temperature, ...)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        {"text": text, "template": prompt_template, "model": model, "params": params},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """SQLite-backed LRU cache of extraction results"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        Open (or create) an extraction cache
+
+        Args:
+            path: SQLite database file
+            max_bytes: Evict least-recently-used entries above this total
+                size of stored completions and claims (None: unbounded)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                completion TEXT NOT NULL,
+                claims TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extractions_last_access ON extractions(last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM extractions"
+        ).fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result
+
+        Returns:
+            {"completion": str, "claims": list} or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, claims FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE extractions SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            return {"completion": row[0], "claims": json.loads(row[1])}
+
+    def put(self, key: str, model: str, completion: str, claims: List[Any]):
+        """Store a result, evicting old entries if over the size bound"""
+        claims_json = json.dumps(claims, ensure_ascii=False)
+        size = len(completion.encode("utf-8")) + len(claims_json.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if old is not None:
+                self._total_bytes -= old[0]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions "
+                "(key, model, completion, claims, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, completion, claims_json, size, now, now)
+            )
+            self._total_bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under max_bytes"""
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM extractions ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts for this process and current cache size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"Extraction cache: {s['hits']} hits, {s['misses']} misses "
+              f"({s['hit_rate']:.0%} hit rate), {s['entries']} entries, "
+              f"{s['bytes'] / 1e6:.1f} MB")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cached_extract_many(
+    cache: Optional[ExtractionCache],
+    texts: Sequence[str],
+    prompt_template: str,
+    model: str,
+    params: Dict[str, Any],
+    complete_many: Callable[[List[str]], List[str]],
+    parse: Callable[[str], List[Any]],
+    on_failure: Optional[Callable[[int], None]] = None
+) -> List[List[Any]]:
+    """
+    Extract claims for many texts, only running the model on cache misses
+
+    Args:
+        cache: ExtractionCache, or None to always run the model
+        texts: Transcript or chunk texts
+        prompt_template: Prompt text with the transcript left out (cache key)
+        model: Model name (cache key)
+        params: Sampling parameters (cache key)
+        complete_many: Function returning the raw completion for each text
+        parse: Function turning a raw completion into claims
+        on_failure: Called with the number of failed requests (empty
+            completions); they yield no claims and are not cached
+
+    Returns:
+        Claims for each text, in input order
+    """
+    if cache is None:
+        completions = complete_many(list(texts))
+        failed = sum(1 for completion in completions if not completion)
+        if failed and on_failure is not None:
+            on_failure(failed)
+        return [parse(completion) if completion else [] for completion in completions]
+
+    results: List[Optional[List[Any]]] = [None] * len(texts)
+    keys = [make_cache_key(text, prompt_template, model, params) for text in texts]
+
+    missing = []
+    for idx, key in enumerate(keys):
+        entry = cache.get(key)
+        if entry is not None:
+            results[idx] = entry["claims"]
+        else:
+            missing.append(idx)
+
+    if missing:
+        completions = complete_many([texts[idx] for idx in missing])
+        failed = 0
+        for idx, completion in zip(missing, completions):
+            if not completion:
+                # Failed or timed-out request: don't cache, retry next run
+                results[idx] = []
+                failed += 1
+                continue
+            claims = parse(completion)
+            cache.put(keys[idx], model, completion, claims)
+            results[idx] = claims
+        if failed and on_failure is not None:
+            on_failure(failed)
+
+    return results
@@ -0,0 +1,265 @@
+"""
+Incremental Clustering
+======================
+
+Assign newly ingested claims to persisted clusters instead of re-clustering
+the whole corpus.
+
+A ClusterIndex keeps, per cluster, the sum of its members' unit vectors
+(so the centroid is an online mean), the member count and the summed
+member-to-centroid cosine distance. It also remembers the label of every
+embedding-store row it has seen, so claims that were already clustered
+keep their label. New claims join the nearest cluster when within the
+distance threshold and open a new cluster otherwise. Once enough new
+claims have been added since the last full fit, ``needs_recluster()``
+asks for a full re-cluster to correct centroid drift.
+
+Usage:
+    from incremental_clustering import ClusterIndex, incremental_cluster_labels
+
+    index = ClusterIndex("cluster_index")
+    labels = incremental_cluster_labels(embedding_view, index)
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from clustering import DEFAULT_DISTANCE_THRESHOLD, cluster_labels
+
+
+DEFAULT_INDEX_DIR = "cluster_index"
+
+# Full re-cluster once this fraction of the corpus was added incrementally
+DEFAULT_RECLUSTER_FRACTION = 0.25
+
+
+def _unit_rows(embeddings) -> np.ndarray:
+    X = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+class ClusterIndex:
+    """Persisted centroids and member statistics for incremental assignment"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_INDEX_DIR,
+        distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
+        recluster_fraction: float = DEFAULT_RECLUSTER_FRACTION
+    ):
+        """
+        Open (or create) a cluster index
+
+        Args:
+            path: Directory holding the index files
+            distance_threshold: Maximum cosine distance to join a cluster
+            recluster_fraction: Ask for a full re-cluster once this fraction
+                of members was added since the last fit
+        """
+        self.path = path
+        self.distance_threshold = distance_threshold
+        self.recluster_fraction = recluster_fraction
+
+        self.sums = np.zeros((0, 0), dtype=np.float64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.dist_sums = np.zeros(0, dtype=np.float64)
+        self.row_labels: Dict[int, int] = {}
+        self.meta: Dict[str, Any] = {}
+
+        if os.path.exists(os.path.join(path, "meta.json")):
+            self._load()
+
+    @property
+    def exists(self) -> bool:
+        return len(self.counts) > 0
+
+    def _load(self):
+        with open(os.path.join(self.path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.sums = np.load(os.path.join(self.path, "centroid_sums.npy"))
+        self.counts = np.load(os.path.join(self.path, "counts.npy"))
+        self.dist_sums = np.load(os.path.join(self.path, "dist_sums.npy"))
+        rows = np.load(os.path.join(self.path, "rows.npy"))
+        labels = np.load(os.path.join(self.path, "labels.npy"))
+        self.row_labels = dict(zip(rows.tolist(), labels.tolist()))
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        np.save(os.path.join(self.path, "centroid_sums.npy"), self.sums)
+        np.save(os.path.join(self.path, "counts.npy"), self.counts)
+        np.save(os.path.join(self.path, "dist_sums.npy"), self.dist_sums)
+        np.save(os.path.join(self.path, "rows.npy"), np.fromiter(self.row_labels.keys(), dtype=np.int64))
+        np.save(os.path.join(self.path, "labels.npy"), np.fromiter(self.row_labels.values(), dtype=np.int64))
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def centroids(self) -> np.ndarray:
+        """Unit-length centroid per cluster"""
+        means = self.sums / np.maximum(self.counts, 1)[:, None]
+        norms = np.linalg.norm(means, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return means / norms
+
+    def fit(self, embeddings, labels, rows):
+        """
+        Rebuild the index from a full clustering
+
+        Args:
+            embeddings: (n, d) array-like
+            labels: Cluster label per row (from cluster_labels)
+            rows: Embedding-store row per claim (stable claim ids)
+        """
+        X = _unit_rows(embeddings)
+        labels = np.asarray(labels)
+        _, dense = np.unique(labels, return_inverse=True)
+        k = int(dense.max()) + 1 if len(dense) else 0
+
+        self.sums = np.zeros((k, X.shape[1]), dtype=np.float64)
+        np.add.at(self.sums, dense, X)
+        self.counts = np.bincount(dense, minlength=k).astype(np.int64)
+
+        centroids = self.centroids()
+        distances = 1.0 - np.einsum("ij,ij->i", X, centroids[dense])
+        self.dist_sums = np.bincount(dense, weights=distances, minlength=k)
+
+        self.row_labels = {}
+        for row, label in zip(np.asarray(rows).tolist(), dense.tolist()):
+            self.row_labels.setdefault(row, label)
+
+        self.meta = {
+            "distance_threshold": self.distance_threshold,
+            "members_at_fit": int(self.counts.sum()),
+            "added_since_fit": 0,
+            "clusters_opened_since_fit": 0
+        }
+
+    def needs_recluster(self) -> bool:
+        """True once enough claims were added incrementally to risk drift"""
+        if not self.exists:
+            return True
+        at_fit = max(self.meta.get("members_at_fit", 0), 1)
+        return self.meta.get("added_since_fit", 0) / at_fit >= self.recluster_fraction
+
+    def assign(self, embeddings, rows, batch_size: int = 8192) -> np.ndarray:
+        """
+        Label claims, assigning unseen ones to the nearest cluster or a new one
+
+        Args:
+            embeddings: (n, d) array-like
+            rows: Embedding-store row per claim
+
+        Returns:
+            Cluster label per claim
+        """
+        rows = np.asarray(rows).tolist()
+        labels = np.empty(len(rows), dtype=np.int64)
+        new_positions = []
+        for pos, row in enumerate(rows):
+            label = self.row_labels.get(row)
+            if label is None:
+                new_positions.append(pos)
+            else:
+                labels[pos] = label
+
+        if not new_positions:
+            return labels
+
+        X = _unit_rows(embeddings[np.asarray(new_positions)])
+        centroids = self.centroids()
+
+        # Vectorized pass against the existing centroids
+        nearest = np.empty(len(new_positions), dtype=np.int64)
+        nearest_dist = np.empty(len(new_positions), dtype=np.float64)
+        for start in range(0, len(X), batch_size):
+            sims = X[start:start + batch_size] @ centroids.T
+            nearest[start:start + batch_size] = sims.argmax(axis=1)
+            nearest_dist[start:start + batch_size] = 1.0 - sims.max(axis=1)
+
+        opened = 0
+        for i, pos in enumerate(new_positions):
+            row = rows[pos]
+            if row in self.row_labels:
+                # Duplicate of a claim assigned earlier in this call
+                labels[pos] = self.row_labels[row]
+                continue
+
+            label, dist = int(nearest[i]), float(nearest_dist[i])
+            if dist > self.distance_threshold and len(self.counts) > len(centroids):
+                # Check clusters opened earlier in this call
+                extra = self.sums[len(centroids):]
+                extra = extra / np.maximum(np.linalg.norm(extra, axis=1, keepdims=True), 1e-12)
+                sims = extra @ X[i]
+                if 1.0 - sims.max() <= self.distance_threshold:
+                    label = len(centroids) + int(sims.argmax())
+                    dist = 1.0 - float(sims.max())
+
+            if dist > self.distance_threshold:
+                label = len(self.counts)
+                dist = 0.0
+                self.sums = np.vstack([self.sums, np.zeros((1, X.shape[1]))])
+                self.counts = np.append(self.counts, 0)
+                self.dist_sums = np.append(self.dist_sums, 0.0)
+                opened += 1
+
+            self.sums[label] += X[i]
+            self.counts[label] += 1
+            self.dist_sums[label] += dist
+            self.row_labels[row] = label
+            labels[pos] = label
+
+        self.meta["added_since_fit"] = self.meta.get("added_since_fit", 0) + len(new_positions)
+        self.meta["clusters_opened_since_fit"] = self.meta.get("clusters_opened_since_fit", 0) + opened
+        print(f"Assigned {len(new_positions)} new claims incrementally "
+              f"({opened} new clusters, {len(self.counts)} total)")
+        return labels
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-cluster member counts and mean distance to centroid"""
+        return {
+            "clusters": int(len(self.counts)),
+            "members": int(self.counts.sum()),
+            "mean_member_distance": (self.dist_sums / np.maximum(self.counts, 1)).tolist(),
+            **self.meta
+        }
+
+
+def incremental_cluster_labels(
+    embeddings,
+    index: ClusterIndex,
+    n_clusters: Optional[int] = None,
+    method: str = "auto",
+    force_recluster: bool = False
+) -> np.ndarray:
+    """
+    Cluster labels for an EmbeddingView, reusing a persisted ClusterIndex
+
+    Runs a full clustering (and refits the index) when there is no index
+    yet, when drift calls for it, or when forced; otherwise only claims the
+    index hasn't seen are assigned.
+
+    Args:
+        embeddings: EmbeddingView from the embedding store
+        index: ClusterIndex to use and update
+        n_clusters, method: Passed to cluster_labels for full re-clusters
+        force_recluster: Always run the full clustering
+
+    Returns:
+        Cluster label per claim
+    """
+    rows = embeddings.rows
+    if force_recluster or index.needs_recluster():
+        print("Running full re-cluster and refitting cluster index...")
+        labels = cluster_labels(embeddings, n_clusters, method=method,
+                                distance_threshold=index.distance_threshold)
+        index.fit(embeddings, labels, rows)
+        index.save()
+        return np.array([index.row_labels[row] for row in rows.tolist()], dtype=np.int64)
+
+    labels = index.assign(embeddings, rows)
+    index.save()
+    return labels
@@ -0,0 +1,267 @@
+"""
+Pipeline Instrumentation
+========================
+
+Per-stage measurements for the claim pipeline: wall and CPU time,
+tracemalloc peak, item counts, tokens in/out and requests per second.
+A run ends with a structured JSON report, and selected stages can be
+profiled with cProfile.
+
+Disabled unless the PIPELINE_PROFILE environment variable is set; the
+disabled path hands out a shared no-op stage, so instrumented code costs
+a function call and nothing else.
+
+Environment:
+    PIPELINE_PROFILE            1/true enables instrumentation
+    PIPELINE_PROFILE_DIR        Report and cProfile output directory (default "profiles")
+    PIPELINE_PROFILE_MEMORY     0/false skips tracemalloc (it slows allocation-heavy stages)
+    PIPELINE_PROFILE_CPROFILE   Comma-separated stage names to cProfile, or "all"
+
+Usage:
+    from instrumentation import get_instrumentation
+
+    instr = get_instrumentation()
+    with instr.stage("extraction") as stage:
+        claims = extract(...)
+        stage.count(items=len(claims))
+    instr.record(requests=n, prompt_tokens=p, completion_tokens=c)  # innermost open stage
+    instr.finish()  # prints the summary and writes the JSON report
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_PROFILE_DIR = "profiles"
+_FALSE_VALUES = {"", "0", "false", "no", "off"}
+
+
+def _env_flag(name: str, default: str = "") -> bool:
+    return os.environ.get(name, default).strip().lower() not in _FALSE_VALUES
+
+
+class _NullStage:
+    """Stage handed out while instrumentation is disabled"""
+
+    def count(self, items: int = 0, requests: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        pass
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullInstrumentation:
+    """Disabled instrumentation: every call is a no-op"""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+    def record(self, requests: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        pass
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        return None
+
+
+class Stage:
+    """Measurements for one pipeline stage (a context manager)"""
+
+    def __init__(self, owner: "Instrumentation", name: str):
+        self.owner = owner
+        self.name = name
+        self.items = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_bytes: Optional[int] = None
+        self.profile_path: Optional[str] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+
+    def count(self, items: int = 0, requests: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Add processed items, requests and tokens (thread-safe)"""
+        with self._lock:
+            self.items += items
+            self.requests += requests
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def _observe_peak(self, peak: int):
+        self.peak_bytes = peak if self.peak_bytes is None else max(self.peak_bytes, peak)
+
+    def __enter__(self) -> "Stage":
+        self.owner._enter(self)
+        if self.owner.profiles(self.name):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_seconds += time.perf_counter() - self._wall_start
+        self.cpu_seconds += time.process_time() - self._cpu_start
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path = self.owner.dump_profile(self.name, self._profiler)
+            self._profiler = None
+        self.owner._exit(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = self.wall_seconds
+        return {
+            "stage": self.name,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "peak_memory_mb": round(self.peak_bytes / (1024 * 1024), 2) if self.peak_bytes is not None else None,
+            "items": self.items,
+            "items_per_second": round(self.items / wall, 2) if wall > 0 else None,
+            "requests": self.requests,
+            "requests_per_second": round(self.requests / wall, 2) if wall > 0 else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "profile": self.profile_path
+        }
+
+
+class Instrumentation:
+    """Collects stage measurements for one run and writes the run report"""
+
+    enabled = True
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, trace_memory: bool = True,
+                 cprofile_stages: Optional[List[str]] = None):
+        """
+        Args:
+            output_dir: Where the run report and cProfile dumps are written
+            trace_memory: Track each stage's peak Python allocation with tracemalloc
+            cprofile_stages: Stage names to profile ("all" profiles every stage)
+        """
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.cprofile_stages = set(cprofile_stages or [])
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.stages: List[Stage] = []
+        self._open: List[Stage] = []
+        self._started_tracing = False
+        self._start = time.perf_counter()
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        stages = os.environ.get("PIPELINE_PROFILE_CPROFILE", "")
+        return cls(
+            output_dir=os.environ.get("PIPELINE_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+            trace_memory=_env_flag("PIPELINE_PROFILE_MEMORY", "1"),
+            cprofile_stages=[s.strip() for s in stages.split(",") if s.strip()]
+        )
+
+    def profiles(self, name: str) -> bool:
+        return "all" in self.cprofile_stages or name in self.cprofile_stages
+
+    def stage(self, name: str) -> Stage:
+        """New stage; use as a context manager"""
+        return Stage(self, name)
+
+    def record(self, requests: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Count requests and tokens against the innermost open stage"""
+        if self._open:
+            self._open[-1].count(requests=requests, prompt_tokens=prompt_tokens,
+                                 completion_tokens=completion_tokens)
+
+    def _enter(self, stage: Stage):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            # The outer stage keeps the peak reached so far before it's reset
+            if self._open:
+                self._open[-1]._observe_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._open.append(stage)
+        self.stages.append(stage)
+
+    def _exit(self, stage: Stage):
+        self._open.remove(stage)
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            stage._observe_peak(peak)
+            if self._open:
+                self._open[-1]._observe_peak(peak)
+
+    def dump_profile(self, name: str, profiler: cProfile.Profile) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{self.run_id}_{name}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "wall_seconds": round(time.perf_counter() - self._start, 3),
+            "trace_memory": self.trace_memory,
+            "stages": [stage.to_dict() for stage in self.stages]
+        }
+
+    def print_summary(self, report: Dict[str, Any]):
+        print(f"\nStage profile ({report['wall_seconds']:.2f}s total):")
+        print(f"{'stage':<18}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'items':>9}{'items/s':>10}"
+              f"{'req/s':>8}{'tok in':>10}{'tok out':>10}")
+        for s in report["stages"]:
+            peak = f"{s['peak_memory_mb']:.1f}" if s["peak_memory_mb"] is not None else "-"
+            rate = f"{s['items_per_second']:.1f}" if s["items_per_second"] is not None else "-"
+            req_rate = f"{s['requests_per_second']:.1f}" if s["requests"] else "-"
+            print(f"{s['stage']:<18}{s['wall_seconds']:>9.2f}{s['cpu_seconds']:>9.2f}{peak:>9}{s['items']:>9}"
+                  f"{rate:>10}{req_rate:>8}{s['prompt_tokens']:>10}{s['completion_tokens']:>10}")
+
+    def finish(self) -> Dict[str, Any]:
+        """Print the summary, write the JSON report and stop tracing"""
+        report = self.report()
+        self.print_summary(report)
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{self.run_id}_report.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Run report written to {path}")
+        for s in report["stages"]:
+            if s["profile"]:
+                print(f"  cProfile for {s['stage']}: {s['profile']}")
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return report
+
+
+_instrumentation = None
+
+
+def get_instrumentation(reset: bool = False):
+    """
+    Process-wide instrumentation, configured from the environment
+
+    Args:
+        reset: Start a new run (re-reads the environment)
+
+    Returns:
+        Instrumentation when PIPELINE_PROFILE is set, else NullInstrumentation
+    """
+    global _instrumentation
+    if _instrumentation is None or reset:
+        _instrumentation = Instrumentation.from_env() if _env_flag("PIPELINE_PROFILE") else NullInstrumentation()
+    return _instrumentation
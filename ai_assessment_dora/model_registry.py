@@ -0,0 +1,156 @@
+"""
+Model Registry
+==============
+
+Process-lifetime cache for Hugging Face text-generation pipelines.
+
+Loading a model with ``from_pretrained`` takes far longer than a single
+generation, so each (model, dtype, device) combination is loaded once and
+reused across calls. On CPU the model can be loaded through an optimized
+backend (int8 dynamic quantization or ONNX Runtime, see cpu_backends.py),
+which is part of the cache key. Entries are evicted least-recently-used first when a
+memory cap is exceeded, or explicitly with ``release()`` (e.g. to free the
+LLM weights before the embedding stage runs).
+
+Usage:
+    from model_registry import get_pipeline, release_models
+
+    nlp_pipeline = get_pipeline(MODEL_NAME)
+    cpu_pipeline = get_pipeline(MODEL_NAME, backend="int8", num_threads=8)
+    ...
+    release_models()
+"""
+
+import gc
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, List, Optional, Tuple
+
+import torch
+from transformers import AutoTokenizer, pipeline
+
+from cpu_backends import load_cpu_model, set_cpu_threads
+
+
+RegistryKey = Tuple[str, str, str, str]
+
+
+class ModelRegistry:
+    """LRU cache of loaded text-generation pipelines"""
+
+    def __init__(self, max_memory_bytes: Optional[int] = None):
+        """
+        Initialize model registry
+
+        Args:
+            max_memory_bytes: Evict least-recently-used models once the total
+                size of loaded weights exceeds this (default: no cap)
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self._entries: "OrderedDict[RegistryKey, dict]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _make_key(model_name: str, torch_dtype: Any, device: Optional[str], backend: str) -> RegistryKey:
+        return (model_name, str(torch_dtype), str(device) if device is not None else "cpu", backend)
+
+    def get_pipeline(
+        self,
+        model_name: str,
+        torch_dtype: Any = "auto",
+        device: Optional[str] = None,
+        backend: str = "torch",
+        num_threads: Optional[int] = None
+    ):
+        """
+        Get a text-generation pipeline, loading it on first use
+
+        Args:
+            model_name: Hugging Face model id
+            torch_dtype: dtype passed to from_pretrained (default: "auto")
+            device: Device to place the model on (default: CPU)
+            backend: "torch", or a CPU-only backend: "int8" or "onnx"
+            num_threads: Intra-op CPU threads (default: library default)
+
+        Returns:
+            transformers text-generation pipeline
+        """
+        if backend != "torch" and device not in (None, "cpu"):
+            raise ValueError(f"The {backend} backend runs on CPU only (got device={device})")
+        key = self._make_key(model_name, torch_dtype, device, backend)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                set_cpu_threads(num_threads)
+                return entry["pipeline"]
+
+            print(f"Loading model: {model_name} (dtype={key[1]}, device={key[2]}, backend={backend})")
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model, nbytes = load_cpu_model(model_name, backend, torch_dtype=torch_dtype, num_threads=num_threads)
+            if device is not None:
+                model = model.to(device)
+            nlp_pipeline = pipeline("text-generation", model=model, tokenizer=tokenizer)
+
+            self._entries[key] = {
+                "pipeline": nlp_pipeline,
+                "nbytes": nbytes
+            }
+            self._enforce_memory_cap(keep=key)
+            return nlp_pipeline
+
+    def _enforce_memory_cap(self, keep: RegistryKey):
+        """Evict least-recently-used entries until under the memory cap"""
+        if self.max_memory_bytes is None:
+            return
+        for key in list(self._entries.keys()):
+            if self.memory_bytes() <= self.max_memory_bytes:
+                break
+            if key != keep:
+                self._evict(key)
+
+    def _evict(self, key: RegistryKey):
+        print(f"Releasing model: {key[0]} (dtype={key[1]}, device={key[2]}, backend={key[3]})")
+        del self._entries[key]
+
+    def release(self, model_name: Optional[str] = None):
+        """
+        Release loaded models and free their memory
+
+        Args:
+            model_name: Only release entries for this model (default: all)
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if model_name is None or key[0] == model_name:
+                    self._evict(key)
+
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def memory_bytes(self) -> int:
+        """Total size of the weights currently held by the registry"""
+        return sum(entry["nbytes"] for entry in self._entries.values())
+
+    def loaded(self) -> List[RegistryKey]:
+        """Keys of currently loaded models, least recently used first"""
+        with self._lock:
+            return list(self._entries.keys())
+
+
+# Process-wide registry used by extract_claims
+default_registry = ModelRegistry()
+
+
+def get_pipeline(model_name: str, torch_dtype: Any = "auto", device: Optional[str] = None,
+                 backend: str = "torch", num_threads: Optional[int] = None):
+    """Get a pipeline from the process-wide registry"""
+    return default_registry.get_pipeline(model_name, torch_dtype=torch_dtype, device=device,
+                                         backend=backend, num_threads=num_threads)
+
+
+def release_models(model_name: Optional[str] = None):
+    """Release models held by the process-wide registry"""
+    default_registry.release(model_name)
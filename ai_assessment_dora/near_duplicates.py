@@ -0,0 +1,240 @@
+"""
+Near-Duplicate Claims
+=====================
+
+Collapse near-identical claims before embedding and clustering.
+
+Auto-generated transcripts repeat the same claim with small wording changes
+many times per video and across re-uploads. Each claim is reduced to a
+MinHash signature over its character 5-grams; LSH banding proposes candidate
+pairs, which are kept when their estimated Jaccard similarity reaches the
+threshold, and connected candidates form one group. Each group is
+represented by its first claim and keeps its multiplicity and the ids of the
+videos it came from, so only representatives need to be embedded and
+clustered and their labels can be expanded back to every original claim.
+
+NearDuplicateFilter applies the same test to claims as they stream in, so
+work done before grouping (e.g. embedding alongside extraction) can skip
+claims that will not be representatives.
+
+Usage:
+    from near_duplicates import near_duplicate_groups, CollapsedClaims
+
+    group_of = near_duplicate_groups(claims, threshold=0.8)
+    collapsed = CollapsedClaims(claims, video_ids, group_of)
+    labels = collapsed.expand(cluster_labels(embed(collapsed.representatives)))
+"""
+
+import hashlib
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from chunking import claim_text, normalize_claim
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+
+
+def _shingles(text: str, size: int = 5) -> List[str]:
+    normalized = normalize_claim(text) or text
+    if len(normalized) <= size:
+        return [normalized]
+    return [normalized[i:i + size] for i in range(len(normalized) - size + 1)]
+
+
+def _hash_shingles(shingles: Sequence[str]) -> np.ndarray:
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+         for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+def minhash_signatures(claims: Sequence[Any], num_perm: int = DEFAULT_NUM_PERM, seed: int = 1) -> np.ndarray:
+    """
+    MinHash signature of each claim's character 5-gram set
+
+    Returns:
+        (n, num_perm) uint64 array
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(claims), num_perm), dtype=np.uint64)
+    for i, claim in enumerate(claims):
+        hashes = _hash_shingles(_shingles(claim_text(claim)))
+        # Universal hashing; uint64 wrap-around is intended
+        permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+        signatures[i] = permuted.min(axis=0)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x: int, y: int):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            # Keep the earliest claim as root so it becomes the representative
+            if rx < ry:
+                self.parent[ry] = rx
+            else:
+                self.parent[rx] = ry
+
+
+def near_duplicate_groups(
+    claims: Sequence[Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS
+) -> np.ndarray:
+    """
+    Group near-identical claims
+
+    Args:
+        claims: Claim strings or {"claim": ...} objects
+        threshold: Estimated Jaccard similarity needed to merge two claims
+        num_perm: MinHash permutations
+        bands: LSH bands (num_perm must be divisible by bands)
+
+    Returns:
+        Group id per claim; ids are 0..g-1 in order of first appearance
+    """
+    n = len(claims)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands")
+
+    signatures = minhash_signatures(claims, num_perm)
+    rows_per_band = num_perm // bands
+    uf = _UnionFind(n)
+
+    for band in range(bands):
+        block = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for i in range(n):
+            buckets[block[i].tobytes()].append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # Verify candidates against the bucket's first member
+            first = members[0]
+            others = np.asarray(members[1:])
+            similarity = (signatures[others] == signatures[first]).mean(axis=1)
+            for other in others[similarity >= threshold]:
+                uf.union(first, int(other))
+
+    roots = np.fromiter((uf.find(i) for i in range(n)), dtype=np.int64, count=n)
+    _, first_seen, group_of = np.unique(roots, return_index=True, return_inverse=True)
+    # Renumber groups by first appearance
+    order = np.argsort(np.argsort(first_seen))
+    return order[group_of]
+
+
+class NearDuplicateFilter:
+    """Streaming filter dropping claims near_duplicate_groups merges into an earlier one"""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS
+    ):
+        """
+        Args:
+            threshold, num_perm, bands: As for near_duplicate_groups (must
+                match for the filter to agree with the grouping)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.rows_per_band = num_perm // bands
+        # Per band: bucket -> signature of the bucket's first claim
+        self._buckets: List[Dict[bytes, np.ndarray]] = [{} for _ in range(bands)]
+        self.seen = 0
+        self.dropped = 0
+
+    def new_claims(self, claims: Sequence[Any]) -> List[Any]:
+        """
+        Claims that may represent a near-duplicate group
+
+        A claim is dropped only when it matches the first claim of one of
+        its LSH buckets, which near_duplicate_groups then unions it with, so
+        it never becomes a representative. A few claims that end up grouped
+        through later ones are kept.
+
+        Args:
+            claims: Claims in extraction order, following earlier calls
+
+        Returns:
+            The claims that were not dropped, in order
+        """
+        kept = []
+        for claim, signature in zip(claims, minhash_signatures(claims, self.num_perm)):
+            duplicate = False
+            for band, buckets in enumerate(self._buckets):
+                key = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes()
+                first = buckets.setdefault(key, signature)
+                if not duplicate and first is not signature:
+                    duplicate = (first == signature).mean() >= self.threshold
+            if not duplicate:
+                kept.append(claim)
+        self.seen += len(claims)
+        self.dropped += len(claims) - len(kept)
+        return kept
+
+
+class CollapsedClaims:
+    """Representatives of near-duplicate groups with multiplicity and sources"""
+
+    def __init__(self, claims: Sequence[Any], source_ids: Sequence[Any], group_of: np.ndarray):
+        """
+        Args:
+            claims: All extracted claims
+            source_ids: Video id each claim came from
+            group_of: Group id per claim (from near_duplicate_groups)
+        """
+        self.group_of = np.asarray(group_of, dtype=np.int64)
+        n_groups = int(self.group_of.max()) + 1 if len(self.group_of) else 0
+
+        _, self.representative_index = np.unique(self.group_of, return_index=True)
+        self.representatives = [claims[i] for i in self.representative_index]
+        self.multiplicity = np.bincount(self.group_of, minlength=n_groups)
+
+        sources: List[Dict[Any, None]] = [{} for _ in range(n_groups)]
+        for group, source in zip(self.group_of.tolist(), source_ids):
+            sources[group][source] = None
+        self.source_ids = [list(s.keys()) for s in sources]
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def expand(self, group_labels) -> np.ndarray:
+        """Map a label per representative back to a label per original claim"""
+        return np.asarray(group_labels)[self.group_of]
+
+    def report(self):
+        total = len(self.group_of)
+        print(f"Collapsed {total} claims into {len(self)} near-duplicate groups "
+              f"({1 - len(self) / max(total, 1):.0%} fewer to embed)")
@@ -0,0 +1,242 @@
+"""
+Pipeline Stages
+===============
+
+The engine-independent stages of the claim pipeline, shared by LLM.py
+(in-process transformers model) and vllm/LLM_vllm.py (vLLM server).
+
+An engine only supplies its extraction: a function turning a batch of
+transcripts into claims (with chunk offsets) and the model/prompt/sampling
+settings its claims depend on. Streaming the CSV, normalization, the
+extraction cache, background embedding and every stage after extraction
+(near-duplicates, embedding, clustering, scoring, word cloud) live here.
+Each stage is persisted through a StageCheckpointer; claims from a run
+with failed requests are saved as incomplete, so the next run retries them.
+
+Usage:
+    from pipeline_stages import collapse_stage, embed_stage, extract_stage
+
+    records = extract_stage(ckpt, csv_path, "transcript_text", extract_batch,
+                            [MODEL_NAME, build_extraction_prompt("")])
+    claim_table, collapsed = collapse_stage(ckpt, records)
+    embeddings = embed_stage(ckpt, claim_table, collapsed)
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from checkpoints import Incomplete, StageCheckpointer
+from data_loading import DEFAULT_BATCH_SIZE
+from extraction_cache import DEFAULT_CACHE_PATH, ExtractionCache
+from near_duplicates import CollapsedClaims, NearDuplicateFilter, near_duplicate_groups
+# Embedding, clustering and word cloud modules pull in sentence_transformers,
+# sklearn and wordcloud, and the CSV, claim table and normalization modules
+# pandas; they are imported by the stages that use them
+
+
+# Engine extraction: (transcripts, cache, on_failure) -> [(claim, chunk offset), ...]
+# per transcript; on_failure(n) reports requests that failed or timed out
+ExtractBatch = Callable[[List[str], Optional[ExtractionCache], Callable[[int], None]], List[List[Any]]]
+
+
+def embed_claims(claims):
+    # Each unique claim is encoded once and kept in the on-disk store;
+    # returns an index-backed view rather than a fresh matrix
+    from embedding_store import get_embedding_store
+    return get_embedding_store().embed(claims)
+
+
+def group_claims_by_label(labels, claims):
+    clustered_claims = {}
+    for label, claim in zip(labels, claims):
+        clustered_claims.setdefault(label, []).append(claim)
+    return clustered_claims
+
+
+def cluster_claims(embeddings, claims, n_clusters=None, method="auto"):
+    # method: "exact" (full pairwise average linkage), "knn_agglomerative" or
+    # "knn_graph" (sparse kNN graph, scales to millions); "auto" picks by size.
+    # "incremental" assigns new claims to the persisted clusters instead.
+    if method == "incremental":
+        from incremental_clustering import ClusterIndex, incremental_cluster_labels
+        labels = incremental_cluster_labels(embeddings, ClusterIndex(), n_clusters)
+    else:
+        from clustering import cluster_labels
+        labels = cluster_labels(embeddings, n_clusters, method=method)
+    return group_claims_by_label(labels, claims)
+
+
+def calculate_performance_scores(df):
+    # Weighted performance score
+    df['performance_score'] = df['view_count'] * 0.6 + df['like_count'] * 0.3 + df['comment_count'] * 0.1
+    return df['performance_score'].tolist()
+
+
+def map_scores_to_clusters(claim_table, scores, video_ids, how="weighted"):
+    # Each claim is joined to its own video's score, then aggregated per
+    # cluster: "sum", "mean" (over distinct videos) or "weighted" (over claims)
+    from claim_table import cluster_scores
+    return cluster_scores(claim_table, video_ids, scores, how=how)
+
+
+def generate_wordcloud(clustered_claims, performance_scores, claim_counts=None, output_path=None,
+                       formats=("png", "json")):
+    # Each claim is tokenized once and weighted by its cluster's score times
+    # its near-duplicate count; output_path writes files instead of showing
+    from wordcloud_render import render_wordcloud, term_frequencies
+    claims, weights = [], []
+    for label, cluster in clustered_claims.items():
+        score = performance_scores.get(label, 1)
+        counts = claim_counts[label] if claim_counts else [1] * len(cluster)
+        claims.extend(cluster)
+        weights.extend(score * count for count in counts)
+    return render_wordcloud(term_frequencies(claims, weights), output_path, formats)
+
+
+def extract_stage(
+    ckpt: StageCheckpointer,
+    csv_path: str,
+    transcript_column: str,
+    extract_batch: ExtractBatch,
+    engine_inputs: Sequence[Any],
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    batch_rows: int = DEFAULT_BATCH_SIZE,
+    stream_embeddings: bool = False,
+    normalize: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Claims stage: one {"video_id", "chunk_offset", "claim"} record per claim
+
+    Args:
+        ckpt: Checkpointer the claims are persisted with
+        csv_path: Transcript CSV
+        transcript_column: Column holding the transcripts
+        extract_batch: Engine extraction for one batch of transcripts
+        engine_inputs: Model, prompt and sampling settings the claims
+            depend on (part of the checkpoint fingerprint)
+        cache_path: Extraction cache (None: don't read or write it)
+        batch_rows: CSV rows read per batch
+        stream_embeddings: Encode claims in a background thread while
+            extraction continues
+        normalize: Strip caption artifacts before extraction (chunk offsets
+            then refer to the normalized text)
+
+    Returns:
+        Claim records; when requests failed, the claims of the rest, and
+        the checkpoint is marked incomplete
+    """
+    from transcript_normalization import NORMALIZATION_VERSION, TranscriptNormalizer
+
+    def run_extraction():
+        from data_loading import id_column_for, iter_batches
+        cache = ExtractionCache(cache_path) if cache_path else None
+        # The bounded queue applies backpressure to extraction. Only claims
+        # that can be near-duplicate representatives are sent: embed_stage
+        # encodes nothing else
+        worker = None
+        if stream_embeddings:
+            from embedding_store import get_embedding_store
+            from embedding_worker import EmbeddingWorker
+            worker = EmbeddingWorker(get_embedding_store()).start()
+            duplicates = NearDuplicateFilter()
+        # Per-row savings go next to the checkpoints
+        normalizer = TranscriptNormalizer() if normalize else None
+        failures = [0]
+
+        def on_failure(count):
+            failures[0] += count
+
+        records = []
+        try:
+            for batch in iter_batches(csv_path, transcript_column, batch_size=batch_rows):
+                batch_ids = batch[id_column_for(batch)].tolist()
+                transcripts = batch[transcript_column]
+                if normalizer is not None:
+                    transcripts = normalizer.normalize(transcripts, ids=batch_ids)
+                first = len(records)
+                results = extract_batch(transcripts.tolist(), cache, on_failure)
+                for video_id, claims in zip(batch_ids, results):
+                    records.extend({"video_id": video_id, "chunk_offset": offset, "claim": claim}
+                                   for claim, offset in claims)
+                if worker is not None:
+                    worker.submit(duplicates.new_claims([record["claim"] for record in records[first:]]))
+        except BaseException:
+            if worker is not None:
+                # Keep the extraction error; a worker error is only logged
+                worker.abort()
+            raise
+        if worker is not None:
+            worker.close()
+            worker.report()
+            print(f"Skipped {duplicates.dropped}/{duplicates.seen} near-duplicate claims while streaming")
+        if normalizer is not None:
+            normalizer.report()
+            if ckpt.run_dir:
+                normalizer.savings().to_csv(os.path.join(ckpt.run_dir, "normalization_savings.csv"), index=False)
+        if cache is not None:
+            cache.print_stats()
+        if failures[0]:
+            # Failed requests weren't cached; rerunning re-sends only those
+            return Incomplete(records, f"{failures[0]} extraction requests failed")
+        return records
+
+    # Each claim keeps the id of the video it came from
+    inputs = [ckpt.file_fingerprint(csv_path), transcript_column, "records"] + list(engine_inputs)
+    if normalize:
+        inputs.append(f"normalized-{NORMALIZATION_VERSION}")
+    return ckpt.stage("claims", inputs, run_extraction, fmt="jsonl")
+
+
+def collapse_stage(ckpt, records):
+    """Claim table (one row per claim) and its near-duplicate groups"""
+    from claim_table import build_claim_table
+    # One row per claim; later stages add their columns
+    claim_table = build_claim_table(records)
+    all_claims = claim_table["claim"].tolist()
+    # Near-identical claims are collapsed; only representatives are embedded
+    # and clustered, and each keeps its multiplicity for scoring
+    group_of = ckpt.stage("claim_groups", [ckpt.fingerprint("claims")],
+                          lambda: near_duplicate_groups(all_claims), fmt="npy")
+    collapsed = CollapsedClaims(all_claims, claim_table["video_id"].tolist(), group_of)
+    claim_table["near_duplicate_group"] = group_of
+    return claim_table, collapsed
+
+
+def embed_stage(ckpt, claim_table, collapsed, store=None):
+    """Embeddings of the near-duplicate representatives (in the default store unless one is given)"""
+    from embedding_store import get_embedding_store
+    store = store or get_embedding_store()
+    embedding_rows = ckpt.stage("embedding_rows", [ckpt.fingerprint("claim_groups"), store.model_name],
+                                lambda: store.embed(collapsed.representatives).rows, fmt="npy")
+    claim_table["embedding_row"] = embedding_rows[claim_table["near_duplicate_group"].to_numpy()]
+    return store.view(embedding_rows)
+
+
+def cluster_stage(ckpt, embeddings, n_clusters=None, cluster_method="auto", check_sample=0):
+    """Cluster label per representative"""
+    if cluster_method == "incremental":
+        # Only claims the persisted cluster index hasn't seen are assigned;
+        # a full re-cluster runs when drift builds up
+        from incremental_clustering import ClusterIndex, incremental_cluster_labels
+        return incremental_cluster_labels(embeddings, ClusterIndex(), n_clusters)
+    from clustering import cluster_labels, compare_with_exact, resolve_method
+    labels = ckpt.stage("labels", [ckpt.fingerprint("embedding_rows"), n_clusters, cluster_method],
+                        lambda: cluster_labels(embeddings, n_clusters, method=cluster_method), fmt="npy")
+    method = resolve_method(cluster_method, len(embeddings))
+    if check_sample and method != "exact":
+        # Agreement of the approximate backend with exact clustering on a sample
+        report = compare_with_exact(embeddings, method, check_sample, n_clusters)
+        if ckpt.run_dir:
+            with open(os.path.join(ckpt.run_dir, "clustering_quality.json"), "w") as f:
+                json.dump(report, f, indent=2)
+    return labels
+
+
+def score_stage(claim_table, collapsed, labels, performance_scores, video_ids):
+    """Claims and near-duplicate counts per cluster, and each cluster's score"""
+    claim_table["cluster_label"] = collapsed.expand(labels)
+    clustered_claims = group_claims_by_label(labels, collapsed.representatives)
+    claim_counts = group_claims_by_label(labels, collapsed.multiplicity.tolist())
+    cluster_scores = map_scores_to_clusters(claim_table, performance_scores, video_ids)
+    return clustered_claims, claim_counts, cluster_scores
@@ -0,0 +1,76 @@
+"""Tests for checkpoints.py: resuming, fingerprint chaining and Incomplete outputs"""
+
+import numpy as np
+import pytest
+
+from checkpoints import Incomplete, StageCheckpointer
+
+
+class Counter:
+    """compute function that records how often it ran"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def run_pipeline(run_dir, claims_value, model="m1"):
+    """Two chained stages; returns the checkpointer and both compute counters"""
+    claims = Counter(claims_value)
+    labels = Counter(np.array([0, 1]))
+    ckpt = StageCheckpointer(run_dir)
+    ckpt.stage("claims", ["input.csv", model], claims, fmt="jsonl")
+    ckpt.stage("labels", [ckpt.fingerprint("claims")], labels, fmt="npy")
+    return ckpt, claims, labels
+
+
+def test_unchanged_inputs_resume_from_disk(tmp_path):
+    run_pipeline(str(tmp_path), [{"claim": "a"}])
+    ckpt, claims, labels = run_pipeline(str(tmp_path), [{"claim": "a"}])
+    assert (claims.calls, labels.calls) == (0, 0)
+    assert ckpt.load("claims") == [{"claim": "a"}]
+    assert ckpt.load("labels").tolist() == [0, 1]
+
+
+def test_upstream_change_invalidates_downstream(tmp_path):
+    first, _, _ = run_pipeline(str(tmp_path), [{"claim": "a"}])
+    second, claims, labels = run_pipeline(str(tmp_path), [{"claim": "a"}], model="m2")
+    assert (claims.calls, labels.calls) == (1, 1)
+    assert second.fingerprint("labels") != first.fingerprint("labels")
+
+
+def test_incomplete_stage_is_recomputed_and_chains_apart(tmp_path):
+    partial, claims, labels = run_pipeline(str(tmp_path), Incomplete([{"claim": "a"}], "1 failed request"))
+    assert claims.calls == 1
+    assert partial.manifest["claims"]["incomplete"] == "1 failed request"
+    assert partial.fingerprint("claims") != partial.manifest["claims"]["fingerprint"]
+
+    complete, claims, labels = run_pipeline(str(tmp_path), [{"claim": "a"}, {"claim": "b"}])
+    # Same inputs, but the incomplete output is recomputed and downstream reruns
+    assert (claims.calls, labels.calls) == (1, 1)
+    assert "incomplete" not in complete.manifest["claims"]
+    assert complete.fingerprint("claims") == complete.manifest["claims"]["fingerprint"]
+    assert complete.fingerprint("labels") != partial.fingerprint("labels")
+
+
+def test_load_chains_fingerprint_from_manifest(tmp_path):
+    producer, _, _ = run_pipeline(str(tmp_path), [{"claim": "a"}])
+    consumer = StageCheckpointer(str(tmp_path))
+    consumer.load("claims")
+    assert consumer.fingerprint("claims") == producer.fingerprint("claims")
+    with pytest.raises(FileNotFoundError):
+        consumer.load("embeddings")
+
+
+def test_disabled_checkpointer_always_computes():
+    ckpt = StageCheckpointer(None)
+    compute = Counter([1, 2])
+    assert ckpt.stage("claims", ["x"], compute) == [1, 2]
+    assert ckpt.stage("claims", ["x"], lambda: Incomplete([3], "partial")) == [3]
+    assert compute.calls == 1
+    with pytest.raises(FileNotFoundError):
+        ckpt.load("claims")
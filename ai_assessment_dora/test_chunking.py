@@ -0,0 +1,142 @@
+"""Tests for chunking.py: chunk boundaries, overlap and merged offsets"""
+
+import pytest
+
+from chunking import (CHARS_PER_TOKEN, ESTIMATE_HEADROOM, Chunk, TranscriptChunker, chunk_token_budget,
+                      make_chunker, map_reduce_claims, merge_chunk_claims)
+
+
+def words(n):
+    # Short words estimate to one token each
+    return " ".join(f"w{i:03d}" for i in range(n))
+
+
+def test_short_text_is_one_chunk():
+    text = words(10)
+    assert TranscriptChunker(50, overlap_tokens=5).split(text) == [Chunk(text, 0, 0, len(text))]
+
+
+def test_empty_text_is_one_chunk():
+    assert TranscriptChunker(50, overlap_tokens=5).split("") == [Chunk("", 0, 0, 0)]
+
+
+def test_chunks_fit_budget_and_cover_text():
+    text = words(100)
+    chunker = TranscriptChunker(20, overlap_tokens=5)
+    chunks = chunker.split(text)
+
+    assert len(chunks) > 1
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    assert chunks[0].start_char == 0
+    assert chunks[-1].end_char == len(text)
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start_char:chunk.end_char]
+        assert chunker.count_tokens(chunk.text) <= 20
+        # Chunks start and end on word boundaries
+        assert not chunk.text.startswith(" ") and not chunk.text.endswith(" ")
+
+
+def test_consecutive_chunks_overlap():
+    text = words(100)
+    chunks = TranscriptChunker(20, overlap_tokens=5).split(text)
+
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev.start_char < nxt.start_char < prev.end_char
+        shared = text[nxt.start_char:prev.end_char].split()
+        assert shared == prev.text.split()[-5:]
+
+
+def test_word_over_budget_is_its_own_chunk():
+    long_word = "x" * (CHARS_PER_TOKEN * 30)
+    text = f"a b {long_word} c d"
+    chunks = TranscriptChunker(10, overlap_tokens=2).split(text)
+
+    assert long_word in [c.text for c in chunks]
+    assert chunks[-1].end_char == len(text)
+
+
+def test_overlap_must_be_smaller_than_budget():
+    with pytest.raises(ValueError):
+        TranscriptChunker(10, overlap_tokens=10)
+
+
+def test_token_counter_resplits_undercounted_chunks():
+    # Every word really costs 4 tokens, four times the estimate
+    text = words(200)
+    counter = lambda chunk: 4 * len(chunk.split())
+    chunker = TranscriptChunker(40, overlap_tokens=4, token_counter=counter)
+    chunks = chunker.split(text)
+
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    assert chunks[0].start_char == 0
+    assert chunks[-1].end_char == len(text)
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start_char:chunk.end_char]
+        assert counter(chunk.text) <= 40
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.start_char <= prev.end_char
+
+
+def test_token_counter_failure_keeps_estimated_chunks():
+    text = words(100)
+    estimated = TranscriptChunker(20, overlap_tokens=5).split(text)
+    assert TranscriptChunker(20, overlap_tokens=5, token_counter=lambda chunk: None).split(text) == estimated
+
+
+def test_chunk_token_budget():
+    assert chunk_token_budget(4096, 1024, 100, safety_margin=0) == 2972
+    with pytest.raises(ValueError):
+        chunk_token_budget(1000, 1024, 100)
+
+
+def test_make_chunker_headroom_without_exact_counts():
+    template = lambda text: f"Prompt:\n{text}"
+    estimated = make_chunker(4096, 1024, template)
+    # A counter that agrees with the estimate, so only the headroom differs
+    exact = make_chunker(4096, 1024, template, token_counter=TranscriptChunker(2, 1).count_tokens)
+    unavailable = make_chunker(4096, 1024, template, token_counter=lambda text: None)
+
+    assert estimated.max_chunk_tokens == int(exact.max_chunk_tokens / (1 + ESTIMATE_HEADROOM))
+    assert exact.token_counter is not None
+    assert unavailable.token_counter is None
+    assert unavailable.max_chunk_tokens == estimated.max_chunk_tokens
+    assert make_chunker(4096, 1024, template, max_chunk_tokens=100).max_chunk_tokens == 100
+
+
+def test_merge_drops_duplicates_from_overlap():
+    merged = merge_chunk_claims([
+        ["The Earth orbits the Sun.", "Water boils at 100 C."],
+        ["water boils at 100 c", "Python was released in 1991."],
+    ])
+    assert merged == ["The Earth orbits the Sun.", "Water boils at 100 C.", "Python was released in 1991."]
+
+
+def test_merge_drops_near_duplicates_only_from_previous_chunk():
+    near = "the quick brown fox jumps over the lazy dog today"
+    variant = "the quick brown fox jumps over the lazy dog"
+    assert merge_chunk_claims([[near], [variant]]) == [near]
+    assert merge_chunk_claims([[near], ["unrelated"], [variant]]) == [near, "unrelated", variant]
+
+
+def test_merge_returns_chunk_offsets():
+    merged = merge_chunk_claims([[{"claim": "a b c"}], [{"claim": "A, b c!"}, {"claim": "d e"}]],
+                                chunk_offsets=[0, 120])
+    assert merged == [({"claim": "a b c"}, 0), ({"claim": "d e"}, 120)]
+
+
+def test_map_reduce_claims_offsets_point_into_transcript():
+    texts = [words(100), words(5)]
+    chunker = TranscriptChunker(20, overlap_tokens=5)
+
+    def extract_many(chunk_texts):
+        # One claim per chunk: its first word
+        return [[chunk.split()[0]] for chunk in chunk_texts]
+
+    results = map_reduce_claims(texts, chunker, extract_many, with_offsets=True)
+
+    assert len(results) == 2
+    assert len(results[0]) == len(chunker.split(texts[0]))
+    for text, claims in zip(texts, results):
+        for claim, offset in claims:
+            assert text[offset:].startswith(claim)
+    assert results[1] == [("w000", 0)]
@@ -0,0 +1,42 @@
+"""Tests for near_duplicates.py: grouping, the streaming filter and CollapsedClaims"""
+
+import numpy as np
+
+from near_duplicates import CollapsedClaims, NearDuplicateFilter, near_duplicate_groups
+
+
+BASE = "the federal reserve raised interest rates by half a percent in march"
+CLAIMS = [
+    BASE,
+    {"claim": "Unemployment fell to 3.5 percent last year", "time": None, "confidence": None},
+    BASE.upper() + "!",
+    "the federal reserve raised interest rates by half a percent in march.",
+    "Solar panels convert sunlight into electricity",
+]
+
+
+def test_groups_are_numbered_by_first_appearance():
+    group_of = near_duplicate_groups(CLAIMS)
+    assert group_of.tolist() == [0, 1, 0, 0, 2]
+
+
+def test_distinct_claims_stay_apart():
+    claims = [f"claim number {i} about topic {i * 7}" for i in range(20)]
+    assert near_duplicate_groups(claims).tolist() == list(range(20))
+    assert near_duplicate_groups([]).tolist() == []
+
+
+def test_filter_drops_what_grouping_merges():
+    dedup = NearDuplicateFilter()
+    kept = dedup.new_claims(CLAIMS[:2]) + dedup.new_claims(CLAIMS[2:])
+    assert kept == [CLAIMS[0], CLAIMS[1], CLAIMS[4]]
+    assert (dedup.seen, dedup.dropped) == (5, 2)
+
+
+def test_collapsed_claims_expand_labels_to_every_claim():
+    collapsed = CollapsedClaims(CLAIMS, ["v1", "v1", "v2", "v3", "v2"], near_duplicate_groups(CLAIMS))
+    assert len(collapsed) == 3
+    assert collapsed.representatives == [CLAIMS[0], CLAIMS[1], CLAIMS[4]]
+    assert collapsed.multiplicity.tolist() == [3, 1, 1]
+    assert collapsed.source_ids == [["v1", "v2", "v3"], ["v1"], ["v2"]]
+    assert collapsed.expand(np.array([7, 8, 9])).tolist() == [7, 8, 7, 7, 9]
@@ -0,0 +1,204 @@
+"""
+Transcript Normalization
+========================
+
+Strips YouTube auto-caption artifacts from transcripts before extraction,
+so prefill isn't spent on text that carries no claims:
+
+    - timestamps: cue ranges ("00:00:01,000 --> 00:00:04,000") and
+      timestamps alone on a caption line ("00:01:23.450", "1:23"); times
+      inside a sentence ("the meeting is at 10:30") are kept
+    - sound tags ("[Music]", "[Applause]", "(laughter)", "♪")
+    - filler words ("um", "uh", "erm", "hmm", ...)
+    - rolling caption windows: auto-captions repeat each line at the start
+      of the next, which leaves phrases duplicated back to back
+
+Artifacts are removed with regexes applied to the whole batch through
+pandas' ``str`` methods. Repeated windows are found with numpy over the
+batch's words (factorized to integer codes): for each window length k a
+word equal to the word k positions later, k times in a row, marks a
+repeat. Token counts before and after use the tokenizer when one is
+given, otherwise the same characters-per-token estimate as chunking.py.
+Because extraction runs on the normalized text, the extraction cache key
+is built from it too: transcripts that differ only in caption artifacts
+share cache entries.
+
+Usage:
+    from transcript_normalization import TranscriptNormalizer
+
+    normalizer = TranscriptNormalizer()
+    transcripts = normalizer.normalize(batch["transcript_text"]).tolist()
+    ...
+    normalizer.report()
+"""
+
+import itertools
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from chunking import CHARS_PER_TOKEN
+
+
+# Part of checkpoint inputs; bump when the rules below change
+NORMALIZATION_VERSION = "2"
+
+# Longest repeated caption window (in words) that is collapsed
+MAX_REPEAT_WORDS = 16
+
+_TS = r"\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?"
+# Cue ranges anywhere; any other timestamp only when it is the whole line
+_TIMESTAMP_RE = re.compile(rf"{_TS}[ \t]*-->[ \t]*{_TS}|(?m:^[ \t]*{_TS}[ \t]*$)")
+_TAG_RE = re.compile(
+    r"[\[(]\s*(?:music|applause|laughter|laughs|inaudible|silence|noise|cheering|foreign|"
+    r"background music|music playing|__)\s*[\])]|[♪♫]+",
+    re.IGNORECASE
+)
+_FILLER_RE = re.compile(r"\b(?:uh-huh|u+m+|u+h+|e+r+m+|h+m+|m+h+m+|a+h+)\b(?!-)[,.]?", re.IGNORECASE)
+# Ceil(len / CHARS_PER_TOKEN) matches per word, as TranscriptChunker estimates
+_TOKEN_PIECE_RE = re.compile(rf"\S{{1,{CHARS_PER_TOKEN}}}")
+
+
+def count_tokens(texts: pd.Series, tokenizer=None) -> pd.Series:
+    """
+    Tokens per text
+
+    Args:
+        texts: String series
+        tokenizer: Hugging Face tokenizer for exact counts (default: estimate)
+
+    Returns:
+        Integer series aligned with texts
+    """
+    texts = texts.fillna("").astype(str)
+    if tokenizer is not None:
+        ids = tokenizer(texts.tolist(), add_special_tokens=False)["input_ids"]
+        return pd.Series([len(row) for row in ids], index=texts.index, dtype="int64")
+    return texts.str.count(_TOKEN_PIECE_RE.pattern).astype("int64")
+
+
+def collapse_repeats(texts: pd.Series, max_words: int = MAX_REPEAT_WORDS) -> pd.Series:
+    """
+    Drop back-to-back repeats of 2..max_words word windows (case-insensitive)
+
+    Args:
+        texts: String series
+        max_words: Longest window collapsed
+
+    Returns:
+        Series of the remaining words joined by single spaces
+    """
+    split = texts.str.split().tolist()
+    counts = np.fromiter(map(len, split), dtype=np.int64, count=len(split))
+    words = np.array(list(itertools.chain.from_iterable(split)), dtype=object)
+    rows = np.repeat(np.arange(len(split)), counts)
+    codes = pd.factorize(pd.Series(words, dtype=object).str.lower().to_numpy())[0]
+    kept_at = np.arange(len(words))
+
+    for k in range(2, max_words + 1):
+        if len(codes) <= k:
+            break
+        # Words k positions apart that match, within one row
+        same = (codes[:-k] == codes[k:]) & (rows[:-k] == rows[k:])
+        edges = np.diff(np.concatenate(([0], same.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        lengths = np.flatnonzero(edges == -1) - starts
+        repeated = lengths >= k
+        if not repeated.any():
+            continue
+        # A run of L matches covers L // k whole copies after the first window
+        drop_from = starts[repeated] + k
+        drop_to = drop_from + lengths[repeated] // k * k
+        n = len(codes) + 1
+        dropped = np.cumsum(np.bincount(drop_from, minlength=n) - np.bincount(drop_to, minlength=n))[:-1] > 0
+        codes, rows, kept_at = codes[~dropped], rows[~dropped], kept_at[~dropped]
+
+    kept = words[kept_at].tolist()
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(split)))))
+    return pd.Series([" ".join(kept[a:b]) for a, b in zip(bounds[:-1], bounds[1:])],
+                     index=texts.index, dtype="object")
+
+
+def normalize_transcripts(texts: pd.Series) -> pd.Series:
+    """
+    Remove caption artifacts and collapse repeated caption windows
+
+    Args:
+        texts: Raw transcript series (missing values become "")
+
+    Returns:
+        Normalized series aligned with texts
+    """
+    out = texts.fillna("").astype(str)
+    out = out.str.replace(_TIMESTAMP_RE, " ", regex=True)
+    out = out.str.replace(_TAG_RE, " ", regex=True)
+    out = out.str.replace(_FILLER_RE, " ", regex=True)
+    # Also collapses whitespace, so caption lines split by newlines compare equal
+    return collapse_repeats(out)
+
+
+class TranscriptNormalizer:
+    """Normalizes transcript batches and keeps per-row token savings"""
+
+    def __init__(self, tokenizer=None):
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer for exact token counts;
+                without one, counts are estimated from word lengths
+        """
+        self.tokenizer = tokenizer
+        self._rows: List[pd.DataFrame] = []
+
+    def normalize(self, texts: Sequence[str], ids: Optional[Sequence[Any]] = None) -> pd.Series:
+        """
+        Normalize one batch and record its savings
+
+        Args:
+            texts: Raw transcripts
+            ids: Row identifiers for the savings table (default: running index)
+
+        Returns:
+            Normalized transcripts, in input order
+        """
+        raw = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype="object")
+        raw = raw.reset_index(drop=True)
+        normalized = normalize_transcripts(raw)
+
+        before = count_tokens(raw, self.tokenizer)
+        after = count_tokens(normalized, self.tokenizer)
+        start = sum(len(rows) for rows in self._rows)
+        self._rows.append(pd.DataFrame({
+            "row": list(ids) if ids is not None else range(start, start + len(raw)),
+            "tokens_before": before.to_numpy(),
+            "tokens_after": after.to_numpy(),
+            "tokens_saved": (before - after).to_numpy()
+        }))
+        return normalized
+
+    def savings(self) -> pd.DataFrame:
+        """Per-row token counts before and after normalization"""
+        if not self._rows:
+            return pd.DataFrame(columns=["row", "tokens_before", "tokens_after", "tokens_saved"])
+        return pd.concat(self._rows, ignore_index=True)
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self.savings()
+        before = int(rows["tokens_before"].sum())
+        saved = int(rows["tokens_saved"].sum())
+        return {
+            "rows": len(rows),
+            "tokens_before": before,
+            "tokens_after": before - saved,
+            "tokens_saved": saved,
+            "saved_share": round(saved / before, 4) if before else 0.0,
+            "median_row_saved": float(rows["tokens_saved"].median()) if len(rows) else 0.0,
+            "max_row_saved": int(rows["tokens_saved"].max()) if len(rows) else 0
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"Normalization: {s['tokens_saved']}/{s['tokens_before']} transcript tokens removed "
+              f"({s['saved_share']:.1%}) over {s['rows']} rows; "
+              f"median {s['median_row_saved']:.0f}, max {s['max_row_saved']} per row")
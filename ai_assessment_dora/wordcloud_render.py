@@ -0,0 +1,142 @@
+"""
+Word Cloud Rendering
+====================
+
+Weighted term frequencies for claims and frequency-based word cloud output.
+
+Each claim is tokenized once; a claim's weight (its cluster's performance
+score times its near-duplicate multiplicity) is added to every term it
+contains with a vectorized bincount, and the totals go to WordCloud's
+``generate_from_frequencies``. Nothing is replicated, so a claim from a
+video with millions of views costs the same as any other claim.
+
+The cloud is either shown with matplotlib or, in headless mode, written to
+PNG, SVG and/or a JSON file of the term weights, so it can run on servers
+without a display.
+
+Usage:
+    from wordcloud_render import term_frequencies, render_wordcloud
+
+    frequencies = term_frequencies(claims, weights)
+    render_wordcloud(frequencies)                              # interactive
+    render_wordcloud(frequencies, "out/wordcloud", ("png", "json"))  # headless
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from wordcloud import STOPWORDS, WordCloud
+
+from chunking import claim_text
+
+
+FORMATS = ("png", "svg", "json")
+DEFAULT_MAX_WORDS = 200
+
+_TOKEN_PATTERN = r"[a-z][a-z0-9'\-]+"
+
+
+def term_frequencies(
+    claims: Sequence[Any],
+    weights: Optional[Sequence[float]] = None,
+    stopwords=STOPWORDS
+) -> Dict[str, float]:
+    """
+    Total weight of each term across claims
+
+    Args:
+        claims: Claim strings or {"claim": ...} objects
+        weights: Weight per claim (default 1 each)
+        stopwords: Terms to leave out
+
+    Returns:
+        {term: summed weight}, largest first
+    """
+    if not len(claims):
+        return {}
+    weights = np.ones(len(claims)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    tokens = (
+        pd.Series([claim_text(claim) for claim in claims])
+        .str.lower()
+        .str.findall(_TOKEN_PATTERN)
+        .explode()
+        .dropna()
+    )
+    tokens = tokens[~tokens.isin(set(stopwords))]
+    if tokens.empty:
+        return {}
+
+    # Index of the exploded series is the claim position
+    codes, terms = pd.factorize(tokens)
+    totals = np.bincount(codes, weights=weights[tokens.index.to_numpy()], minlength=len(terms))
+
+    order = np.argsort(-totals, kind="stable")
+    return {terms[i]: float(totals[i]) for i in order if totals[i] > 0}
+
+
+def render_wordcloud(
+    frequencies: Dict[str, float],
+    output_path: Optional[str] = None,
+    formats: Sequence[str] = ("png",),
+    width: int = 800,
+    height: int = 400,
+    background_color: str = "white",
+    max_words: int = DEFAULT_MAX_WORDS
+) -> List[str]:
+    """
+    Draw a word cloud from term weights
+
+    Args:
+        frequencies: {term: weight} (e.g. from term_frequencies)
+        output_path: None shows the cloud with matplotlib; otherwise the
+            path (extension ignored) the files are written to
+        formats: Any of "png", "svg", "json" for headless output
+        width, height, background_color, max_words: Passed to WordCloud
+
+    Returns:
+        Paths of the written files (empty when shown interactively)
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown word cloud formats {sorted(unknown)}. Choose from {FORMATS}")
+    if not frequencies:
+        print("No terms to draw a word cloud from")
+        return []
+
+    wordcloud = WordCloud(width=width, height=height, background_color=background_color,
+                          max_words=max_words).generate_from_frequencies(frequencies)
+
+    if output_path is None:
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(15, 7))
+        plt.imshow(wordcloud, interpolation='bilinear')
+        plt.axis('off')
+        plt.show()
+        return []
+
+    base = os.path.splitext(output_path)[0]
+    directory = os.path.dirname(base)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    written = []
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        if fmt == "png":
+            wordcloud.to_file(path)
+        elif fmt == "svg":
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(wordcloud.to_svg())
+        else:
+            top = dict(list(frequencies.items())[:max_words])
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(top, f, indent=2)
+        written.append(path)
+
+    print(f"Word cloud written to {', '.join(written)}")
+    return written
@@ -0,0 +1,19 @@
+"""
+Pipeline Benchmarks
+===================
+
+Offline benchmarks for the LLM_vllm.py extraction/clustering pipeline.
+
+    synthetic_data   - synthetic transcript CSVs of any size
+    stand_in_server  - local OpenAI-compatible completion server that
+                       answers extraction prompts without a GPU
+    run_pipeline     - runs each pipeline stage and reports wall time,
+                       throughput and peak RSS as JSON
+    compare          - flags regressions between two result files
+    cpu_inference    - tokens/s and RSS of LLM.py's CPU backends
+                       (torch, int8, onnx)
+
+Usage:
+    python -m benchmarks.run_pipeline --rows 1000 --output results/1k.json
+    python -m benchmarks.compare results/base.json results/1k.json
+"""
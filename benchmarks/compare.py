@@ -0,0 +1,99 @@
+"""
+Benchmark Comparison
+====================
+
+Compares two run_pipeline result files stage by stage and for the whole
+run, and flags regressions in wall time and peak RSS beyond a tolerance.
+Per-stage RSS is only compared when both files sampled it per stage;
+older files recorded the process-wide high-water mark after each stage,
+so for those only the whole-run peak is compared. Exits with status 1
+when anything regressed, so it can gate CI.
+
+Usage:
+    python -m benchmarks.compare results/base.json results/new.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _compare_row(name: str, old: Dict[str, Any], new: Dict[str, Any], tolerance: float,
+                 compare_rss: bool) -> Dict[str, Any]:
+    time_ratio = new["wall_seconds"] / old["wall_seconds"] if old["wall_seconds"] else 1.0
+    rss_ratio = None
+    if compare_rss and old.get("peak_rss_mb") and new.get("peak_rss_mb") is not None:
+        rss_ratio = new["peak_rss_mb"] / old["peak_rss_mb"]
+    return {
+        "stage": name,
+        "base_seconds": old["wall_seconds"],
+        "new_seconds": new["wall_seconds"],
+        "time_ratio": round(time_ratio, 3),
+        "base_peak_rss_mb": old.get("peak_rss_mb") if compare_rss else None,
+        "new_peak_rss_mb": new.get("peak_rss_mb") if compare_rss else None,
+        "rss_ratio": round(rss_ratio, 3) if rss_ratio is not None else None,
+        "regressed": time_ratio > 1 + tolerance or (rss_ratio is not None and rss_ratio > 1 + tolerance)
+    }
+
+
+def compare_results(base: Dict[str, Any], new: Dict[str, Any], tolerance: float = 0.15) -> List[Dict[str, Any]]:
+    """
+    Stage-by-stage and whole-run comparison
+
+    Args:
+        base: Baseline results
+        new: Results to check
+        tolerance: Allowed relative slowdown / memory growth
+
+    Returns:
+        One row per stage present in both files, then a "total" row, with
+        ratios and a "regressed" flag (rss_ratio is None where RSS isn't
+        comparable)
+    """
+    if base.get("config") != new.get("config"):
+        print("Warning: benchmark configurations differ; ratios may not be meaningful")
+    per_stage_rss = base.get("rss_sampling") == new.get("rss_sampling") == "per_stage"
+    if not per_stage_rss:
+        print("Note: per-stage RSS was not sampled in both files; comparing the whole-run peak only")
+
+    base_stages = {s["stage"]: s for s in base["stages"]}
+    rows = []
+    for stage in new["stages"]:
+        old = base_stages.get(stage["stage"])
+        if old is None:
+            continue
+        rows.append(_compare_row(stage["stage"], old, stage, tolerance, per_stage_rss))
+    rows.append(_compare_row("total", base["totals"], new["totals"], tolerance, True))
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], base: Dict[str, Any], new: Dict[str, Any]):
+    print(f"Base: {str(base.get('commit'))[:10]}  New: {str(new.get('commit'))[:10]}")
+    print(f"{'stage':<18}{'base s':>10}{'new s':>10}{'x':>8}{'base MB':>10}{'new MB':>10}{'x':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        rss = [f"{value:>{width}{spec}}" if value is not None else f"{'-':>{width}}"
+               for value, width, spec in ((row["base_peak_rss_mb"], 10, ".1f"), (row["new_peak_rss_mb"], 10, ".1f"),
+                                          (row["rss_ratio"], 8, ".2f"))]
+        print(f"{row['stage']:<18}{row['base_seconds']:>10.2f}{row['new_seconds']:>10.2f}"
+              f"{row['time_ratio']:>8.2f}{''.join(rss)}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two pipeline benchmark results")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative slowdown or memory growth (default 0.15)")
+    args = parser.parse_args()
+
+    base, new = load_results(args.base), load_results(args.new)
+    rows = compare_results(base, new, args.tolerance)
+    print_comparison(rows, base, new)
+    sys.exit(1 if any(row["regressed"] for row in rows) else 0)
@@ -0,0 +1,166 @@
+"""
+CPU Inference Benchmark
+=======================
+
+Compares the CPU backends of LLM.py's local extraction model (torch as
+published, int8 dynamic quantization, ONNX Runtime) on the same synthetic
+transcripts: load time, generated tokens/s, peak RSS after loading and
+overall, weight size, and how many of the torch backend's claims each
+backend reproduces. The load peak is what a worker needs just to start.
+
+Each backend runs in its own subprocess so peak RSS is not shared between
+them. The model is downloaded from the Hugging Face hub on first use.
+
+Usage:
+    python -m benchmarks.cpu_inference --backends torch int8 onnx --threads 8 --output cpu.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ai_assessment_dora"))
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _normalize(claim: Any) -> str:
+    return " ".join(str(claim).lower().split())
+
+
+def run_backend(backend: str, transcripts: int, median_words: int, batch_size: int, max_new_tokens: int,
+                num_threads: Optional[int], seed: int) -> Dict[str, Any]:
+    """Load one backend and extract claims from the synthetic transcripts (in this process)"""
+    from LLM import MODEL_NAME, build_extraction_prompt, parse_claims
+    from batched_generation import generate_bucketed
+    from model_registry import default_registry, get_pipeline
+
+    from benchmarks.synthetic_data import synthetic_transcripts
+
+    texts = synthetic_transcripts(transcripts, seed=seed, median_words=median_words, max_words=median_words * 4)
+    prompts = [build_extraction_prompt(text) for text in texts]
+
+    start = time.perf_counter()
+    nlp_pipeline = get_pipeline(MODEL_NAME, backend=backend, num_threads=num_threads)
+    load_seconds = time.perf_counter() - start
+    rss_after_load = _peak_rss_mb()
+
+    start = time.perf_counter()
+    completions = generate_bucketed(nlp_pipeline, prompts, batch_size=batch_size, max_new_tokens=max_new_tokens,
+                                    do_sample=False, return_full_text=False)
+    generate_seconds = time.perf_counter() - start
+
+    tokenizer = nlp_pipeline.tokenizer
+    prompt_tokens = sum(len(ids) for ids in tokenizer(prompts, add_special_tokens=False)["input_ids"])
+    generated_tokens = sum(len(ids) for ids in tokenizer(completions, add_special_tokens=False)["input_ids"])
+
+    return {
+        "backend": backend,
+        "num_threads": num_threads,
+        "load_seconds": round(load_seconds, 2),
+        "generate_seconds": round(generate_seconds, 2),
+        "prompt_tokens": prompt_tokens,
+        "generated_tokens": generated_tokens,
+        "tokens_per_second": round(generated_tokens / generate_seconds, 2) if generate_seconds > 0 else None,
+        "weights_mb": round(default_registry.memory_bytes() / (1024 * 1024), 1),
+        "rss_after_load_mb": round(rss_after_load, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "claims": [[_normalize(c) for c in parse_claims(completion)] for completion in completions]
+    }
+
+
+def _run_in_subprocess(backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "benchmarks.cpu_inference", "--worker", backend,
+           "--transcripts", str(args.transcripts), "--median-words", str(args.median_words),
+           "--batch-size", str(args.batch_size), "--max-new-tokens", str(args.max_new_tokens),
+           "--seed", str(args.seed)]
+    if args.threads is not None:
+        cmd += ["--threads", str(args.threads)]
+    print(f"[{backend}] running...")
+    result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"[{backend}] failed:\n{result.stderr.strip()[-2000:]}")
+        return {"backend": backend, "error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+    # The worker prints its result as the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare_backends(results: List[Dict[str, Any]], baseline: str = "torch") -> List[Dict[str, Any]]:
+    """Add speedup, memory ratio and claim recall relative to the baseline backend"""
+    base = next((r for r in results if r["backend"] == baseline and "error" not in r), None)
+    base_claims = base["claims"] if base is not None else None
+    for result in results:
+        if "error" in result:
+            continue
+        claims = result.pop("claims")
+        if base is None:
+            continue
+        if result is not base:
+            result["speedup"] = round(result["tokens_per_second"] / base["tokens_per_second"], 2) \
+                if base["tokens_per_second"] and result["tokens_per_second"] else None
+            result["peak_rss_ratio"] = round(result["peak_rss_mb"] / base["peak_rss_mb"], 2)
+        # Share of the baseline's claims this backend also produced
+        matched = sum(len(set(b) & set(c)) for b, c in zip(base_claims, claims))
+        total = sum(len(set(b)) for b in base_claims)
+        result["claim_recall"] = round(matched / total, 3) if total else None
+    return results
+
+
+def _cell(value: Any, width: int, spec: str) -> str:
+    # Missing values (e.g. no tokens generated) print as "-"
+    return f"{value:>{width}{spec}}" if value is not None else f"{'-':>{width}}"
+
+
+def print_results(results: List[Dict[str, Any]]):
+    print(f"{'backend':<8}{'load s':>8}{'gen s':>8}{'tok/s':>9}{'x':>7}{'load MB':>10}{'peak MB':>10}"
+          f"{'weights MB':>12}{'recall':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<8}  error: {r['error']}")
+            continue
+        print(f"{r['backend']:<8}{r['load_seconds']:>8.1f}{r['generate_seconds']:>8.1f}"
+              f"{_cell(r['tokens_per_second'], 9, '.1f')}{_cell(r.get('speedup', 1.0), 7, '.2f')}"
+              f"{r['rss_after_load_mb']:>10.0f}{r['peak_rss_mb']:>10.0f}{r['weights_mb']:>12.0f}"
+              f"{_cell(r.get('claim_recall'), 8, '')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LLM.py's CPU extraction backends")
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8"],
+                        help="Backends to compare (torch, int8, onnx); torch is the baseline")
+    parser.add_argument("--transcripts", type=int, default=8)
+    parser.add_argument("--median-words", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op CPU threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_backend(args.worker, args.transcripts, args.median_words, args.batch_size,
+                             args.max_new_tokens, args.threads, args.seed)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    results = compare_backends([_run_in_subprocess(backend, args) for backend in args.backends])
+    print_results(results)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
@@ -0,0 +1,320 @@
+"""
+Pipeline Benchmark
+==================
+
+Runs each stage of the LLM_vllm.py pipeline on a synthetic CSV against the
+local stand-in completion server and reports per-stage wall time, CPU
+time, throughput and peak RSS as JSON.
+
+Stages: load_metrics, extraction, near_duplicates, embedding, clustering,
+scoring, wordcloud. They are LLM_vllm's own stage functions, so
+normalization, chunking, the extraction cache and checkpoints are part of
+what is measured. The checkpoints, extraction cache and embedding store
+are fresh in a temporary directory (the sentence encoder must be available
+locally), so every run does the same work. Results carry the git commit
+and configuration so files from different commits can be compared with
+benchmarks.compare.
+
+A stage's peak RSS is sampled from /proc/self/statm while it runs. Where
+that is unavailable, only the whole-run peak (ru_maxrss) is reported.
+
+Usage:
+    python -m benchmarks.run_pipeline --rows 10k --output results/10k.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ai_assessment_dora"))
+sys.path.insert(0, os.path.join(ROOT, "vllm"))
+
+import LLM_vllm
+from checkpoints import StageCheckpointer
+from data_loading import id_column_for, load_metrics
+from embedding_store import DEFAULT_EMBED_MODEL, EmbeddingStore
+
+from benchmarks.stand_in_server import StandInServer
+from benchmarks.synthetic_data import SIZES, generate_csv
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler:
+    """Peak resident set size since the last reset, polled in a background thread"""
+
+    STATM = "/proc/self/statm"
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.available = os.path.exists(self.STATM)
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if self.available else 0
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def current_mb(self) -> float:
+        with open(self.STATM) as f:
+            pages = int(f.read().split()[1])
+        return pages * self._page_size / (1024 * 1024)
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, self.current_mb())
+
+    def reset(self):
+        if self.available:
+            self._peak = self.current_mb()
+
+    def peak_mb(self) -> Optional[float]:
+        """Peak since reset() (None where /proc/self/statm is unavailable)"""
+        if not self.available:
+            return None
+        # Also covers a stage shorter than the polling interval
+        return max(self._peak, self.current_mb())
+
+    def __enter__(self) -> "RssSampler":
+        if self.available:
+            self._thread = threading.Thread(target=self._poll, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False
+
+
+def _git_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+
+class StageRecorder:
+    """Wall time, CPU time, throughput and peak RSS per stage"""
+
+    def __init__(self, rss: RssSampler):
+        self.rss = rss
+        self.stages: List[Dict[str, Any]] = []
+
+    def run(self, name: str, fn: Callable[[], Any], unit: str, count: Callable[[Any], int]) -> Any:
+        """
+        Run one stage and record its measurements
+
+        Args:
+            name: Stage name
+            fn: Stage body
+            unit: What count() counts (e.g. "rows", "claims")
+            count: Number of items processed, from the stage's result
+        """
+        print(f"[{name}] running...")
+        self.rss.reset()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = fn()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak = self.rss.peak_mb()
+
+        items = count(result)
+        self.stages.append({
+            "stage": name,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "items": items,
+            "unit": unit,
+            "items_per_second": round(items / wall, 2) if wall > 0 else None,
+            # Highest RSS sampled while this stage ran
+            "peak_rss_mb": round(peak, 1) if peak is not None else None
+        })
+        print(f"[{name}] {wall:.2f}s, {items} {unit}, peak RSS {peak or 0:.0f} MB")
+        return result
+
+
+def run_benchmark(
+    rows: int,
+    csv_path: Optional[str] = None,
+    data_dir: str = "benchmark_data",
+    seed: int = 0,
+    max_in_flight: int = 64,
+    batch_rows: int = 500,
+    cluster_method: str = "auto",
+    embed_model: str = DEFAULT_EMBED_MODEL,
+    prefill_tokens_per_s: float = 0.0,
+    decode_tokens_per_s: float = 0.0,
+    wordcloud: bool = True,
+    check_exact: int = 0
+) -> Dict[str, Any]:
+    """
+    Benchmark every pipeline stage on a synthetic CSV
+
+    Args:
+        rows: Synthetic CSV size (ignored when csv_path is given)
+        csv_path: Existing CSV to use instead of generating one
+        data_dir: Where generated CSVs are kept (reused across runs)
+        seed: Seed for the generated CSV
+        max_in_flight: Concurrent extraction requests
+        batch_rows: CSV rows per extraction batch
+        cluster_method: Backend passed to cluster_labels
+        embed_model: Sentence encoder for the embedding stage
+        prefill_tokens_per_s, decode_tokens_per_s: Simulated server speed
+        wordcloud: Include the (headless) word cloud stage
+        check_exact: Score an approximate clustering backend against exact
+            clustering on this many sampled claims (0: skip; untimed)
+
+    Returns:
+        Result dictionary (see module docstring)
+    """
+    if csv_path is None:
+        csv_path = os.path.join(data_dir, f"synthetic_{rows}_seed{seed}.csv")
+        if not os.path.exists(csv_path):
+            generate_csv(csv_path, rows, seed=seed)
+
+    csv_path = os.path.abspath(csv_path)
+    column = "transcript_text"
+    start = time.perf_counter()
+
+    with StandInServer(LLM_vllm.MODEL_NAME, prefill_tokens_per_s=prefill_tokens_per_s,
+                       decode_tokens_per_s=decode_tokens_per_s) as server, \
+            tempfile.TemporaryDirectory() as workdir, RssSampler() as rss:
+        LLM_vllm.VLLM_BASE_URL = server.base_url
+        recorder = StageRecorder(rss)
+        ckpt = StageCheckpointer(os.path.join(workdir, "checkpoints"))
+
+        df = recorder.run("load_metrics", lambda: load_metrics(csv_path, column), "rows", len)
+        video_ids = df[id_column_for(df)].tolist()
+        scores = LLM_vllm.calculate_performance_scores(df)
+
+        records = recorder.run(
+            "extraction",
+            lambda: LLM_vllm.extract_stage(ckpt, csv_path, column, max_in_flight,
+                                           cache_path=os.path.join(workdir, "extraction_cache.sqlite"),
+                                           batch_rows=batch_rows),
+            "rows", lambda _: len(df)
+        )
+        claim_table, collapsed = recorder.run("near_duplicates", lambda: LLM_vllm.collapse_stage(ckpt, records),
+                                              "claims", lambda _: len(records))
+
+        store = EmbeddingStore(os.path.join(workdir, "embedding_store"), embed_model)
+        embeddings = recorder.run("embedding", lambda: LLM_vllm.embed_stage(ckpt, claim_table, collapsed, store),
+                                  "claims", len)
+
+        labels = recorder.run("clustering", lambda: LLM_vllm.cluster_stage(ckpt, embeddings, None, cluster_method),
+                              "claims", len)
+        clustering_quality = None
+        if check_exact:
+            from clustering import compare_with_exact, resolve_method
+            method = resolve_method(cluster_method, len(embeddings))
+            if method != "exact":
+                clustering_quality = compare_with_exact(embeddings, method, check_exact)
+
+        clustered, counts, cluster_scores = recorder.run(
+            "scoring", lambda: LLM_vllm.score_stage(claim_table, collapsed, labels, scores, video_ids),
+            "claims", lambda _: len(claim_table)
+        )
+
+        if wordcloud:
+            recorder.run(
+                "wordcloud",
+                lambda: LLM_vllm.generate_wordcloud(clustered, cluster_scores, counts,
+                                                    output_path=os.path.join(workdir, "wordcloud"),
+                                                    formats=("png", "json")),
+                "claims", lambda _: len(collapsed)
+            )
+
+        requests_served = server.requests_served
+        rss_sampling = "per_stage" if rss.available else None
+
+    return {
+        **_git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "csv": os.path.basename(csv_path),
+            "rows": rows,
+            "seed": seed,
+            "max_in_flight": max_in_flight,
+            "batch_rows": batch_rows,
+            "cluster_method": cluster_method,
+            "embed_model": embed_model,
+            "prefill_tokens_per_s": prefill_tokens_per_s,
+            "decode_tokens_per_s": decode_tokens_per_s
+        },
+        "rss_sampling": rss_sampling,
+        "totals": {
+            "wall_seconds": round(time.perf_counter() - start, 3),
+            "claims": len(claim_table),
+            "representatives": len(collapsed),
+            "clusters": len(cluster_scores),
+            "requests": requests_served,
+            "peak_rss_mb": round(_peak_rss_mb(), 1)
+        },
+        "clustering_quality": clustering_quality,
+        "stages": recorder.stages
+    }
+
+
+def _parse_rows(value: str) -> int:
+    return SIZES[value] if value in SIZES else int(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the extraction/clustering pipeline offline")
+    parser.add_argument("--rows", type=_parse_rows, default=SIZES["1k"],
+                        help="Synthetic CSV size: 1k, 10k, 100k or a number")
+    parser.add_argument("--csv", help="Use an existing CSV instead of generating one")
+    parser.add_argument("--data-dir", default="benchmark_data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--batch-rows", type=int, default=500)
+    parser.add_argument("--cluster-method", default="auto")
+    parser.add_argument("--embed-model", default=DEFAULT_EMBED_MODEL)
+    parser.add_argument("--prefill-rate", type=float, default=0.0,
+                        help="Simulated server prefill tokens/s (0: instant)")
+    parser.add_argument("--decode-rate", type=float, default=0.0,
+                        help="Simulated server decode tokens/s (0: instant)")
+    parser.add_argument("--no-wordcloud", action="store_true")
+    parser.add_argument("--check-exact", type=int, default=0, metavar="SAMPLE",
+                        help="Score the clustering backend against exact clustering on this many claims")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.rows, csv_path=args.csv, data_dir=args.data_dir, seed=args.seed,
+        max_in_flight=args.max_in_flight, batch_rows=args.batch_rows,
+        cluster_method=args.cluster_method, embed_model=args.embed_model,
+        prefill_tokens_per_s=args.prefill_rate, decode_tokens_per_s=args.decode_rate,
+        wordcloud=not args.no_wordcloud, check_exact=args.check_exact
+    )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
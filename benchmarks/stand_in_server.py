@@ -0,0 +1,204 @@
+"""
+Stand-in Completion Server
+==========================
+
+Local OpenAI-compatible server that answers claim-extraction prompts
+without a model, so the pipeline can be benchmarked offline.
+
+Implements the endpoints the pipeline and clients use:
+
+    POST /v1/completions        - claims from the prompt's transcript
+    POST /v1/chat/completions   - same, from the last message
+    GET  /v1/models             - one model card with max_model_len
+    POST /tokenize              - approximate token count
+
+Each completion is the first sentences of the transcript as a JSON claim
+array. Optional prefill/decode rates add a sleep per request, so client-side
+concurrency behaves as it would against a real server.
+
+Usage:
+    from benchmarks.stand_in_server import StandInServer
+
+    with StandInServer(model=MODEL_NAME) as server:
+        LLM_vllm.VLLM_BASE_URL = server.base_url
+        ...
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+CHARS_PER_TOKEN = 4
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _claims_completion(prompt: str, max_tokens: int, claims_per_request: int) -> Tuple[str, int, str]:
+    """Completion text, completion tokens and finish reason for a prompt"""
+    transcript = prompt.rsplit("Transcript:", 1)[-1]
+    sentences = [s.strip() for s in _SENTENCE_RE.split(transcript) if s.strip()]
+    claims = [{"claim": s, "time": None, "confidence": 0.9} for s in sentences[:claims_per_request]]
+    text = json.dumps(claims)
+
+    tokens = len(text) // CHARS_PER_TOKEN + 1
+    if tokens > max_tokens:
+        return text[:max_tokens * CHARS_PER_TOKEN], max_tokens, "length"
+    return text, tokens, "stop"
+
+
+class StandInServer:
+    """OpenAI-compatible completion server running in a background thread"""
+
+    def __init__(
+        self,
+        model: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_model_len: int = 32768,
+        claims_per_request: int = 8,
+        prefill_tokens_per_s: float = 0.0,
+        decode_tokens_per_s: float = 0.0
+    ):
+        """
+        Args:
+            model: Model name reported and accepted
+            host, port: Bind address (port 0 picks a free port)
+            max_model_len: Context length reported in the model card
+            claims_per_request: Claims returned per completion
+            prefill_tokens_per_s: Simulated prompt processing rate (0: instant)
+            decode_tokens_per_s: Simulated generation rate (0: instant)
+        """
+        self.model = model
+        self.max_model_len = max_model_len
+        self.claims_per_request = claims_per_request
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.decode_tokens_per_s = decode_tokens_per_s
+        self.requests_served = 0
+        self._lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _simulate(self, prompt_tokens: int, completion_tokens: int):
+        delay = 0.0
+        if self.prefill_tokens_per_s:
+            delay += prompt_tokens / self.prefill_tokens_per_s
+        if self.decode_tokens_per_s:
+            delay += completion_tokens / self.decode_tokens_per_s
+        if delay:
+            time.sleep(delay)
+
+    def complete(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        """Completion result for one prompt (also used by the chat endpoint)"""
+        text, completion_tokens, finish_reason = _claims_completion(prompt, max_tokens, self.claims_per_request)
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN + 1
+        self._simulate(prompt_tokens, completion_tokens)
+        with self._lock:
+            self.requests_served += 1
+        return {
+            "text": text,
+            "finish_reason": finish_reason,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, payload: Dict[str, Any], status: int = 200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/v1/models":
+                    self._send({"object": "list", "data": [{
+                        "id": server.model, "object": "model", "max_model_len": server.max_model_len
+                    }]})
+                elif self.path.rstrip("/") == "/metrics":
+                    self.send_response(200)
+                    self.end_headers()
+                else:
+                    self._send({"error": "not found"}, 404)
+
+            def do_POST(self):
+                body = self._body()
+                path = self.path.rstrip("/")
+                created = int(time.time())
+
+                if path == "/tokenize":
+                    text = body.get("prompt") or "".join(m["content"] for m in body.get("messages", []))
+                    count = len(text) // CHARS_PER_TOKEN + 1
+                    self._send({"count": count, "max_model_len": server.max_model_len, "tokens": []})
+
+                elif path == "/v1/completions":
+                    prompts: List[str] = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+                    results = [server.complete(p, body.get("max_tokens") or 16) for p in prompts]
+                    self._send({
+                        "id": f"cmpl-{created}", "object": "text_completion", "created": created,
+                        "model": server.model,
+                        "choices": [
+                            {"index": i, "text": r["text"], "finish_reason": r["finish_reason"], "logprobs": None}
+                            for i, r in enumerate(results)
+                        ],
+                        "usage": {k: sum(r["usage"][k] for r in results) for k in results[0]["usage"]}
+                    })
+
+                elif path == "/v1/chat/completions":
+                    prompt = body["messages"][-1]["content"]
+                    result = server.complete(prompt, body.get("max_tokens") or 16)
+                    self._send({
+                        "id": f"chatcmpl-{created}", "object": "chat.completion", "created": created,
+                        "model": server.model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": result["text"]},
+                            "finish_reason": result["finish_reason"]
+                        }],
+                        "usage": result["usage"]
+                    })
+
+                else:
+                    self._send({"error": "not found"}, 404)
+
+        return Handler
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
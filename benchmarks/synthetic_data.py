@@ -0,0 +1,137 @@
+"""
+Synthetic Transcript Data
+=========================
+
+Generates CSVs shaped like the merged YouTube CSV (video_id, title,
+description, transcript_text and engagement counts) with transcripts of
+varied length built from factual-sounding sentences.
+
+Sentences are drawn from a fixed pool of "facts", so the same claims recur
+across videos with small wording changes, like real transcripts; a share
+of rows has no transcript. Output is deterministic for a given seed, so
+results from different commits are comparable.
+
+Usage:
+    from benchmarks.synthetic_data import generate_csv
+
+    generate_csv("synthetic_10k.csv", rows=10_000)
+    transcripts = synthetic_transcripts(20, median_words=300)
+"""
+
+import csv
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+_SUBJECTS = [
+    "The Earth", "Python", "The Great Wall", "Water", "The Moon", "Bitcoin", "The Amazon river",
+    "Mount Everest", "The human brain", "Solar panels", "Electric cars", "The Pacific Ocean",
+    "Coffee", "The internet", "Honey bees", "The stock market", "Antarctica", "Light", "Sound",
+    "The Roman Empire", "Jupiter", "DNA", "The printing press", "Vaccines", "Lithium batteries"
+]
+_VERBS = ["is", "was measured at", "reached", "contains", "covers", "uses", "produces", "lasted"]
+_UNITS = ["kilometers", "years", "percent", "million people", "degrees Celsius", "billion dollars",
+          "tons", "hours", "species", "gigawatts"]
+_QUALIFIERS = ["", " according to recent studies", " as of last year", " by 2030", " on average",
+               " worldwide", " in the United States", " at sea level"]
+_FILLERS = ["So basically", "You know,", "Um,", "Right, so", "And honestly", "Okay so", ""]
+
+
+def _fact_pool(rng: np.random.Generator, size: int) -> List[str]:
+    facts = []
+    for _ in range(size):
+        facts.append(
+            f"{_SUBJECTS[rng.integers(len(_SUBJECTS))]} {_VERBS[rng.integers(len(_VERBS))]} "
+            f"{int(rng.integers(2, 5000))} {_UNITS[rng.integers(len(_UNITS))]}"
+        )
+    return facts
+
+
+def _transcript(rng: np.random.Generator, facts: List[str], n_words: int) -> str:
+    # About nine words per sentence; draw every choice for the transcript at once
+    n_sentences = max(1, n_words // 9)
+    fillers = rng.integers(len(_FILLERS), size=n_sentences)
+    picks = rng.integers(len(facts), size=n_sentences)
+    qualifiers = rng.integers(len(_QUALIFIERS), size=n_sentences)
+    return " ".join(
+        f"{_FILLERS[f]} {facts[p]}{_QUALIFIERS[q]}.".lstrip()
+        for f, p, q in zip(fillers.tolist(), picks.tolist(), qualifiers.tolist())
+    )
+
+
+def transcript_lengths(rng: np.random.Generator, rows: int, median_words: int = 800,
+                       max_words: int = 12_000) -> np.ndarray:
+    """Log-normal transcript lengths in words: mostly short, some very long"""
+    lengths = rng.lognormal(mean=np.log(median_words), sigma=0.9, size=rows)
+    return np.clip(lengths, 20, max_words).astype(np.int64)
+
+
+def synthetic_transcripts(count: int, seed: int = 0, median_words: int = 800, max_words: int = 12_000,
+                          fact_pool_size: int = 2_000) -> List[str]:
+    """Transcripts alone, for benchmarks that don't need the CSV"""
+    rng = np.random.default_rng(seed)
+    facts = _fact_pool(rng, fact_pool_size)
+    lengths = transcript_lengths(rng, count, median_words, max_words)
+    return [_transcript(rng, facts, int(n)) for n in lengths]
+
+
+def generate_csv(
+    path: str,
+    rows: int,
+    seed: int = 0,
+    median_words: int = 800,
+    max_words: int = 12_000,
+    empty_fraction: float = 0.05,
+    fact_pool_size: int = 2_000
+) -> Tuple[str, int]:
+    """
+    Write a synthetic transcript CSV
+
+    Args:
+        path: Output CSV path
+        rows: Number of videos
+        seed: Random seed (same seed, same file)
+        median_words: Median transcript length in words
+        max_words: Longest transcript in words
+        empty_fraction: Share of rows without a transcript
+        fact_pool_size: Distinct facts the transcripts are built from
+
+    Returns:
+        (path, total transcript words)
+    """
+    rng = np.random.default_rng(seed)
+    facts = _fact_pool(rng, fact_pool_size)
+    lengths = transcript_lengths(rng, rows, median_words, max_words)
+    empty = rng.random(rows) < empty_fraction
+    views = rng.lognormal(mean=9.0, sigma=2.0, size=rows).astype(np.int64)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    total_words = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["video_id", "title", "description", "transcript_text",
+                         "view_count", "like_count", "comment_count"])
+        for i in range(rows):
+            transcript = "" if empty[i] else _transcript(rng, facts, int(lengths[i]))
+            total_words += len(transcript.split())
+            view_count = int(views[i])
+            writer.writerow([
+                f"vid{i:07d}",
+                f"Synthetic video {i}",
+                # Long column the pipeline should never parse
+                " ".join(facts[int(j)] for j in rng.integers(len(facts), size=20)),
+                transcript,
+                view_count,
+                int(view_count * rng.uniform(0.01, 0.08)),
+                int(view_count * rng.uniform(0.0005, 0.01))
+            ])
+
+    print(f"Wrote {rows} rows ({total_words} transcript words) to {path}")
+    return path, total_words
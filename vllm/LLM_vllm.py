@@ -1,155 +1,310 @@
-import pandas as pd
-from openai import OpenAI
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import AgglomerativeClustering
-import numpy as np
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import re
-import json
-
-
-# Initialize vLLM client (pointing to local server)
-vllm_client = OpenAI(
-    base_url="http://localhost:8000/v1",
-    api_key="dummy"  # vLLM doesn't require authentication
-)
+import os
+import sys
+import requests
+
+# Shared pipeline stages live next to the transformers version of this script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_assessment_dora"))
+
+import pipeline_stages
+from async_extractor import AsyncExtractor
+from load_balancer import LoadBalancer
+from cascade import DEFAULT_SEGMENT_TOKENS, SCREEN_MODEL_ID, Cascade
+from available_models import get_max_model_len
+from claim_schema import guided_decoding_params, parse_claim_records, report_generated_tokens
+from chunking import claim_text, make_chunker, map_reduce_claims
+from extraction_cache import DEFAULT_CACHE_PATH, cached_extract_many
+from checkpoints import DEFAULT_CHECKPOINT_DIR, StageCheckpointer
+from data_loading import DEFAULT_BATCH_SIZE, id_column_for, load_metrics, load_projected
+from instrumentation import get_instrumentation
+# Stages shared with LLM.py; only extraction is engine-specific
+from pipeline_stages import (calculate_performance_scores, cluster_claims, cluster_stage, collapse_stage,
+                             embed_claims, embed_stage, generate_wordcloud, group_claims_by_label,
+                             map_scores_to_clusters, score_stage)
+# Embedding, clustering and word cloud modules pull in sentence_transformers,
+# sklearn and wordcloud; they are imported by the stages that use them
+
+
+VLLM_BASE_URL = "http://localhost:8000/v1"
 
 MODEL_NAME = "MasterControlAIML/DeepSeek-R1-Qwen2.5-1.5b-SFT-R1-JSON-Unstructured-To-Structured"
+MAX_TOKENS = 1024
+TEMPERATURE = 0.0
 
 
 def load_data(csv_path, transcript_column="transcript_text"):
-    df = pd.read_csv(csv_path)
+    # Only the id, transcript and engagement columns are parsed
+    df = load_projected(csv_path, transcript_column)
     return df
 
 
-def extract_claims(text):
-    """
-    Extract factual claims from text using vLLM server.
-    Much faster than loading the model in Python!
-    """
-    prompt = f"""
+def build_extraction_prompt(text):
+    # Static instructions first and the transcript last, so every request
+    # shares the same prefix and vLLM's prefix cache skips its prefill
+    return f"""
 You are a fact extraction assistant. 
-From the following YouTube transcript, extract all **factual claims** in **JSON array format**.
+From the YouTube transcript below, extract all **factual claims** in **JSON array format**.
 Each claim should be concise, self-contained, and written in natural language. 
 Do not include opinions or vague statements. Only include factual, verifiable claims.
+Each array item is an object with "claim" (the claim), "time" (when a prediction
+is meant to come true, or null) and "confidence" (between 0 and 1).
+Output only the JSON array of claims.
 
 Transcript:
 {text}
+"""
 
-Output JSON array of claims:
-["""
 
-    try:
-        # Make request to vLLM server
-        response = vllm_client.completions.create(
-            model=MODEL_NAME,
-            prompt=prompt,
-            max_tokens=1024,
-            temperature=0.0
-        )
-        
-        result = response.choices[0].text
-        
-        # Parse JSON from result
+def parse_claims(result):
+    # Guided decoding guarantees the schema, so the completion parses
+    # directly into ClaimRecord dicts
+    return parse_claim_records(result)
+
+
+def server_token_counter(base_url=None, model=None):
+    """Token count of a text from the vLLM server's /tokenize (None when it can't answer)"""
+    # /tokenize is served next to /v1, not under it
+    root = (base_url or VLLM_BASE_URL).rstrip("/")
+    if root.endswith("/v1"):
+        root = root[:-len("/v1")]
+
+    def count(text):
         try:
-            claims = json.loads("[" + result[:result.rfind("]")+1])
-        except:
-            # Fallback: extract quoted strings
-            claims = re.findall(r'"(.*?)"', result)
-        
-        return claims
-    
-    except Exception as e:
-        print(f"Error extracting claims: {e}")
+            response = requests.post(f"{root}/tokenize", timeout=30, json={
+                "model": model or MODEL_NAME, "prompt": text, "add_special_tokens": False
+            })
+            response.raise_for_status()
+            return int(response.json()["count"])
+        except Exception:
+            return None
+    return count
+
+
+def get_chunker(overlap_tokens=256, max_chunk_tokens=None, max_model_len=None, balancer=None):
+    """
+    Chunker sized from the served model's max_model_len in AVAILABLE_MODELS.
+    Chunks are checked against the server's tokenizer (the balancer's first
+    instance); if it can't tokenize, token estimates keep extra headroom.
+    """
+    endpoint = balancer.endpoints[0] if balancer is not None else None
+    return make_chunker(
+        max_model_len or get_max_model_len(MODEL_NAME),
+        MAX_TOKENS,
+        build_extraction_prompt,
+        overlap_tokens=overlap_tokens,
+        max_chunk_tokens=max_chunk_tokens,
+        token_counter=server_token_counter(endpoint.base_url, endpoint.model) if endpoint else server_token_counter()
+    )
+
+
+def extract_claims(text):
+    """
+    Extract factual claims from text using vLLM server.
+    Much faster than loading the model in Python!
+    """
+    # The batch path sizes the chunker and splits the text once; a text too
+    # long for one prompt is extracted from overlapping chunks concurrently
+    def on_failure(failed):
+        print("Error extracting claims: the request failed")
         print("Make sure vLLM server is running:")
         print("  cd /lambda/nfs/newinstance/vllm")
         print("  ./start_vllm_server.sh")
-        return []
 
+    return extract_claims_batch([text], on_failure=on_failure)[0]
 
-def embed_claims(claims):
-    embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = embed_model.encode(claims)
-    return embeddings
 
+def extract_claims_batch(texts, max_in_flight=64, request_timeout=300.0, max_chunk_tokens=None,
+                         cache=None, with_offsets=False, balancer=None, cascade=None, on_failure=None):
+    """
+    Extract claims from many transcripts concurrently.
 
-def cluster_claims(embeddings, claims, n_clusters=None):
-    clustering = AgglomerativeClustering(
-        n_clusters=n_clusters,
-        metric='cosine',
-        linkage='average'
+    Keeps up to max_in_flight requests outstanding so vLLM's continuous
+    batching stays busy. Transcripts that don't fit the model context are
+    split into overlapping chunks whose claims are merged afterwards.
+    Chunks found in the optional ExtractionCache are not sent to the server.
+    Returns one list of claims per transcript, in order; with_offsets=True
+    yields (claim, chunk start character) pairs instead. With a LoadBalancer
+    the requests are spread over its vLLM instances (max_in_flight each).
+    With a Cascade, transcripts are cut into its smaller segments and only
+    those its screening model marks claim-bearing are sent to MODEL_NAME.
+    on_failure is called with the number of failed or timed-out requests.
+    """
+    extractor = AsyncExtractor(
+        model=MODEL_NAME,
+        base_url=VLLM_BASE_URL,
+        max_in_flight=max_in_flight,
+        request_timeout=request_timeout,
+        max_tokens=MAX_TOKENS,
+        temperature=TEMPERATURE,
+        balancer=balancer,
+        **guided_decoding_params()
     )
-    labels = clustering.fit_predict(embeddings)
-    
-    clustered_claims = {}
-    for label, claim in zip(labels, claims):
-        clustered_claims.setdefault(label, []).append(claim)
-    return clustered_claims
+    model_key = balancer.model_key() if balancer is not None else MODEL_NAME
 
+    def complete_many(chunk_texts):
+        if cascade is not None:
+            completions = cascade.complete_many(chunk_texts, extractor, build_extraction_prompt, parse_claims)
+            screen = cascade.screener.last_progress
+            get_instrumentation().record(requests=screen.completed, prompt_tokens=screen.prompt_tokens,
+                                         completion_tokens=screen.completion_tokens)
+        else:
+            completions = extractor.run([build_extraction_prompt(text) for text in chunk_texts])
+        # Quality-tier requests only (none when the screen dropped every segment)
+        progress = extractor.last_progress
+        if progress is not None and progress.total:
+            report_generated_tokens(progress.completion_tokens, progress.total, MAX_TOKENS)
+            get_instrumentation().record(requests=progress.total, prompt_tokens=progress.prompt_tokens,
+                                         completion_tokens=progress.completion_tokens)
+        extractor.last_progress = None
+        if balancer is not None:
+            balancer.report()
+        if cascade is not None:
+            cascade.report()
+        return completions
 
-def calculate_performance_scores(df):
-    # Weighted performance score
-    df['performance_score'] = df['view_count'] * 0.6 + df['like_count'] * 0.3 + df['comment_count'] * 0.1
-    return df['performance_score'].tolist()
+    sampling_params = {"max_tokens": MAX_TOKENS, "temperature": TEMPERATURE, "guided_json": True}
+    if cascade is not None:
+        # Screened-out segments are cached as empty; keep them apart from full runs
+        sampling_params["cascade"] = cascade.key()
 
+    def extract_many(chunk_texts):
+        return cached_extract_many(cache, chunk_texts, build_extraction_prompt(""), model_key,
+                                   sampling_params, complete_many, parse_claims, on_failure)
 
-def map_scores_to_clusters(clustered_claims, scores, transcripts):
-    cluster_scores = {}
-    score_idx = 0
-    for label, claims in clustered_claims.items():
-        cluster_scores[label] = scores[score_idx]
-        score_idx += 1
-    return cluster_scores
+    if cascade is not None:
+        max_chunk_tokens = cascade.segment_tokens
+    chunker = get_chunker(max_chunk_tokens=max_chunk_tokens,
+                          max_model_len=balancer.max_model_len() if balancer is not None else None,
+                          balancer=balancer)
+    return map_reduce_claims(texts, chunker, extract_many, with_offsets=with_offsets)
 
 
-def generate_wordcloud(clustered_claims, performance_scores):
-    weighted_claims = []
-    for label, claims in clustered_claims.items():
-        weight = int(performance_scores.get(label, 1))
-        weighted_claims.extend(claims * weight)
-    
-    text_for_wc = " ".join(weighted_claims)
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text_for_wc)
-    
-    plt.figure(figsize=(15, 7))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    plt.show()
+def compare_generated_tokens(texts, max_in_flight=64):
+    """
+    Generated tokens per transcript with and without the claim schema.
 
+    Runs the same prompts twice (no cache) and prints the reduction that
+    guided decoding and the stop sequences give. Returns both token counts.
+    """
+    prompts = [build_extraction_prompt(text) for text in texts]
+    counts = {}
+    for guided in (False, True):
+        extractor = AsyncExtractor(
+            model=MODEL_NAME,
+            base_url=VLLM_BASE_URL,
+            max_in_flight=max_in_flight,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            progress_interval=0,
+            **(guided_decoding_params() if guided else {})
+        )
+        extractor.run(prompts)
+        counts["guided" if guided else "unconstrained"] = extractor.last_progress.completion_tokens
+
+    report_generated_tokens(counts["guided"], len(texts), MAX_TOKENS,
+                            baseline_tokens=counts["unconstrained"], label="Guided decoding")
+    return counts
+
+
+def extract_stage(ckpt, csv_path, transcript_column="transcript_text", max_in_flight=64,
+                  cache_path=DEFAULT_CACHE_PATH, batch_rows=DEFAULT_BATCH_SIZE, stream_embeddings=False,
+                  balancer=None, cascade=None, normalize=True):
+    """Claims stage (see pipeline_stages.extract_stage) against the vLLM server(s)"""
+    def extract_batch(transcripts, cache, on_failure):
+        return extract_claims_batch(transcripts, max_in_flight=max_in_flight, cache=cache, with_offsets=True,
+                                    balancer=balancer, cascade=cascade, on_failure=on_failure)
 
-def main(csv_path, transcript_column="transcript_text"):
-    df = load_data(csv_path, transcript_column)
-    transcripts = df[transcript_column].dropna().tolist()
-    performance_scores = calculate_performance_scores(df)
+    print(f"Extracting claims ({max_in_flight} requests in flight)...")
+    inputs = [balancer.model_key() if balancer is not None else MODEL_NAME,
+              build_extraction_prompt(""), MAX_TOKENS, TEMPERATURE]
+    if cascade is not None:
+        inputs.append(cascade.key())
+    return pipeline_stages.extract_stage(ckpt, csv_path, transcript_column, extract_batch, inputs,
+                                         cache_path, batch_rows, stream_embeddings, normalize)
+
+
+def make_cascade(screen_url=None, manager_url=None, manager_api_key=None, recall_sample=0.05,
+                 segment_tokens=DEFAULT_SEGMENT_TOKENS):
+    """Cascade screening on the server at screen_url, else the manager's SCREEN_MODEL_ID instances"""
+    if screen_url:
+        return Cascade(base_url=screen_url, recall_sample=recall_sample, segment_tokens=segment_tokens)
+    if not manager_url:
+        raise ValueError("Cascade extraction needs a screening server (screen_url) or a model manager")
+    screen_balancer = LoadBalancer.discover(manager_url, manager_api_key, [SCREEN_MODEL_ID])
+    return Cascade(balancer=screen_balancer, recall_sample=recall_sample, segment_tokens=segment_tokens)
+
+
+def main(csv_path, transcript_column="transcript_text", max_in_flight=64, cache_path=DEFAULT_CACHE_PATH,
+         checkpoint_dir=DEFAULT_CHECKPOINT_DIR, n_clusters=None, batch_rows=DEFAULT_BATCH_SIZE,
+         cluster_method="auto", wordcloud_path=None, stream_embeddings=False, manager_url=None,
+         manager_api_key=None, model_ids=None, cascade=False, screen_url=None, recall_sample=0.05,
+         normalize=True, check_sample=0):
+    # Each stage is persisted under checkpoint_dir; a rerun resumes from the
+    # last stage whose inputs are unchanged. With PIPELINE_PROFILE set each
+    # stage is timed and a run report is written (see instrumentation.py).
+    # The stages can also be run one at a time with cli.py.
+    # manager_url: extract with every ready instance of model_manager_multi.py
+    # (optionally only model_ids) instead of the server at VLLM_BASE_URL
+    # cascade: screen segments with SCREEN_MODEL_ID (at screen_url, or the
+    # manager's instances of it) and extract only from claim-bearing ones
+    # normalize: strip caption artifacts first (see transcript_normalization.py)
+    # check_sample: compare approximate clustering with exact clustering on
+    # this many claims (written to clustering_quality.json)
+    balancer = None
+    if manager_url:
+        exclude = [SCREEN_MODEL_ID] if cascade and not screen_url else None
+        balancer = LoadBalancer.discover(manager_url, manager_api_key, model_ids, exclude=exclude)
+    screener = make_cascade(screen_url, manager_url, manager_api_key, recall_sample) if cascade else None
+    ckpt = StageCheckpointer(checkpoint_dir)
+    instr = get_instrumentation(reset=True)
+    try:
+        # Small columns only; transcripts are streamed in batches during extraction
+        with instr.stage("load_metrics") as stage:
+            df = load_metrics(csv_path, transcript_column)
+            video_ids = df[id_column_for(df)].tolist()
+            performance_scores = calculate_performance_scores(df)
+            stage.count(items=len(df))
     
-    print(f"Processing {len(transcripts)} transcripts...")
+        print(f"Processing {len(df)} transcripts...")
     
-    all_claims = []
-    for i, transcript in enumerate(transcripts):
-        print(f"Extracting claims from transcript {i+1}/{len(transcripts)}...")
-        claims = extract_claims(transcript)
-        all_claims.extend(claims)
-        print(f"  Found {len(claims)} claims")
+        with instr.stage("extraction") as stage:
+            records = extract_stage(ckpt, csv_path, transcript_column, max_in_flight, cache_path, batch_rows,
+                                    stream_embeddings, balancer, screener, normalize)
+            stage.count(items=len(df))
+        print(f"\nTotal claims extracted: {len(records)}")
     
-    print(f"\nTotal claims extracted: {len(all_claims)}")
+        if not records:
+            print("No claims extracted. Exiting.")
+            return {}, {}
     
-    if not all_claims:
-        print("No claims extracted. Exiting.")
-        return {}, {}
+        with instr.stage("near_duplicates") as stage:
+            claim_table, collapsed = collapse_stage(ckpt, records)
+            stage.count(items=len(claim_table))
+        collapsed.report()
     
-    print("Embedding claims...")
-    embeddings = embed_claims(all_claims)
+        print("Embedding claims...")
+        with instr.stage("embedding") as stage:
+            embeddings = embed_stage(ckpt, claim_table, collapsed)
+            stage.count(items=len(collapsed))
     
-    print("Clustering claims...")
-    clustered_claims = cluster_claims(embeddings, all_claims)
+        print("Clustering claims...")
+        with instr.stage("clustering") as stage:
+            labels = cluster_stage(ckpt, embeddings, n_clusters, cluster_method, check_sample)
+            stage.count(items=len(collapsed))
     
-    cluster_scores = map_scores_to_clusters(clustered_claims, performance_scores, transcripts)
+        with instr.stage("scoring") as stage:
+            clustered_claims, claim_counts, cluster_scores = score_stage(claim_table, collapsed, labels,
+                                                                         performance_scores, video_ids)
+            stage.count(items=len(claim_table))
     
-    print("Generating word cloud...")
-    generate_wordcloud(clustered_claims, performance_scores=cluster_scores)
+        print("Generating word cloud...")
+        with instr.stage("wordcloud") as stage:
+            generate_wordcloud(clustered_claims, performance_scores=cluster_scores, claim_counts=claim_counts,
+                               output_path=wordcloud_path)
+            stage.count(items=len(collapsed))
     
-    return clustered_claims, cluster_scores
+        return clustered_claims, cluster_scores
+    finally:
+        instr.finish()
 
 
 if __name__ == "__main__":
@@ -171,6 +326,6 @@ if __name__ == "__main__":
     for label, claims in list(clusters.items())[:3]:  # Show first 3 clusters
         print(f"\nCluster {label} ({len(claims)} claims):")
         for claim in claims[:5]:  # Show first 5 claims per cluster
-            print(f"  - {claim}")
+            print(f"  - {claim_text(claim)}")
     
     print("\n" + "="*80)
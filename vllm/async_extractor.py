@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Async Claim Extraction Engine
+=============================
+
+Sends many completion requests to a vLLM server concurrently so its
+continuous batching stays busy, instead of one blocking call at a time.
+
+Features:
+    - Bounded number of in-flight requests
+    - Per-request timeouts (a timed-out row yields an empty completion)
+    - Results returned in the same order as the prompts
+    - Live progress reporting (rows/s, tokens/s)
+    - Optional client-side load balancing across several vLLM instances
+      (see load_balancer.py)
+
+Usage:
+    from async_extractor import AsyncExtractor
+
+    extractor = AsyncExtractor(model=MODEL_NAME, max_in_flight=64)
+    completions = extractor.run(prompts)
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from load_balancer import LoadBalancer
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class ExtractionProgress:
+    """Counters for rows and tokens processed by the engine"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.start_time = time.time()
+
+    def record(self, usage: Optional[Any], failed: bool = False):
+        self.completed += 1
+        if failed:
+            self.failed += 1
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.time() - self.start_time, 1e-9)
+        return {
+            "completed": self.completed,
+            "total": self.total,
+            "failed": self.failed,
+            "elapsed_s": elapsed,
+            "rows_per_s": self.completed / elapsed,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": (self.prompt_tokens + self.completion_tokens) / elapsed,
+            "completion_tokens_per_s": self.completion_tokens / elapsed
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"  {s['completed']}/{s['total']} rows | "
+              f"{s['rows_per_s']:.2f} rows/s | "
+              f"{s['tokens_per_s']:.0f} tokens/s "
+              f"({s['completion_tokens_per_s']:.0f} generated) | "
+              f"{s['failed']} failed", flush=True)
+
+
+class AsyncExtractor:
+    """Bounded-concurrency completion engine for a vLLM server"""
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:8000/v1",
+        api_key: str = "dummy",
+        max_in_flight: int = 64,
+        request_timeout: float = 300.0,
+        max_tokens: int = 1024,
+        temperature: float = 0.0,
+        progress_interval: float = 5.0,
+        balancer: Optional[LoadBalancer] = None,
+        **completion_kwargs
+    ):
+        """
+        Initialize async extractor
+
+        Args:
+            model: Model name served by vLLM
+            base_url: OpenAI-compatible endpoint of the vLLM server
+            api_key: API key for vLLM (default: "dummy")
+            max_in_flight: Maximum concurrent requests (64-128 keeps vLLM busy)
+            request_timeout: Seconds before a single request is abandoned
+            max_tokens: Maximum tokens to generate per request
+            temperature: Sampling temperature
+            progress_interval: Seconds between progress lines (0 disables)
+            balancer: Spread requests over the balancer's endpoints instead
+                of base_url/model; max_in_flight then applies per endpoint
+            **completion_kwargs: Extra arguments for completions.create
+        """
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.progress_interval = progress_interval
+        self.balancer = balancer
+        self.completion_kwargs = completion_kwargs
+        self.last_progress: Optional[ExtractionProgress] = None
+
+    async def _complete(
+        self,
+        clients: Dict[str, "AsyncOpenAI"],
+        semaphore: asyncio.Semaphore,
+        prompt: str,
+        progress: ExtractionProgress
+    ) -> str:
+        """Run one completion request under the concurrency limit"""
+        async with semaphore:
+            endpoint = self.balancer.acquire(self.max_in_flight) if self.balancer is not None else None
+            client = clients[endpoint.base_url if endpoint is not None else self.base_url]
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    client.completions.create(
+                        model=endpoint.model if endpoint is not None else self.model,
+                        prompt=prompt,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                        **self.completion_kwargs
+                    ),
+                    timeout=self.request_timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"Request timed out after {self.request_timeout}s")
+                progress.record(None, failed=True)
+                if endpoint is not None:
+                    self.balancer.release(endpoint, time.perf_counter() - start, failed=True)
+                return ""
+            except Exception as e:
+                print(f"Error extracting claims: {e}")
+                progress.record(None, failed=True)
+                if endpoint is not None:
+                    self.balancer.release(endpoint, time.perf_counter() - start, failed=True)
+                return ""
+
+            progress.record(response.usage)
+            if endpoint is not None:
+                tokens = response.usage.completion_tokens if response.usage is not None else 0
+                self.balancer.release(endpoint, time.perf_counter() - start, tokens or 0)
+            return response.choices[0].text
+
+    async def _report_progress(self, progress: ExtractionProgress):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            progress.report()
+
+    async def extract_all(self, prompts: Sequence[str]) -> List[str]:
+        """
+        Complete all prompts concurrently
+
+        Args:
+            prompts: Prompts to send
+
+        Returns:
+            Completion text for each prompt, in input order ("" on failure)
+        """
+        progress = ExtractionProgress(len(prompts))
+        self.last_progress = progress
+        base_urls = self.balancer.base_urls if self.balancer is not None else [self.base_url]
+        semaphore = asyncio.Semaphore(self.max_in_flight * len(base_urls))
+
+        # Imported here: openai takes about a second to import
+        from openai import AsyncOpenAI
+        clients = {url: AsyncOpenAI(base_url=url, api_key=self.api_key) for url in base_urls}
+        reporter = None
+        if self.progress_interval > 0:
+            reporter = asyncio.create_task(self._report_progress(progress))
+
+        try:
+            results = await asyncio.gather(*(
+                self._complete(clients, semaphore, prompt, progress)
+                for prompt in prompts
+            ))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            for client in clients.values():
+                await client.close()
+
+        progress.report()
+        return list(results)
+
+    def run(self, prompts: Sequence[str]) -> List[str]:
+        """Synchronous wrapper around extract_all"""
+        return asyncio.run(self.extract_all(prompts))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Available Models
+================
+
+Catalog of models the model managers can serve, shared by
+model_manager.py, model_manager_multi.py and the extraction pipelines.
+
+Kept in its own module so clients can read model limits (e.g.
+``max_model_len``) without importing a Flask manager.
+
+Usage:
+    from available_models import AVAILABLE_MODELS, get_max_model_len
+"""
+
+from typing import Any, Dict, Optional
+
+
+# Context length used by start_vllm_server.sh for models not in the catalog
+DEFAULT_MAX_MODEL_LEN = 32768
+
+# Available models configuration
+AVAILABLE_MODELS = {
+    "qwen-14b-fast": {
+        "name": "Qwen/Qwen2.5-14B-Instruct",
+        "description": "Fast model - 150-200 tokens/sec",
+        "vram": "28GB",
+        "speed": "150-200 tok/s",
+        "max_model_len": 32768,
+        "best_for": "High throughput, fast responses"
+    },
+    "qwen-72b-quality": {
+        "name": "Qwen/Qwen2.5-72B-Instruct",
+        "description": "Maximum quality - 50-70 tokens/sec",
+        "vram": "50GB",
+        "speed": "50-70 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Maximum quality, complex analysis"
+    },
+    "deepseek-v3-reasoning": {
+        "name": "deepseek-ai/DeepSeek-V3",
+        "description": "Best reasoning - 60-80 tokens/sec",
+        "vram": "45GB",
+        "speed": "60-80 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Complex reasoning, trend analysis"
+    },
+    "qwen-vl-7b-multimodal": {
+        "name": "Qwen/Qwen2-VL-7B-Instruct",
+        "description": "Multimodal - 100-120 tokens/sec",
+        "vram": "12GB",
+        "speed": "100-120 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Images + text analysis"
+    },
+    "qwen-vl-72b-multimodal": {
+        "name": "Qwen/Qwen2-VL-72B-Instruct",
+        "description": "Best multimodal - 40-60 tokens/sec",
+        "vram": "70GB",
+        "speed": "40-60 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Best quality images + text"
+    },
+    "mistral-large-chat": {
+        "name": "mistralai/Mistral-Large-Instruct-2411",
+        "description": "Top chat model - 40-60 tokens/sec",
+        "vram": "70GB",
+        "speed": "40-60 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Conversations, instruction following"
+    },
+    "phi-4-quantized": {
+        "name": "unsloth/phi-4-unsloth-bnb-4bit",
+        "description": "Quantized - 200+ tokens/sec",
+        "vram": "4GB",
+        "speed": "200+ tok/s",
+        "max_model_len": 16384,
+        "best_for": "Parallel processing, low memory"
+    },
+    "t3q-structured": {
+        "name": "JungZoona/T3Q-qwen2.5-14b-v1.0-e3",
+        "description": "Fine-tuned for structured output",
+        "vram": "28GB",
+        "speed": "120-150 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Structured JSON output"
+    },
+    "calme-analysis": {
+        "name": "MaziyarPanahi/calme-3.2-instruct-78b",
+        "description": "Fine-tuned for complex analysis",
+        "vram": "60GB",
+        "speed": "45-65 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Complex analysis tasks"
+    },
+    "rombos-merge": {
+        "name": "rombodawg/Rombos-LLM-V2.5-Qwen-72b",
+        "description": "Model merge - 50-70 tokens/sec",
+        "vram": "50GB",
+        "speed": "50-70 tok/s",
+        "max_model_len": 32768,
+        "best_for": "Combined strengths"
+    }
+}
+
+
+def get_model_config(model: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a model by catalog id or Hugging Face name
+
+    Args:
+        model: Catalog id (e.g. "qwen-14b-fast") or full model name
+
+    Returns:
+        Model configuration dictionary or None if not in the catalog
+    """
+    if model in AVAILABLE_MODELS:
+        return AVAILABLE_MODELS[model]
+    for config in AVAILABLE_MODELS.values():
+        if config["name"] == model:
+            return config
+    return None
+
+
+def get_max_model_len(model: str, default: int = DEFAULT_MAX_MODEL_LEN) -> int:
+    """Context length the managers launch this model with"""
+    config = get_model_config(model)
+    if config is None:
+        return default
+    return config["max_model_len"]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Prefix Caching Benchmark
+========================
+
+Measures how much prefill time vLLM's automatic prefix caching saves on a
+CSV run of extraction prompts.
+
+Every prompt is sent twice with max_tokens=1, so the request time is almost
+all prefill:
+
+    uncached - each prompt starts with a unique tag, so no request can reuse
+               another's KV cache (same server, caching defeated)
+    cached   - the prompts as the pipeline builds them, sharing the static
+               instruction prefix
+
+An untimed warm-up pass of uniquely tagged prompts runs first, so
+connection setup and the server's first-request costs don't land on
+whichever run goes first, and nothing it caches is reused by either run.
+
+The server must run with --enable-prefix-caching (the model managers and
+start_vllm_server.sh do). Hit-rate counters from the server's /metrics
+endpoint are included when available.
+
+Usage:
+    python benchmark_prefix_caching.py youtube_videos_merged.csv --rows 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_assessment_dora"))
+
+from async_extractor import AsyncExtractor
+from data_loading import iter_batches
+from LLM_vllm import MODEL_NAME, VLLM_BASE_URL, build_extraction_prompt
+
+
+def load_transcripts(csv_path: str, transcript_column: str = "transcript_text", rows: int = 200) -> List[str]:
+    """First `rows` non-empty transcripts of the CSV"""
+    transcripts: List[str] = []
+    for batch in iter_batches(csv_path, transcript_column, batch_size=min(rows, 500)):
+        transcripts.extend(batch[transcript_column].tolist())
+        if len(transcripts) >= rows:
+            break
+    return transcripts[:rows]
+
+
+def prefix_cache_metrics(base_url: str = VLLM_BASE_URL) -> Dict[str, float]:
+    """Prefix-cache counters from the vLLM /metrics endpoint (empty if unavailable)"""
+    root = base_url.rstrip("/")
+    if root.endswith("/v1"):
+        root = root[:-3]
+    try:
+        response = requests.get(f"{root}/metrics", timeout=5)
+        response.raise_for_status()
+    except Exception:
+        return {}
+
+    metrics: Dict[str, float] = {}
+    for line in response.text.splitlines():
+        if line.startswith("vllm:") and "prefix_cache" in line:
+            name, _, value = line.rpartition(" ")
+            name = name.split("{")[0]
+            try:
+                metrics[name] = metrics.get(name, 0.0) + float(value)
+            except ValueError:
+                continue
+    return metrics
+
+
+def _prefill_run(prompts: List[str], max_in_flight: int) -> Dict[str, Any]:
+    extractor = AsyncExtractor(
+        model=MODEL_NAME,
+        base_url=VLLM_BASE_URL,
+        max_in_flight=max_in_flight,
+        max_tokens=1,
+        temperature=0.0,
+        progress_interval=0
+    )
+    start = time.time()
+    extractor.run(prompts)
+    seconds = time.time() - start
+    progress = extractor.last_progress
+    return {
+        "seconds": round(seconds, 3),
+        "prompt_tokens": progress.prompt_tokens,
+        "prompt_tokens_per_s": round(progress.prompt_tokens / max(seconds, 1e-9), 1),
+        "failed": progress.failed
+    }
+
+
+def _salted(prompts: List[str]) -> List[str]:
+    # A unique first line breaks every shared prefix
+    return [f"[{uuid.uuid4().hex}]\n{prompt}" for prompt in prompts]
+
+
+def benchmark_prefix_caching(
+    csv_path: str,
+    transcript_column: str = "transcript_text",
+    rows: int = 200,
+    max_in_flight: int = 64,
+    warmup: int = 64
+) -> Dict[str, Any]:
+    """
+    Prefill time of a CSV run with and without prefix reuse
+
+    Args:
+        csv_path, transcript_column, rows: Transcripts to build prompts from
+        max_in_flight: Concurrent requests
+        warmup: Prompts sent (uniquely tagged, untimed) before either run
+
+    Returns:
+        Dictionary with both runs, the reduction and server cache metrics
+    """
+    transcripts = load_transcripts(csv_path, transcript_column, rows)
+    prompts = [build_extraction_prompt(text) for text in transcripts]
+    print(f"Benchmarking prefill for {len(prompts)} prompts against {VLLM_BASE_URL}")
+
+    if warmup:
+        _prefill_run(_salted(prompts[:warmup]), max_in_flight)
+    uncached = _prefill_run(_salted(prompts), max_in_flight)
+    metrics_before = prefix_cache_metrics()
+    cached = _prefill_run(prompts, max_in_flight)
+    metrics_after = prefix_cache_metrics()
+
+    report = {
+        "prompts": len(prompts),
+        "warmup_prompts": min(warmup, len(prompts)),
+        "uncached": uncached,
+        "cached": cached,
+        "prefill_time_reduction": round(1 - cached["seconds"] / max(uncached["seconds"], 1e-9), 3),
+        "server_prefix_cache": {
+            name: metrics_after[name] - metrics_before.get(name, 0.0) for name in metrics_after
+        }
+    }
+    print(f"Uncached: {uncached['seconds']}s ({uncached['prompt_tokens_per_s']} prompt tokens/s)")
+    print(f"Cached:   {cached['seconds']}s ({cached['prompt_tokens_per_s']} prompt tokens/s)")
+    print(f"Prefill time reduced by {report['prefill_time_reduction']:.0%}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_path", nargs="?", default="../ai_assessment_dora/youtube_videos_merged.csv")
+    parser.add_argument("--column", default="transcript_text")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--warmup", type=int, default=64, help="Untimed warm-up prompts (0 disables)")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = benchmark_prefix_caching(args.csv_path, args.column, args.rows, args.max_in_flight, args.warmup)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
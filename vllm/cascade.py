@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Cascade Extraction
+==================
+
+Two-tier claim extraction: a fast screening model (``phi-4-quantized`` by
+default) first classifies each transcript segment as claim-bearing or not,
+and only positive segments are sent to the quality extraction model.
+Intros, sponsor reads and chit-chat never reach the 14B/72B model.
+
+Screening answers with a single constrained token ("yes"/"no" via vLLM's
+guided_choice), so a screening request costs little more than its
+prefill. Every tier's requests, tokens and wall time are counted.
+
+A random sample of the segments screened out is sent to the quality model
+anyway. The claims it finds there estimate how many claims the screen
+misses (recall), next to the quality-tier tokens the screen saves. Claims
+found in the sample are kept.
+
+Usage:
+    from cascade import Cascade
+
+    cascade = Cascade(base_url="http://localhost:8004/v1", recall_sample=0.05)
+    completions = cascade.complete_many(segments, quality_extractor, build_extraction_prompt)
+    cascade.report()
+"""
+
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from async_extractor import AsyncExtractor, ExtractionProgress
+from available_models import AVAILABLE_MODELS
+from load_balancer import LoadBalancer
+
+
+SCREEN_MODEL_ID = "phi-4-quantized"
+# Segment size when cascading; smaller segments let the screen drop more
+DEFAULT_SEGMENT_TOKENS = 1024
+# Completion standing in for "no claims" (parses to an empty claim list)
+EMPTY_COMPLETION = "[]"
+
+
+def build_screening_prompt(text: str) -> str:
+    # Transcript last so every screening request shares the prefix
+    return f"""
+Does the following YouTube transcript segment contain at least one factual,
+verifiable claim or concrete prediction (numbers, dates, named facts,
+forecasts)? Greetings, sponsor reads, opinions and small talk do not count.
+Answer yes or no.
+
+Segment:
+{text}
+
+Answer:"""
+
+
+def parse_screening(completion: str) -> bool:
+    # Failed requests ("") count as positive: a screen error never drops claims
+    answer = (completion or "").strip().lower()
+    return not answer.startswith("no")
+
+
+class TierStats:
+    """Requests, tokens and wall time spent in one cascade tier"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.seconds = 0.0
+
+    def add(self, progress: Optional[ExtractionProgress], seconds: float):
+        if progress is None:
+            return
+        self.requests += progress.completed
+        self.prompt_tokens += progress.prompt_tokens
+        self.completion_tokens += progress.completion_tokens
+        self.seconds += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "seconds": round(self.seconds, 2)
+        }
+
+
+class Cascade:
+    """Screens segments with a fast model before the quality model extracts claims"""
+
+    def __init__(
+        self,
+        screen_model: str = AVAILABLE_MODELS[SCREEN_MODEL_ID]["name"],
+        base_url: str = "http://localhost:8000/v1",
+        balancer: Optional[LoadBalancer] = None,
+        max_in_flight: int = 64,
+        request_timeout: float = 60.0,
+        segment_tokens: int = DEFAULT_SEGMENT_TOKENS,
+        recall_sample: float = 0.05,
+        seed: int = 0
+    ):
+        """
+        Args:
+            screen_model: Model name the screening server serves
+            base_url: OpenAI-compatible URL of the screening server
+            balancer: Screen across these instances instead of base_url
+            max_in_flight: Concurrent screening requests (per instance)
+            request_timeout: Seconds before a screening request is abandoned
+                (the segment then counts as positive)
+            segment_tokens: Chunk size the extraction pipeline should use
+            recall_sample: Share of screened-out segments still sent to the
+                quality model to measure recall (0 disables)
+            seed: Seed for the recall sample
+        """
+        self.screen_model = balancer.model_key() if balancer is not None else screen_model
+        self.segment_tokens = segment_tokens
+        self.recall_sample = recall_sample
+        self._rng = random.Random(seed)
+        self.screener = AsyncExtractor(
+            model=screen_model,
+            base_url=base_url,
+            max_in_flight=max_in_flight,
+            request_timeout=request_timeout,
+            max_tokens=1,
+            temperature=0.0,
+            progress_interval=0,
+            balancer=balancer,
+            extra_body={"guided_choice": ["yes", "no"]}
+        )
+        self.screen_tier = TierStats("screen")
+        self.quality_tier = TierStats("quality")
+        self.segments = 0
+        self.positive = 0
+        self.sampled = 0
+        self.sampled_with_claims = 0
+        self.sampled_claims = 0
+        self.positive_claims = 0
+        self.positive_empty = 0
+
+    def key(self) -> str:
+        """Identifies the screen, for cache keys and checkpoint inputs"""
+        return f"{self.screen_model}:{self.segment_tokens}"
+
+    def screen(self, texts: Sequence[str]) -> List[bool]:
+        """Claim-bearing or not, per segment"""
+        start = time.perf_counter()
+        answers = self.screener.run([build_screening_prompt(text) for text in texts])
+        self.screen_tier.add(self.screener.last_progress, time.perf_counter() - start)
+        return [parse_screening(answer) for answer in answers]
+
+    def complete_many(
+        self,
+        texts: Sequence[str],
+        extractor: AsyncExtractor,
+        build_prompt: Callable[[str], str],
+        parse: Optional[Callable[[str], List[Any]]] = None
+    ) -> List[str]:
+        """
+        Quality-model completions for the segments the screen keeps
+
+        Args:
+            texts: Segment texts
+            extractor: Quality-tier engine
+            build_prompt: Extraction prompt for a segment
+            parse: Completion parser, used to count claims for the report
+
+        Returns:
+            One completion per segment; EMPTY_COMPLETION for screened-out ones
+        """
+        keep = self.screen(texts)
+        sample = [not k and self._rng.random() < self.recall_sample for k in keep]
+        send = [idx for idx, (k, s) in enumerate(zip(keep, sample)) if k or s]
+
+        completions = [EMPTY_COMPLETION] * len(texts)
+        if send:
+            start = time.perf_counter()
+            results = extractor.run([build_prompt(texts[idx]) for idx in send])
+            self.quality_tier.add(extractor.last_progress, time.perf_counter() - start)
+            for idx, completion in zip(send, results):
+                completions[idx] = completion
+
+        self.segments += len(texts)
+        self.positive += sum(keep)
+        if parse is not None:
+            for idx in send:
+                found = len(parse(completions[idx])) if completions[idx] else 0
+                if sample[idx]:
+                    self.sampled += 1
+                    self.sampled_claims += found
+                    self.sampled_with_claims += found > 0
+                else:
+                    self.positive_claims += found
+                    self.positive_empty += found == 0
+        return completions
+
+    def stats(self) -> Dict[str, Any]:
+        negative = self.segments - self.positive
+        quality = self.quality_tier
+        per_request = (quality.prompt_tokens + quality.completion_tokens) / quality.requests \
+            if quality.requests else 0.0
+        # Claims in the screened-out segments, extrapolated from the sample
+        missed = self.sampled_claims / self.sampled * negative if self.sampled else None
+        found = self.positive_claims + self.sampled_claims
+        return {
+            "screen_model": self.screen_model,
+            "segments": self.segments,
+            "screened_out": negative,
+            "screened_out_share": round(negative / self.segments, 3) if self.segments else None,
+            "positives_without_claims": self.positive_empty,
+            "tiers": {"screen": self.screen_tier.to_dict(), "quality": quality.to_dict()},
+            "quality_tokens_saved_est": round((negative - self.sampled) * per_request),
+            "recall_sample": self.sampled,
+            "recall_sample_with_claims": self.sampled_with_claims,
+            "missed_claims_est": round(missed, 1) if missed is not None else None,
+            "recall_est": round(found / (found + missed - self.sampled_claims), 3)
+            if missed is not None and found + missed - self.sampled_claims > 0 else None
+        }
+
+    def report(self):
+        s = self.stats()
+        screen, quality = s["tiers"]["screen"], s["tiers"]["quality"]
+        print(f"Cascade ({s['screen_model']}): {s['screened_out']}/{s['segments']} segments screened out "
+              f"({s['screened_out_share'] or 0:.0%}), {s['positives_without_claims']} kept without claims")
+        print(f"  screen:  {screen['requests']} requests, {screen['prompt_tokens']} prompt + "
+              f"{screen['completion_tokens']} generated tokens, {screen['seconds']:.1f}s")
+        print(f"  quality: {quality['requests']} requests, {quality['prompt_tokens']} prompt + "
+              f"{quality['completion_tokens']} generated tokens, {quality['seconds']:.1f}s "
+              f"(~{s['quality_tokens_saved_est']} tokens saved)")
+        if s["recall_sample"]:
+            print(f"  recall check: {s['recall_sample_with_claims']}/{s['recall_sample']} sampled negatives had "
+                  f"claims; ~{s['missed_claims_est']} claims missed, recall ~{s['recall_est']}")
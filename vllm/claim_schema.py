@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Claim Schema
+============
+
+JSON schema and typed records for schema-constrained claim extraction.
+
+The schema is sent to vLLM as a guided-decoding parameter, so the model can
+only emit an array of {"claim", "time", "confidence"} objects and stops as
+soon as the array is closed instead of running on to max_tokens. The
+completion then parses straight into ClaimRecord dicts; there is no regex
+fallback that turns arbitrary quoted text into claims.
+
+ClaimStreamParser does the same for a streamed completion: it consumes
+text deltas and returns each claim as soon as its closing brace arrives.
+
+Usage:
+    from claim_schema import guided_decoding_params, parse_claim_records
+
+    response = client.completions.create(model=..., prompt=...,
+                                         **guided_decoding_params())
+    claims = parse_claim_records(response.choices[0].text)
+
+    parser = ClaimStreamParser()
+    for delta in deltas:
+        for claim in parser.feed(delta):
+            ...
+"""
+
+import json
+from typing import Any, Dict, List, Optional, TypedDict
+
+
+class ClaimRecord(TypedDict):
+    """One extracted claim"""
+    claim: str
+    time: Optional[str]          # When a prediction should come true, else None
+    confidence: Optional[float]  # 0-1, None when the model didn't say
+
+
+CLAIM_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "claim": {"type": "string"},
+        "time": {"type": ["string", "null"]},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1}
+    },
+    "required": ["claim", "time", "confidence"],
+    "additionalProperties": False
+}
+
+CLAIMS_SCHEMA: Dict[str, Any] = {
+    "type": "array",
+    "items": CLAIM_SCHEMA
+}
+
+# The array ends with the last object; stop there even if guided decoding
+# is unavailable on the server
+STOP_SEQUENCES = ["}]", "}\n]"]
+
+
+def guided_decoding_params(schema: Dict[str, Any] = CLAIMS_SCHEMA) -> Dict[str, Any]:
+    """
+    Keyword arguments for completions.create / chat.completions.create
+
+    Returns:
+        {"stop": ..., "extra_body": {...}} with the vLLM guided_json schema
+    """
+    return {
+        "stop": STOP_SEQUENCES,
+        "extra_body": {
+            "guided_json": schema,
+            "include_stop_str_in_output": True
+        }
+    }
+
+
+def to_claim_record(item: Any) -> Optional[ClaimRecord]:
+    """Coerce one parsed item into a ClaimRecord (None if it has no claim)"""
+    if isinstance(item, str):
+        item = {"claim": item}
+    if not isinstance(item, dict):
+        return None
+
+    claim = str(item.get("claim") or "").strip()
+    if not claim:
+        return None
+
+    time = item.get("time")
+    if time is not None:
+        time = str(time).strip()
+        if time.lower() in ("", "none", "null", "n/a"):
+            time = None
+
+    confidence = item.get("confidence")
+    try:
+        confidence = min(max(float(confidence), 0.0), 1.0) if confidence is not None else None
+    except (TypeError, ValueError):
+        confidence = None
+
+    return ClaimRecord(claim=claim, time=time, confidence=confidence)
+
+
+def parse_claim_records(text: str) -> List[ClaimRecord]:
+    """
+    Parse a claims completion into typed records
+
+    Accepts a JSON array of claim objects (or strings), or an object with a
+    "claims" array. Output cut off by max_tokens keeps its complete objects.
+
+    Args:
+        text: Raw completion text
+
+    Returns:
+        List of ClaimRecord
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # Truncated array: close it after the last complete object
+        data = []
+        end = text.rfind("}")
+        while end >= 0:
+            try:
+                data = json.loads(text[:end + 1] + "]")
+                break
+            except json.JSONDecodeError:
+                end = text.rfind("}", 0, end)
+
+    if isinstance(data, dict):
+        data = data.get("claims", [])
+    if not isinstance(data, list):
+        return []
+
+    records = []
+    for item in data:
+        record = to_claim_record(item)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+class ClaimStreamParser:
+    """
+    Incremental parser for a streamed claims array
+
+    Tracks JSON nesting and string state across deltas, so each element of
+    the claims array (top-level, or under a "claims" key) is decoded once,
+    when it is complete. Only the unfinished element is buffered.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []  # Open containers: "[" or "{"
+        self._in_string = False
+        self._escaped = False
+        self._item_start: Optional[int] = None  # Buffer offset of the open array element
+        self._item_depth = 0
+        self.claims_parsed = 0
+
+    def feed(self, delta: str) -> List[ClaimRecord]:
+        """
+        Consume the next piece of completion text
+
+        Args:
+            delta: Streamed text (any split, even mid-string)
+
+        Returns:
+            Claims completed by this delta, in order
+        """
+        records: List[ClaimRecord] = []
+        self._buffer += delta or ""
+        buffer = self._buffer
+        stack = self._stack
+
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._item_start is not None and len(stack) == self._item_depth:
+                        # A bare string element
+                        self._emit(buffer[self._item_start:i + 1], records)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._item_start is None and stack and stack[-1] == "[":
+                    self._item_start, self._item_depth = i, len(stack)
+            elif char in "[{":
+                if char == "{" and self._item_start is None and stack and stack[-1] == "[":
+                    self._item_start, self._item_depth = i, len(stack)
+                stack.append(char)
+            elif char in "]}":
+                if stack:
+                    stack.pop()
+                if char == "}" and self._item_start is not None and len(stack) == self._item_depth:
+                    self._emit(buffer[self._item_start:i + 1], records)
+
+        # Drop consumed text; keep the unfinished element
+        keep = self._item_start if self._item_start is not None else len(buffer)
+        self._buffer = buffer[keep:]
+        self._pos = len(buffer) - keep
+        if self._item_start is not None:
+            self._item_start = 0
+        return records
+
+    def _emit(self, text: str, records: List[ClaimRecord]):
+        self._item_start = None
+        try:
+            record = to_claim_record(json.loads(text))
+        except json.JSONDecodeError:
+            return
+        if record is not None:
+            records.append(record)
+            self.claims_parsed += 1
+
+
+def report_generated_tokens(
+    completion_tokens: int,
+    transcripts: int,
+    max_tokens: int,
+    baseline_tokens: Optional[int] = None,
+    label: str = "Extraction"
+):
+    """
+    Print generated tokens per transcript, against the max_tokens budget and
+    (when given) an unconstrained baseline run over the same transcripts
+    """
+    per_transcript = completion_tokens / max(transcripts, 1)
+    line = (f"{label}: {per_transcript:.0f} generated tokens per transcript "
+            f"({per_transcript / max(max_tokens, 1):.0%} of the {max_tokens}-token budget)")
+    if baseline_tokens:
+        baseline = baseline_tokens / max(transcripts, 1)
+        line += f", {1 - per_transcript / baseline:.0%} fewer than unconstrained ({baseline:.0f})"
+    print(line)
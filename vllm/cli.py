@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Claim Pipeline CLI
+==================
+
+Runs the claim pipeline one stage at a time. Stages hand off through the
+checkpoint directory, so each subcommand loads only what it needs and
+imports only its own dependencies: ``extract`` against a vLLM server
+never imports torch, sentence_transformers, sklearn or wordcloud.
+
+Subcommands:
+    extract  - claims from every transcript (vLLM server or local model)
+    embed    - near-duplicate groups and embeddings of the representatives
+    cluster  - cluster labels
+    report   - cluster scores, top clusters and an optional word cloud
+
+Usage:
+    python cli.py extract --csv ../ai_assessment_dora/youtube_videos_merged.csv
+    python cli.py extract --csv ../ai_assessment_dora/youtube_videos_merged.csv --compare-guided 50
+    python cli.py embed
+    python cli.py cluster --cluster-method knn_graph
+    python cli.py report --csv ../ai_assessment_dora/youtube_videos_merged.csv --wordcloud wordcloud
+"""
+
+import argparse
+import os
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_assessment_dora"))
+
+from checkpoints import DEFAULT_CHECKPOINT_DIR, StageCheckpointer
+from data_loading import DEFAULT_BATCH_SIZE
+from extraction_cache import DEFAULT_CACHE_PATH
+from instrumentation import get_instrumentation
+
+
+ENGINES = ("vllm", "local")
+# Subcommand that writes each checkpoint the later ones load
+PRODUCED_BY = {"claims": "extract", "embedding_rows": "embed"}
+# extract options only one engine reads; passing them to the other is an error
+ENGINE_OPTIONS = {
+    "vllm": ("--vllm-url", "--manager-url", "--manager-api-key", "--models", "--max-in-flight", "--cascade",
+             "--screen-url", "--recall-sample", "--segment-tokens", "--compare-guided"),
+    "local": ("--batch-size", "--backend", "--threads")
+}
+
+
+def load_engine(name: str):
+    """Pipeline module for an extraction engine (both expose the same stages)"""
+    if name == "local":
+        import LLM as engine
+    else:
+        import LLM_vllm as engine
+    return engine
+
+
+def load_checkpoint(ckpt: StageCheckpointer, name: str):
+    try:
+        return ckpt.load(name)
+    except FileNotFoundError as e:
+        raise SystemExit(f"Error: {e}; run `{PRODUCED_BY[name]}` first")
+
+
+def load_transcripts(csv_path: str, transcript_column: str, rows: int) -> List[str]:
+    """First `rows` non-empty transcripts of the CSV"""
+    from data_loading import iter_batches
+    transcripts: List[str] = []
+    for batch in iter_batches(csv_path, transcript_column, batch_size=min(rows, DEFAULT_BATCH_SIZE)):
+        transcripts.extend(batch[transcript_column].tolist())
+        if len(transcripts) >= rows:
+            break
+    return transcripts[:rows]
+
+
+def run_extract(args, engine, ckpt, instr):
+    if args.compare_guided:
+        if args.vllm_url:
+            engine.VLLM_BASE_URL = args.vllm_url
+        # Measurement only: no checkpoint or cache is written
+        with instr.stage("compare_guided") as stage:
+            transcripts = load_transcripts(args.csv, args.transcript_column, args.compare_guided)
+            engine.compare_generated_tokens(transcripts, args.max_in_flight)
+            stage.count(items=len(transcripts), requests=2 * len(transcripts))
+        return
+
+    if args.engine == "local":
+        options = {"batch_size": args.batch_size, "backend": args.backend, "num_threads": args.threads}
+    else:
+        if args.vllm_url:
+            engine.VLLM_BASE_URL = args.vllm_url
+        balancer = cascade = None
+        if args.manager_url:
+            from load_balancer import LoadBalancer
+            # The screening model's instances serve the screen tier only
+            exclude = [engine.SCREEN_MODEL_ID] if args.cascade and not args.screen_url else None
+            balancer = LoadBalancer.discover(args.manager_url, args.manager_api_key, args.models, exclude=exclude)
+        if args.cascade:
+            cascade = engine.make_cascade(args.screen_url, args.manager_url, args.manager_api_key,
+                                          args.recall_sample, args.segment_tokens)
+        options = {"max_in_flight": args.max_in_flight, "balancer": balancer, "cascade": cascade}
+
+    with instr.stage("extraction") as stage:
+        records = engine.extract_stage(ckpt, args.csv, args.transcript_column,
+                                       cache_path=None if args.no_cache else args.cache_path,
+                                       batch_rows=args.batch_rows, stream_embeddings=args.stream_embeddings,
+                                       normalize=not args.no_normalize,
+                                       **options)
+        stage.count(items=len(records))
+    print(f"Total claims extracted: {len(records)}")
+
+
+def run_embed(args, engine, ckpt, instr):
+    records = load_checkpoint(ckpt, "claims")
+    with instr.stage("near_duplicates") as stage:
+        claim_table, collapsed = engine.collapse_stage(ckpt, records)
+        stage.count(items=len(claim_table))
+    collapsed.report()
+
+    with instr.stage("embedding") as stage:
+        engine.embed_stage(ckpt, claim_table, collapsed)
+        stage.count(items=len(collapsed))
+
+
+def _stored_embeddings(ckpt):
+    from embedding_store import get_embedding_store
+    return get_embedding_store().view(load_checkpoint(ckpt, "embedding_rows"))
+
+
+def run_cluster(args, engine, ckpt, instr):
+    embeddings = _stored_embeddings(ckpt)
+    with instr.stage("clustering") as stage:
+        labels = engine.cluster_stage(ckpt, embeddings, args.n_clusters, args.cluster_method,
+                                      args.check_exact)
+        stage.count(items=len(labels))
+    print(f"{len(set(labels.tolist()))} clusters from {len(labels)} claims")
+
+
+def run_report(args, engine, ckpt, instr):
+    from chunking import claim_text
+    from data_loading import id_column_for, load_metrics
+
+    with instr.stage("load_metrics") as stage:
+        df = load_metrics(args.csv, args.transcript_column)
+        video_ids = df[id_column_for(df)].tolist()
+        performance_scores = engine.calculate_performance_scores(df)
+        stage.count(items=len(df))
+
+    claim_table, collapsed = engine.collapse_stage(ckpt, load_checkpoint(ckpt, "claims"))
+    # Labels from the cluster subcommand are reused when the options match
+    labels = engine.cluster_stage(ckpt, _stored_embeddings(ckpt), args.n_clusters, args.cluster_method,
+                                  args.check_exact)
+
+    with instr.stage("scoring") as stage:
+        clustered_claims, claim_counts, cluster_scores = engine.score_stage(
+            claim_table, collapsed, labels, performance_scores, video_ids
+        )
+        stage.count(items=len(claim_table))
+
+    ranked = sorted(cluster_scores.items(), key=lambda item: item[1], reverse=True)
+    print(f"\n{len(clustered_claims)} clusters; top {min(args.top, len(ranked))} by score:")
+    for label, score in ranked[:args.top]:
+        claims = clustered_claims[label]
+        print(f"\nCluster {label} (score {score:,.1f}, {sum(claim_counts[label])} claims):")
+        for claim in claims[:5]:
+            print(f"  - {claim_text(claim)}")
+
+    if args.wordcloud:
+        with instr.stage("wordcloud") as stage:
+            engine.generate_wordcloud(clustered_claims, performance_scores=cluster_scores,
+                                      claim_counts=claim_counts, output_path=args.wordcloud,
+                                      formats=tuple(args.formats))
+            stage.count(items=len(collapsed))
+
+
+def check_engine_options(parser: argparse.ArgumentParser, args, argv: List[str]):
+    """Reject extract options the selected engine would ignore"""
+    for engine, options in ENGINE_OPTIONS.items():
+        if engine == args.engine:
+            continue
+        given = [option for option in options
+                 if any(arg == option or arg.startswith(option + "=") for arg in argv)]
+        if given:
+            parser.error(f"{', '.join(given)} only apply to --engine {engine}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Claim extraction and clustering pipeline, one stage at a time")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR,
+                        help=f"Where stages are saved and loaded (default: {DEFAULT_CHECKPOINT_DIR})")
+    common.add_argument("--engine", choices=ENGINES, default="vllm",
+                        help="vllm: completion server (default); local: LLM.py's in-process model")
+    common.add_argument("--transcript-column", default="transcript_text")
+
+    clustering = argparse.ArgumentParser(add_help=False)
+    clustering.add_argument("--n-clusters", type=int, default=None)
+    clustering.add_argument("--cluster-method", default="auto",
+                            help="auto, exact, knn_agglomerative, knn_graph or incremental")
+    clustering.add_argument("--check-exact", type=int, default=0, metavar="SAMPLE",
+                            help="Score a kNN backend against exact clustering on this many sampled claims "
+                                 "(written to clustering_quality.json)")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # No abbreviations, so check_engine_options sees every engine option as typed
+    extract = subparsers.add_parser("extract", parents=[common], allow_abbrev=False,
+                                    help="Extract claims from the transcripts")
+    extract.add_argument("--csv", required=True, help="Transcript CSV")
+    extract.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    extract.add_argument("--no-cache", action="store_true", help="Don't read or write the extraction cache")
+    extract.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_SIZE, help="CSV rows read per batch")
+    extract.add_argument("--no-normalize", action="store_true",
+                         help="Send transcripts as-is (keep timestamps, [Music] tags, fillers, repeated captions)")
+    extract.add_argument("--stream-embeddings", action="store_true",
+                         help="Embed claims in the background while extraction runs")
+    vllm_engine = extract.add_argument_group("vllm engine")
+    vllm_engine.add_argument("--vllm-url", help="vLLM base URL (default: LLM_vllm.VLLM_BASE_URL)")
+    vllm_engine.add_argument("--manager-url",
+                             help="Multi-model manager URL; spread requests over all its ready instances")
+    vllm_engine.add_argument("--manager-api-key", default=os.environ.get("MANAGER_API_KEY"),
+                             help="Manager API key (default: $MANAGER_API_KEY)")
+    vllm_engine.add_argument("--models", nargs="+", help="Only balance over these manager model ids")
+    vllm_engine.add_argument("--max-in-flight", type=int, default=64,
+                             help="Concurrent requests (per instance with --manager-url)")
+    vllm_engine.add_argument("--cascade", action="store_true",
+                             help="Screen segments with a fast model first; extract only claim-bearing ones")
+    vllm_engine.add_argument("--screen-url",
+                             help="Screening server URL (default: the manager's phi-4-quantized instances)")
+    vllm_engine.add_argument("--recall-sample", type=float, default=0.05,
+                             help="Share of screened-out segments still extracted to estimate missed claims")
+    vllm_engine.add_argument("--segment-tokens", type=int, default=1024, help="Segment size when cascading")
+    vllm_engine.add_argument("--compare-guided", type=int, default=0, metavar="ROWS",
+                             help="Instead of extracting, run the first ROWS transcripts with and without "
+                                  "the claim schema and print the generated tokens of each")
+    local_engine = extract.add_argument_group("local engine")
+    local_engine.add_argument("--batch-size", type=int, default=8, help="Generation batch size")
+    local_engine.add_argument("--backend", default="torch", help="torch, int8 or onnx")
+    local_engine.add_argument("--threads", type=int, default=None, help="CPU threads")
+    extract.set_defaults(run=run_extract)
+
+    embed = subparsers.add_parser("embed", parents=[common], help="Collapse near-duplicates and embed claims")
+    embed.set_defaults(run=run_embed)
+
+    cluster = subparsers.add_parser("cluster", parents=[common, clustering], help="Cluster the embedded claims")
+    cluster.set_defaults(run=run_cluster)
+
+    report = subparsers.add_parser("report", parents=[common, clustering],
+                                   help="Score clusters and write the word cloud")
+    report.add_argument("--csv", required=True, help="Transcript CSV (for engagement scores)")
+    report.add_argument("--top", type=int, default=5, help="Clusters to print")
+    report.add_argument("--wordcloud", help="Word cloud output path without extension")
+    report.add_argument("--formats", nargs="+", default=["png", "json"], help="Word cloud formats: png, svg, json")
+    report.set_defaults(run=run_report)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "extract":
+        check_engine_options(parser, args, argv)
+    engine = load_engine(args.engine)
+    ckpt = StageCheckpointer(args.checkpoint_dir)
+    instr = get_instrumentation(reset=True)
+    try:
+        args.run(args, engine, ckpt, instr)
+    finally:
+        instr.finish()
+
+
+if __name__ == "__main__":
+    main()
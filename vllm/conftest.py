@@ -0,0 +1,4 @@
+# test_vllm_client.py, test_model_selection.py and local_setup/test_*.py are
+# scripts that talk to a running server, not pytest tests
+collect_ignore = ["test_vllm_client.py", "test_model_selection.py"]
+collect_ignore_glob = ["local_setup/test_*.py"]
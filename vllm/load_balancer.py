@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Client-side Load Balancer
+=========================
+
+Spreads completion requests across every vLLM instance the multi-model
+manager (model_manager_multi.py) has ready, so a bulk extraction job uses
+all loaded GPUs instead of one server on port 8000.
+
+Endpoints are discovered from the manager's ``/models/loaded``. Each
+request goes to the endpoint with the lowest expected wait: (outstanding
+requests + 1) divided by its measured throughput. Throughput is an
+exponentially weighted average of completed requests per second, estimated
+from each request's latency and the requests that ran alongside it (Little's
+law), so a faster GPU or a smaller model gets proportionally more traffic.
+Endpoints start with equal weight until they have completed a request,
+and none is given more than its share of in-flight requests, so a fast
+instance saturating doesn't starve the others.
+
+Usage:
+    from load_balancer import LoadBalancer
+
+    balancer = LoadBalancer.discover("http://localhost:8001", api_key=MANAGER_API_KEY)
+    extractor = AsyncExtractor(model=MODEL_NAME, balancer=balancer)
+    completions = extractor.run(prompts)
+    balancer.report()
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+import requests
+
+from available_models import DEFAULT_MAX_MODEL_LEN
+
+
+# Weight of the newest throughput sample
+THROUGHPUT_SMOOTHING = 0.2
+
+
+class Endpoint:
+    """One vLLM instance and its load counters"""
+
+    def __init__(self, base_url: str, model: str, model_id: Optional[str] = None,
+                 max_model_len: int = DEFAULT_MAX_MODEL_LEN):
+        """
+        Args:
+            base_url: OpenAI-compatible URL (e.g. http://host:8002/v1)
+            model: Model name the instance serves
+            model_id: Manager model id (e.g. "qwen-14b-fast")
+            max_model_len: Context length of the instance
+        """
+        self.base_url = base_url
+        self.model = model
+        self.model_id = model_id or model
+        self.max_model_len = max_model_len
+        self.outstanding = 0
+        self.completed = 0
+        self.failed = 0
+        self.completion_tokens = 0
+        self.throughput: Optional[float] = None  # Requests/s, None until measured
+
+    def expected_wait(self, default_throughput: float) -> float:
+        return (self.outstanding + 1) / (self.throughput or default_throughput)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "model": self.model,
+            "model_id": self.model_id,
+            "outstanding": self.outstanding,
+            "completed": self.completed,
+            "failed": self.failed,
+            "completion_tokens": self.completion_tokens,
+            "throughput": round(self.throughput, 3) if self.throughput is not None else None
+        }
+
+
+class LoadBalancer:
+    """Least-outstanding-requests routing weighted by measured throughput"""
+
+    def __init__(self, endpoints: Sequence[Endpoint]):
+        if not endpoints:
+            raise ValueError("LoadBalancer needs at least one endpoint")
+        self.endpoints: List[Endpoint] = list(endpoints)
+
+    @classmethod
+    def discover(
+        cls,
+        manager_url: str,
+        api_key: Optional[str] = None,
+        model_ids: Optional[Sequence[str]] = None,
+        timeout: float = 10.0,
+        exclude: Optional[Sequence[str]] = None
+    ) -> "LoadBalancer":
+        """
+        Build a balancer from the instances the multi-model manager has ready
+
+        Args:
+            manager_url: Model manager URL (e.g. http://192.222.53.238:8001)
+            api_key: Manager API key (X-API-Key)
+            model_ids: Only use these manager model ids (default: all ready)
+            timeout: Request timeout in seconds
+            exclude: Skip these manager model ids (e.g. a cascade's screening model)
+
+        Returns:
+            LoadBalancer over the ready instances
+
+        Raises:
+            RuntimeError: No matching instance is ready
+        """
+        response = requests.get(f"{manager_url.rstrip('/')}/models/loaded",
+                                headers={"X-API-Key": api_key} if api_key else {}, timeout=timeout)
+        response.raise_for_status()
+
+        # The manager reports localhost URLs; reach the ports on the manager's host
+        host = urlparse(manager_url).hostname or "localhost"
+        endpoints = []
+        for info in response.json().get("loaded_models", []):
+            if not info.get("is_running") or info.get("status") != "ready":
+                continue
+            if model_ids is not None and info["model_id"] not in model_ids:
+                continue
+            if exclude and info["model_id"] in exclude:
+                continue
+            model_info = info.get("model_info") or {}
+            endpoints.append(Endpoint(
+                base_url=f"http://{host}:{info['port']}/v1",
+                model=model_info.get("name", info["model_id"]),
+                model_id=info["model_id"],
+                max_model_len=model_info.get("max_model_len", DEFAULT_MAX_MODEL_LEN)
+            ))
+
+        if not endpoints:
+            wanted = f" among {', '.join(model_ids)}" if model_ids else ""
+            raise RuntimeError(f"No ready vLLM instances{wanted} at {manager_url}/models/loaded")
+        print(f"Load balancing across {len(endpoints)} instances: "
+              + ", ".join(f"{e.model_id} ({e.base_url})" for e in endpoints))
+        return cls(endpoints)
+
+    def acquire(self, max_outstanding: Optional[int] = None) -> Endpoint:
+        """
+        Endpoint for the next request (counted as outstanding until released)
+
+        Args:
+            max_outstanding: Skip endpoints with this many requests in flight
+                (unless all have)
+        """
+        measured = [e.throughput for e in self.endpoints if e.throughput is not None]
+        default = sum(measured) / len(measured) if measured else 1.0
+        candidates = [e for e in self.endpoints if max_outstanding is None or e.outstanding < max_outstanding]
+        endpoint = min(candidates or self.endpoints, key=lambda e: e.expected_wait(default))
+        endpoint.outstanding += 1
+        return endpoint
+
+    def release(self, endpoint: Endpoint, latency: float, completion_tokens: int = 0, failed: bool = False):
+        """
+        Record a finished request
+
+        Args:
+            endpoint: Endpoint returned by acquire()
+            latency: Request wall time in seconds
+            completion_tokens: Tokens generated
+            failed: The request errored or timed out (no throughput sample)
+        """
+        concurrent = endpoint.outstanding
+        endpoint.outstanding -= 1
+        if failed:
+            endpoint.failed += 1
+            return
+        endpoint.completed += 1
+        endpoint.completion_tokens += completion_tokens
+        if latency > 0:
+            sample = concurrent / latency
+            if endpoint.throughput is None:
+                endpoint.throughput = sample
+            else:
+                endpoint.throughput += THROUGHPUT_SMOOTHING * (sample - endpoint.throughput)
+
+    @property
+    def base_urls(self) -> List[str]:
+        return [e.base_url for e in self.endpoints]
+
+    def max_model_len(self) -> int:
+        """Smallest context among the endpoints (every prompt must fit any of them)"""
+        return min(e.max_model_len for e in self.endpoints)
+
+    def model_key(self) -> str:
+        """Served model name(s), for cache keys and checkpoint inputs"""
+        return "+".join(sorted({e.model for e in self.endpoints}))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [e.stats() for e in self.endpoints]
+
+    def report(self):
+        total = sum(e.completed for e in self.endpoints) or 1
+        for e in self.endpoints:
+            rate = f"{e.throughput:.2f} req/s" if e.throughput is not None else "unmeasured"
+            print(f"  {e.model_id} @ {e.base_url}: {e.completed} requests ({e.completed / total:.0%}), "
+                  f"{e.completion_tokens} tokens, {rate}, {e.failed} failed")
@@ -12,6 +12,7 @@ Usage:
     python chat_gui.py
 """
 
+import json
 import sys
 import os
 
@@ -75,12 +76,15 @@ def select_model_ui(model_id):
 
 
 def extract_claims_ui(transcript):
-    """Extract claims from transcript"""
+    """Extract claims from transcript, showing each claim as it arrives"""
     try:
-        claims = client.extract_claims(transcript)
-        return claims
+        claims = []
+        yield "[]"
+        for claim in client.stream_claims(transcript):
+            claims.append(claim)
+            yield json.dumps(claims, indent=2)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        yield f"❌ Error: {str(e)}"
 
 
 # Create UI
@@ -33,6 +33,11 @@ scp $SERVER:$SERVER_PATH/vllm_client.py . || {
     exit 1
 }
 echo "✅ Downloaded vllm_client.py"
+scp $SERVER:$SERVER_PATH/claim_schema.py . || {
+    echo "❌ Failed to download claim_schema.py"
+    exit 1
+}
+echo "✅ Downloaded claim_schema.py"
 echo ""
 
 # Download optional files
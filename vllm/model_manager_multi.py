@@ -35,6 +35,8 @@ from threading import Thread, Lock
 from functools import wraps
 import requests
 
+from available_models import AVAILABLE_MODELS
+
 app = Flask(__name__)
 
 # Configuration
@@ -47,90 +49,6 @@ MANAGER_PORT = 8001  # Model manager runs on port 8001
 # API Key Configuration
 API_KEY_FILE = "/lambda/nfs/newinstance/vllm/.api_key"
 
-# Available models configuration
-AVAILABLE_MODELS = {
-    "qwen-14b-fast": {
-        "name": "Qwen/Qwen2.5-14B-Instruct",
-        "description": "Fast model - 150-200 tokens/sec",
-        "vram": "28GB",
-        "speed": "150-200 tok/s",
-        "max_model_len": 32768,
-        "best_for": "High throughput, fast responses"
-    },
-    "qwen-72b-quality": {
-        "name": "Qwen/Qwen2.5-72B-Instruct",
-        "description": "Maximum quality - 50-70 tokens/sec",
-        "vram": "50GB",
-        "speed": "50-70 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Maximum quality, complex analysis"
-    },
-    "deepseek-v3-reasoning": {
-        "name": "deepseek-ai/DeepSeek-V3",
-        "description": "Best reasoning - 60-80 tokens/sec",
-        "vram": "45GB",
-        "speed": "60-80 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Complex reasoning, trend analysis"
-    },
-    "qwen-vl-7b-multimodal": {
-        "name": "Qwen/Qwen2-VL-7B-Instruct",
-        "description": "Multimodal - 100-120 tokens/sec",
-        "vram": "12GB",
-        "speed": "100-120 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Images + text analysis"
-    },
-    "qwen-vl-72b-multimodal": {
-        "name": "Qwen/Qwen2-VL-72B-Instruct",
-        "description": "Best multimodal - 40-60 tokens/sec",
-        "vram": "70GB",
-        "speed": "40-60 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Best quality images + text"
-    },
-    "mistral-large-chat": {
-        "name": "mistralai/Mistral-Large-Instruct-2411",
-        "description": "Top chat model - 40-60 tokens/sec",
-        "vram": "70GB",
-        "speed": "40-60 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Conversations, instruction following"
-    },
-    "phi-4-quantized": {
-        "name": "unsloth/phi-4-unsloth-bnb-4bit",
-        "description": "Quantized - 200+ tokens/sec",
-        "vram": "4GB",
-        "speed": "200+ tok/s",
-        "max_model_len": 16384,
-        "best_for": "Parallel processing, low memory"
-    },
-    "t3q-structured": {
-        "name": "JungZoona/T3Q-qwen2.5-14b-v1.0-e3",
-        "description": "Fine-tuned for structured output",
-        "vram": "28GB",
-        "speed": "120-150 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Structured JSON output"
-    },
-    "calme-analysis": {
-        "name": "MaziyarPanahi/calme-3.2-instruct-78b",
-        "description": "Fine-tuned for complex analysis",
-        "vram": "60GB",
-        "speed": "45-65 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Complex analysis tasks"
-    },
-    "rombos-merge": {
-        "name": "rombodawg/Rombos-LLM-V2.5-Qwen-72b",
-        "description": "Model merge - 50-70 tokens/sec",
-        "vram": "50GB",
-        "speed": "50-70 tok/s",
-        "max_model_len": 32768,
-        "best_for": "Combined strengths"
-    }
-}
-
 # Global state: Track loaded models
 # Format: {model_id: {"process": Popen, "port": int, "status": str}}
 loaded_models: Dict[str, Dict] = {}
@@ -169,7 +87,9 @@ def start_vllm_server(model_id: str, port: int) -> subprocess.Popen:
         "--max-model-len", str(max_model_len),
         "--dtype", "auto",
         "--trust-remote-code",
-        "--gpu-memory-utilization", "0.95"
+        "--gpu-memory-utilization", "0.95",
+        # Extraction prompts share their instruction prefix; reuse its KV cache
+        "--enable-prefix-caching"
     ]
     
     print(f"Starting vLLM server for model '{model_id}' ({model_name}) on port {port}")
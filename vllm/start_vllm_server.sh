@@ -54,5 +54,6 @@ $VENV_PYTHON -m vllm.entrypoints.openai.api_server \
     --max-model-len 32768 \
     --dtype auto \
     --trust-remote-code \
-    --gpu-memory-utilization 0.95
+    --gpu-memory-utilization 0.95 \
+    --enable-prefix-caching
 
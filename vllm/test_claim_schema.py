@@ -0,0 +1,75 @@
+"""Tests for claim_schema.py: record coercion, truncated arrays and ClaimStreamParser"""
+
+import json
+
+from claim_schema import ClaimStreamParser, parse_claim_records, to_claim_record
+
+
+CLAIMS = [
+    {"claim": "The Earth orbits the Sun.", "time": None, "confidence": 0.9},
+    {"claim": "Bitcoin will pass $100k", "time": "2025", "confidence": 0.4},
+    {"claim": 'He said "brace {yourself}" twice', "time": None, "confidence": None},
+]
+COMPLETION = json.dumps(CLAIMS)
+
+
+def test_to_claim_record_coerces_fields():
+    assert to_claim_record("  plain claim ") == {"claim": "plain claim", "time": None, "confidence": None}
+    assert to_claim_record({"claim": "c", "time": "N/A", "confidence": "2"}) == \
+        {"claim": "c", "time": None, "confidence": 1.0}
+    assert to_claim_record({"claim": "c", "confidence": "high"})["confidence"] is None
+    assert to_claim_record({"claim": "  "}) is None
+    assert to_claim_record(42) is None
+
+
+def test_parse_complete_array():
+    assert parse_claim_records(COMPLETION) == CLAIMS
+
+
+def test_parse_claims_object_and_empty_text():
+    assert parse_claim_records(json.dumps({"claims": CLAIMS[:1]})) == CLAIMS[:1]
+    assert parse_claim_records("") == []
+    assert parse_claim_records("not json") == []
+
+
+def test_parse_truncated_array_keeps_complete_objects():
+    # Cut inside the third object (inside its string, after a brace)
+    cut = COMPLETION.index("yourself}") + len("yourself}")
+    assert parse_claim_records(COMPLETION[:cut]) == CLAIMS[:2]
+    # Cut right after an object, before the closing bracket
+    assert parse_claim_records(COMPLETION[:COMPLETION.index("}") + 1]) == CLAIMS[:1]
+    # Nothing complete yet
+    assert parse_claim_records(COMPLETION[:10]) == []
+
+
+def test_stream_parser_emits_each_claim_once_for_any_split():
+    for size in (1, 3, 7, len(COMPLETION)):
+        parser = ClaimStreamParser()
+        records = []
+        for i in range(0, len(COMPLETION), size):
+            records.extend(parser.feed(COMPLETION[i:i + size]))
+        assert records == CLAIMS
+        assert parser.claims_parsed == len(CLAIMS)
+
+
+def test_stream_parser_emits_claims_as_they_complete():
+    parser = ClaimStreamParser()
+    first_end = COMPLETION.index("}") + 1
+    assert parser.feed(COMPLETION[:first_end - 1]) == []
+    assert parser.feed(COMPLETION[first_end - 1:first_end]) == CLAIMS[:1]
+    # Only the unfinished element stays buffered
+    assert parser.feed(COMPLETION[first_end:]) == CLAIMS[1:]
+
+
+def test_stream_parser_handles_claims_key_and_bare_strings():
+    parser = ClaimStreamParser()
+    text = json.dumps({"claims": ["first", {"claim": "second", "time": None, "confidence": None}]})
+    records = [record for char in text for record in parser.feed(char)]
+    assert [record["claim"] for record in records] == ["first", "second"]
+
+
+def test_stream_parser_truncated_stream_drops_unfinished_claim():
+    parser = ClaimStreamParser()
+    cut = COMPLETION.index("yourself}") + len("yourself}")
+    assert parser.feed(COMPLETION[:cut]) == CLAIMS[:2]
+    assert parser.claims_parsed == 2
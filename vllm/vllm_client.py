@@ -22,9 +22,27 @@ Usage:
 
 import requests
 import time
-from typing import Optional, List, Dict, Any
+import hashlib
+import json
+import math
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Iterator
 from openai import OpenAI
 
+from claim_schema import (ClaimRecord, ClaimStreamParser, guided_decoding_params, parse_claim_records,
+                          report_generated_tokens)
+
+
+# Tokens left free besides prompt and completion (special tokens, rounding)
+CONTEXT_SAFETY_MARGIN = 32
+# Rough estimate used when the server can't tokenize
+CHARS_PER_TOKEN = 4
+# Prompt token counts remembered per client
+TOKEN_CACHE_SIZE = 4096
+# Smallest completion budget worth sending a transcript for; below this
+# extract_claims splits the transcript instead
+MIN_EXTRACTION_TOKENS = 256
+
 
 class VLLMClient:
     """Client for vLLM server with model selection"""
@@ -53,6 +71,14 @@ class VLLMClient:
         self.vllm_api_key = vllm_api_key
         self.openai_client = None
         self.current_model = None
+        # Generated-token accounting for extract_claims
+        self.extraction_stats = {"transcripts": 0, "completion_tokens": 0, "truncated": 0}
+        # LRU of prompt token counts and context length per served model
+        # (None when the server doesn't report one)
+        self._token_counts: "OrderedDict[str, int]" = OrderedDict()
+        self._max_model_lens: Dict[str, Optional[int]] = {}
+        # Served model name, looked up once (and again after select_model)
+        self._model_name: Optional[str] = None
 
         # Initialize OpenAI client
         self._init_openai_client()
@@ -137,6 +163,7 @@ class VLLMClient:
             data = response.json()
             if data.get("status") == "success":
                 self.current_model = model_id
+                self._model_name = None
                 print(f"✅ Model loaded: {model_id}")
                 print(f"   {data['model_info']['description']}")
                 return True
@@ -148,6 +175,96 @@ class VLLMClient:
             print(f"❌ Error loading model: {e}")
             return False
     
+    def get_max_model_len(self, model_name: Optional[str] = None) -> Optional[int]:
+        """
+        Context length of a served model (None if the server doesn't say)
+
+        The model list is fetched once per model name; a miss is cached
+        too, and a later /tokenize response (count_tokens) fills it in.
+        """
+        model_name = model_name or self._get_model_name()
+        if model_name not in self._max_model_lens:
+            try:
+                for model in self.openai_client.models.list().data:
+                    # vLLM adds max_model_len to its model cards
+                    length = getattr(model, "max_model_len", None)
+                    if length:
+                        self._max_model_lens[model.id] = int(length)
+            except Exception:
+                pass
+            self._max_model_lens.setdefault(model_name, None)
+        return self._max_model_lens[model_name]
+
+    def count_tokens(
+        self,
+        prompt: Optional[str] = None,
+        messages: Optional[List[Dict[str, str]]] = None,
+        model_name: Optional[str] = None
+    ) -> int:
+        """
+        Count prompt tokens with the server's tokenizer (and chat template)
+
+        Counts are kept in an LRU cache, so repeated prompts don't cost a
+        round trip. Falls back to a character-based estimate when the
+        server's /tokenize endpoint is unavailable.
+
+        Args:
+            prompt: Plain completion prompt
+            messages: Chat messages (used instead of prompt when given)
+            model_name: Model to tokenize for (default: current model)
+
+        Returns:
+            Number of prompt tokens
+        """
+        model_name = model_name or self._get_model_name()
+        payload: Dict[str, Any] = {"model": model_name}
+        if messages is not None:
+            payload["messages"] = messages
+        else:
+            payload["prompt"] = prompt or ""
+
+        key = hashlib.blake2b(json.dumps(payload, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+        if key in self._token_counts:
+            self._token_counts.move_to_end(key)
+            return self._token_counts[key]
+
+        try:
+            response = requests.post(
+                f"{self.vllm_url}/tokenize",
+                json=payload,
+                headers={"Authorization": f"Bearer {self.vllm_api_key}"},
+                timeout=30
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            # Estimate, but don't cache it so a later call can get the real count
+            if messages is not None:
+                text = "".join(m["content"] for m in messages)
+            else:
+                text = prompt or ""
+            return len(text) // CHARS_PER_TOKEN + 1
+
+        if data.get("max_model_len"):
+            self._max_model_lens[model_name] = int(data["max_model_len"])
+        count = int(data["count"])
+        self._token_counts[key] = count
+        if len(self._token_counts) > TOKEN_CACHE_SIZE:
+            self._token_counts.popitem(last=False)
+        return count
+
+    def fit_max_tokens(self, prompt_tokens: int, max_tokens: int, model_name: Optional[str] = None) -> int:
+        """
+        Clamp max_tokens to the context left after the prompt
+
+        Returns:
+            Completion budget; <= 0 when the prompt itself doesn't fit
+        """
+        max_model_len = self.get_max_model_len(model_name)
+        if max_model_len is None:
+            return max_tokens
+        return min(max_tokens, max_model_len - prompt_tokens - CONTEXT_SAFETY_MARGIN)
+
     def chat(
         self,
         message: str,
@@ -174,12 +291,21 @@ class VLLMClient:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": message})
         
+        # Check the prompt fits before sending, and don't reserve more
+        # KV cache than the context has left
+        model_name = self._get_model_name()
+        prompt_tokens = self.count_tokens(messages=messages, model_name=model_name)
+        max_tokens = self.fit_max_tokens(prompt_tokens, max_tokens, model_name)
+        if max_tokens <= 0:
+            return (f"Error: prompt is {prompt_tokens} tokens, which doesn't fit the "
+                    f"{self.get_max_model_len(model_name)}-token context of {model_name}")
+        
         try:
             if stream:
                 return self._chat_stream(messages, max_tokens, temperature)
             else:
                 response = self.openai_client.chat.completions.create(
-                    model=self._get_model_name(),
+                    model=model_name,
                     messages=messages,
                     max_tokens=max_tokens,
                     temperature=temperature
@@ -212,62 +338,223 @@ class VLLMClient:
         except Exception as e:
             return f"Error: {e}"
     
+    def _claim_messages(self, transcript: str) -> List[Dict[str, str]]:
+        """Chat messages for claim extraction; the transcript comes last"""
+        prompt = f"""Extract factual claims and predictions from the following YouTube video transcript.
+Return ONLY a JSON array of claims. 
+Each claim should be a verifiable statement.
+Each claim should be a json object with the following keys: "claim", "time", "confidence".
+"claim" is the claim itself. Some claims may be predictions, some may be facts.
+"time" is the timepoint for which a prediction is to come true, according to the transcript. If the claim is not a prediction, this should be null.
+"confidence" is the confidence in the claim, between 0 and 1.
+
+Return format:
+[{{"claim": "claim 1", "time": null, "confidence": 0.9}}, ...]
+
+Transcript:
+{transcript}
+"""
+        return [
+            {"role": "system", "content": "You are a factual claim extraction system. Return only valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
+
     def extract_claims(
         self,
         transcript: str,
         max_tokens: int = 1000,
-        temperature: float = 0.0
-    ) -> str:
+        temperature: float = 0.0,
+        model_name: Optional[str] = None
+    ) -> List[ClaimRecord]:
         """
         Extract factual claims from YouTube transcript
         
+        The claim schema is sent as a guided-decoding parameter, so the model
+        can only produce the claim array and stops once it is closed. The
+        transcript comes last so the system prompt and instructions form a
+        prefix the server can cache across calls. max_tokens is clamped to
+        the context left after the prompt; transcripts that leave too little
+        room are split into pieces that fit and their claims merged.
+        
         Args:
             transcript: YouTube video transcript
-            max_tokens: Maximum tokens to generate
+            max_tokens: Maximum tokens to generate (upper bound only)
             temperature: Sampling temperature (0.0 recommended for consistency)
+            model_name: Served model to use (default: current model)
         
         Returns:
-            JSON string with extracted claims
+            List of {"claim", "time", "confidence"} records
         """
-        prompt = f"""Extract factual claims and predictions from the following YouTube video transcript.
-Return ONLY a JSON array of claims. 
-Each claim should be a verifiable statement.
-Each claim should be a json object with the following keys: "claim", "time", "confidence".
-"claim" is the claim itself. Some claims may be predictions, some may be facts.
-"time" is the timepoint for which a prediction is to come true, according to the transcript. If the claim is not a prediction, this should be None.
-"confidence" is the confidence in the claim, between 0 and 1.
-
-Transcript:
-{transcript}
-
-Return format:
-{{"claims": ["claim 1", "claim 2", ...]}}
-"""
+        model_name = model_name or self._get_model_name()
+        messages = self._claim_messages(transcript)
+        prompt_tokens = self.count_tokens(messages=messages, model_name=model_name)
+        budget = self.fit_max_tokens(prompt_tokens, max_tokens, model_name)
+        if budget < min(max_tokens, MIN_EXTRACTION_TOKENS):
+            return self._extract_claims_split(transcript, prompt_tokens, max_tokens, temperature, model_name)
         
-        return self.chat(
-            message=prompt,
-            system_prompt="You are a factual claim extraction system. Return only valid JSON.",
-            max_tokens=max_tokens,
-            temperature=temperature
-        )
+        try:
+            response = self.openai_client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                max_tokens=budget,
+                temperature=temperature,
+                **guided_decoding_params()
+            )
+        except Exception as e:
+            print(f"Error extracting claims: {e}")
+            return []
+        
+        choice = response.choices[0]
+        self.extraction_stats["transcripts"] += 1
+        if response.usage is not None:
+            self.extraction_stats["completion_tokens"] += response.usage.completion_tokens or 0
+        if choice.finish_reason == "length":
+            self.extraction_stats["truncated"] += 1
+        
+        return parse_claim_records(choice.message.content)
+    
+    def stream_claims(
+        self,
+        transcript: str,
+        max_tokens: int = 1000,
+        temperature: float = 0.0,
+        model_name: Optional[str] = None,
+        max_claims: Optional[int] = None
+    ) -> Iterator[ClaimRecord]:
+        """
+        Stream claims from a YouTube transcript as they are generated
+        
+        Same request as extract_claims, but streamed: each claim is yielded
+        as soon as its closing brace arrives, so callers can embed or show
+        claims before generation finishes. Once max_claims claims have been
+        yielded (or the caller stops iterating) the stream is closed, which
+        aborts the request on the server.
+        
+        Args:
+            transcript: YouTube video transcript
+            max_tokens: Maximum tokens to generate (upper bound only)
+            temperature: Sampling temperature (0.0 recommended for consistency)
+            model_name: Served model to use (default: current model)
+            max_claims: Stop after this many claims (None: all)
+        
+        Yields:
+            {"claim", "time", "confidence"} records
+        """
+        if max_claims is not None and max_claims <= 0:
+            return
+        model_name = model_name or self._get_model_name()
+        messages = self._claim_messages(transcript)
+        prompt_tokens = self.count_tokens(messages=messages, model_name=model_name)
+        budget = self.fit_max_tokens(prompt_tokens, max_tokens, model_name)
+        if budget < min(max_tokens, MIN_EXTRACTION_TOKENS):
+            # Pieces are extracted one request at a time; nothing to stream
+            claims = self._extract_claims_split(transcript, prompt_tokens, max_tokens, temperature, model_name)
+            yield from claims[:max_claims]
+            return
+        
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                max_tokens=budget,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+                **guided_decoding_params()
+            )
+        except Exception as e:
+            print(f"Error extracting claims: {e}")
+            return
+        
+        parser = ClaimStreamParser()
+        yielded = 0
+        self.extraction_stats["transcripts"] += 1
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    self.extraction_stats["completion_tokens"] += chunk.usage.completion_tokens or 0
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason == "length":
+                    self.extraction_stats["truncated"] += 1
+                for record in parser.feed(choice.delta.content or ""):
+                    yield record
+                    yielded += 1
+                    if max_claims is not None and yielded >= max_claims:
+                        return
+        except Exception as e:
+            print(f"Error streaming claims: {e}")
+        finally:
+            # Also runs when the caller stops early; closing the connection
+            # makes vLLM abort the request
+            stream.close()
+    
+    def _extract_claims_split(
+        self,
+        transcript: str,
+        prompt_tokens: int,
+        max_tokens: int,
+        temperature: float,
+        model_name: str
+    ) -> List[ClaimRecord]:
+        """Extract claims from consecutive pieces of a transcript too long for one request"""
+        max_model_len = self.get_max_model_len(model_name)
+        overhead = self.count_tokens(messages=self._claim_messages(""), model_name=model_name)
+        reserve = min(max_tokens, max(MIN_EXTRACTION_TOKENS, (max_model_len - overhead) // 4))
+        room = max_model_len - overhead - CONTEXT_SAFETY_MARGIN - reserve
+        words = transcript.split()
+        if room <= 0 or len(words) < 2:
+            print(f"Error extracting claims: transcript doesn't fit the "
+                  f"{max_model_len}-token context of {model_name}")
+            return []
+        
+        pieces = max(2, math.ceil((prompt_tokens - overhead) / room))
+        size = math.ceil(len(words) / pieces)
+        print(f"Transcript is ~{prompt_tokens - overhead} tokens; extracting from "
+              f"{math.ceil(len(words) / size)} pieces to fit {model_name}")
+        
+        # Each piece is checked again and split further if it still doesn't fit
+        claims: List[ClaimRecord] = []
+        seen = set()
+        for start in range(0, len(words), size):
+            piece = " ".join(words[start:start + size])
+            for record in self.extract_claims(piece, max_tokens, temperature, model_name):
+                key = " ".join(record["claim"].lower().split())
+                if key not in seen:
+                    seen.add(key)
+                    claims.append(record)
+        return claims
+    
+    def print_extraction_stats(self, max_tokens: int = 1000):
+        """Print generated tokens per transcript for extract_claims calls so far"""
+        stats = self.extraction_stats
+        report_generated_tokens(stats["completion_tokens"], stats["transcripts"], max_tokens)
+        if stats["truncated"]:
+            print(f"   {stats['truncated']} of {stats['transcripts']} hit max_tokens")
     
     def _get_model_name(self) -> str:
-        """Get the full model name for OpenAI client"""
+        """Get the full model name for OpenAI client (looked up once per model)"""
+        if self._model_name is not None:
+            return self._model_name
+
         if not self.current_model:
             # Try to get current model from server
             current = self.get_current_model()
             if current:
-                return current["model_info"]["name"]
+                self._model_name = current["model_info"]["name"]
+                return self._model_name
         
         # Fallback: try to get from vLLM directly
         try:
             models = self.openai_client.models.list()
             if models.data:
-                return models.data[0].id
+                self._model_name = models.data[0].id
+                return self._model_name
         except:
             pass
         
-        # Last resort: use a default
+        # Last resort: use a default (not cached, so a later call can reach the server)
         return "Qwen/Qwen2.5-14B-Instruct"
     
     def print_available_models(self):